@@ -0,0 +1,185 @@
+"""
+運行間隔（headway）と運行頻度の集計
+
+全時刻表を1つの表にまとめ、ソート済みの営業日基準の分の差分を
+時間帯ごとに groupby する1回のベクトル演算で集計する。
+結果はファイル内容のハッシュごとにキャッシュし、変わったファイルだけを再計算する。
+キャッシュには直近に集計したファイルのハッシュの分だけを残す。
+
+    python analytics.py                 # 時間帯別の運行間隔
+    python analytics.py --report span   # 始発・終電
+    python analytics.py --report compare --format csv
+"""
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from timetable_core.service_time import SERVICE_DAY_START_MIN, format_service_time
+from timetable_core.loader import TIMETABLE_DIR, list_csv_files, read_timetable_blobs
+
+CACHE_DIR = ".analytics_cache"
+CACHE_FILE = "metrics.pkl"
+KEYS = ["line", "station", "direction", "day_type"]
+
+# ファイルハッシュ（file_hash 列）ごとの集計結果。全ファイル分を1つの表で持つ
+# {"hourly": DataFrame, "span": DataFrame, "empty": 列車の無いファイルのハッシュ}
+_memory_cache: dict = {}
+
+
+def _compute(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    複数ファイル分の df（file_hash 列付き）をまとめて集計する。
+    groupby の前に全体を1回ソートし、隣り合う行の差を運行間隔とする。
+    グループの先頭行は前の列車が無いので NaN。
+    """
+    group_keys = ["file_hash"] + KEYS
+    df = df.sort_values(group_keys + ["svc_min"], kind="stable", ignore_index=True)
+
+    mins = df["svc_min"].to_numpy(dtype=np.int64)
+    codes = df.groupby(group_keys, sort=False).ngroup().to_numpy()
+    headway = np.diff(mins, prepend=0).astype(float)
+    headway[np.r_[True, codes[1:] != codes[:-1]]] = np.nan
+    df["headway"] = headway
+    # 営業日の時間帯（6〜24時。0時台は24時台）
+    df["hour"] = (mins + SERVICE_DAY_START_MIN) // 60
+
+    hourly = (
+        df.groupby(group_keys + ["hour"], sort=True)
+        .agg(
+            trains=("svc_min", "size"),
+            min_headway=("headway", "min"),
+            max_headway=("headway", "max"),
+            avg_headway=("headway", "mean"),
+        )
+        .reset_index()
+    )
+    span = (
+        df.groupby(group_keys, sort=True)
+        .agg(
+            trains=("svc_min", "size"),
+            first_min=("svc_min", "min"),
+            last_min=("svc_min", "max"),
+            avg_headway=("headway", "mean"),
+        )
+        .reset_index()
+    )
+    return hourly, span
+
+
+def _load_cache(cache_dir: str | None) -> dict:
+    if not _memory_cache and cache_dir:
+        path = os.path.join(cache_dir, CACHE_FILE)
+        if os.path.exists(path):
+            _memory_cache.update(pd.read_pickle(path))
+    return _memory_cache
+
+
+def _save_cache(cache_dir: str | None, cache: dict):
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = os.path.join(cache_dir, CACHE_FILE + ".tmp")
+        pd.to_pickle(cache, tmp)
+        os.replace(tmp, os.path.join(cache_dir, CACHE_FILE))
+
+
+def compute_metrics(paths: list[str], cache_dir: str | None = CACHE_DIR) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    paths の全時刻表について (hourly, span) を返す。
+
+    hourly: 時刻表×時間帯ごとの本数と最小/最大/平均の運行間隔（分）
+    span:   時刻表ごとの本数、始発・終電（営業日基準の分）、平均運行間隔
+    どちらも path 列を持つ。キャッシュに無いハッシュのファイルだけをまとめて集計する。
+    cache_dir が None ならディスクにはキャッシュしない。
+    """
+    blobs = {}
+    for p in paths:
+        with open(p, "rb") as f:
+            blobs[p] = f.read()
+    digests = {p: hashlib.sha256(data).hexdigest() for p, data in blobs.items()}
+
+    cache = _load_cache(cache_dir)
+    current = set(digests.values())
+    known = set(cache["span"]["file_hash"]) | cache["empty"] if cache else set()
+    missing = {}
+    for p, digest in digests.items():
+        if digest not in known:
+            missing[digest] = blobs[p]
+
+    if missing or known - current:
+        # 今回のファイルに無いハッシュ（書き換え前の内容など）は捨てる
+        hourly = cache["hourly"][cache["hourly"]["file_hash"].isin(current)] if cache else None
+        span = cache["span"][cache["span"]["file_hash"].isin(current)] if cache else None
+        if missing:
+            df = read_timetable_blobs(missing)
+            df = df.rename(columns={"source": "file_hash"})[["file_hash"] + KEYS + ["svc_min"]]
+            new_hourly, new_span = _compute(df)
+            hourly = pd.concat([hourly, new_hourly], ignore_index=True)
+            span = pd.concat([span, new_span], ignore_index=True)
+        # 列車が1本も無いファイルも「集計済み」として覚えておく
+        empty = ((cache["empty"] if cache else set()) | set(missing)) & current - set(span["file_hash"])
+        cache.update(hourly=hourly, span=span, empty=empty)
+        _save_cache(cache_dir, cache)
+
+    files = pd.DataFrame({"path": list(digests), "file_hash": list(digests.values())})
+    if not cache:
+        return pd.DataFrame(columns=KEYS + ["hour", "path"]), pd.DataFrame(columns=KEYS + ["path"])
+    hourly = files.merge(cache["hourly"], on="file_hash").drop(columns="file_hash")
+    span = files.merge(cache["span"], on="file_hash").drop(columns="file_hash")
+    return hourly, span
+
+
+def compare_day_types(hourly: pd.DataFrame) -> pd.DataFrame:
+    """時間帯ごとに平日と土日祝の本数・平均運行間隔を横に並べる。"""
+    table = hourly.pivot_table(
+        index=["line", "station", "direction", "hour"],
+        columns="day_type",
+        values=["trains", "avg_headway"],
+        # 本数は足し、運行間隔は平均する（同じ組が複数のファイルにあるとき）
+        aggfunc={"trains": "sum", "avg_headway": "mean"},
+    )
+    table.columns = [f"{day_type}_{value}" for value, day_type in table.columns]
+    table = table.reset_index()
+    if {"weekday_trains", "weekend_holiday_trains"} <= set(table.columns):
+        table["trains_diff"] = table["weekend_holiday_trains"].fillna(0) - table["weekday_trains"].fillna(0)
+    return table
+
+
+def format_span(span: pd.DataFrame) -> pd.DataFrame:
+    """始発・終電を "HH:MM"（24時以降は 24:xx）にした表示用の表。"""
+    out = span.copy()
+    out["first"] = out["first_min"].map(format_service_time)
+    out["last"] = out["last_min"].map(format_service_time)
+    return out[KEYS + ["trains", "first", "last", "avg_headway"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="時刻表の運行間隔・運行頻度を集計する")
+    parser.add_argument("--dir", default=TIMETABLE_DIR, help="時刻表CSVのディレクトリ")
+    parser.add_argument("--report", choices=["hourly", "span", "compare"], default="hourly")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    parser.add_argument("--no-cache", action="store_true", help="ディスクキャッシュを使わない")
+    args = parser.parse_args(argv)
+
+    hourly, span = compute_metrics(list_csv_files(args.dir), cache_dir=None if args.no_cache else CACHE_DIR)
+    if args.report == "hourly":
+        result = hourly.drop(columns="path")
+    elif args.report == "span":
+        result = format_span(span)
+    else:
+        result = compare_day_types(hourly)
+
+    if args.format == "csv":
+        result.to_csv(sys.stdout, index=False)
+    elif args.format == "json":
+        print(result.to_json(orient="records", force_ascii=False))
+    else:
+        with pd.option_context("display.max_rows", None, "display.width", 200):
+            print(result.round(1).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,265 +1,207 @@
 import os
-import glob
-import streamlit as st
-import pandas as pd
-from datetime import datetime, date, time as dtime, timedelta
-from zoneinfo import ZoneInfo
-
-st.set_page_config(page_title="地下鉄 到着案内", layout="wide")
-JST = ZoneInfo("Asia/Tokyo")
-TIMETABLE_DIR = "timetables"  # 駅CSV置き場
+from datetime import timedelta
 
-AUTO_REFRESH_SEC = 15
-try:
-    from streamlit_autorefresh import st_autorefresh
-    st_autorefresh(interval=AUTO_REFRESH_SEC * 1000, key="refresh")
-except Exception:
-    pass
+import streamlit as st
 
+from app_state import TIMETABLE_CLOCK, timetable_source
+from timetable_core import (
+    DAY_TYPE_LABELS,
+    TIMETABLE_DIR,
+    BoundedCache,
+    Departure,
+    StationSearchIndex,
+    auto_day_type as get_auto_day_type,
+    board_selection,
+    board_time_key,
+    card_html,
+    compute_boards,
+    load_station_catalog,
+    next_refresh_delay,
+    station_selection,
+)
 
-def is_weekend_or_holiday(d: date) -> bool:
-    """土日祝なら True。jpholiday が無ければ土日だけ判定。"""
-    # weekend
-    if d.weekday() >= 5:
-        return True
-    # holiday (Japan)
+st.set_page_config(page_title="地下鉄 到着案内", layout="wide")
+# 発車案内キャッシュの上限（件数・MB・秒）。時刻表は app_state.timetable_source() が版を2つまで持つ
+BOARD_CACHE_ENTRIES = int(os.environ.get("BOARD_CACHE_ENTRIES", "256"))
+BOARD_CACHE_MB = float(os.environ.get("BOARD_CACHE_MB", "16"))
+BOARD_CACHE_TTL_SEC = float(os.environ.get("BOARD_CACHE_TTL_SEC", "300"))
+# 遅い再実行の調査用のしきい値（ms）。これ以上かかった再実行の cProfile を profiles/ に残す。
+# 保存したものは rerun_profiles.py で見る
+TIMETABLE_PROFILE_MS = os.environ.get("TIMETABLE_PROFILE_MS")
+# 運用者が設定したときだけ、?profile=500 でそのセッションのしきい値を指定できる
+# （誰でもプロファイルとディスクへの書き込みを有効にできないように）
+TIMETABLE_PROFILE_QUERY = os.environ.get("TIMETABLE_PROFILE_QUERY")
+
+rerun_profiler = None
+profile_error = None
+profile_ms = TIMETABLE_PROFILE_MS
+if TIMETABLE_PROFILE_QUERY:
+    profile_ms = st.query_params.get("profile") or profile_ms
+if profile_ms:
+    from timetable_core.profiling import RerunProfiler
     try:
-        import jpholiday
-        return jpholiday.is_holiday(d)
-    except Exception:
-        return False
-
-
-def parse_hhmm_to_dt(hhmm: str, base_date: date) -> datetime:
-    hh, mm = str(hhmm).split(":")
-    return datetime.combine(base_date, dtime(int(hh), int(mm)), tzinfo=JST)
-
-
-@st.cache_data
-def load_timetable_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    required = {"line", "station", "direction", "day_type", "time"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"CSVに必要な列が足りません: {missing}")
-
-    # optional columns
-    if "dest" not in df.columns:
-        df["dest"] = ""
-    if "remark" not in df.columns:
-        df["remark"] = ""
-
-    # 正規化
-    df["line"] = df["line"].astype(str)
-    df["station"] = df["station"].astype(str)
-    df["direction"] = df["direction"].astype(str)
-    df["day_type"] = df["day_type"].astype(str)
-    df["time"] = df["time"].astype(str)
-
-    return df
-
-
-def list_csv_files() -> list[str]:
-    os.makedirs(TIMETABLE_DIR, exist_ok=True)
-    return sorted(glob.glob(os.path.join(TIMETABLE_DIR, "*.csv")))
+        rerun_profiler = RerunProfiler(float(profile_ms))
+    except ValueError:
+        # 読めないしきい値（abc, -1, nan など）は測らずに、サイドバーで知らせる
+        profile_error = f"プロファイルのしきい値 {profile_ms!r} は 0 以上の ms で指定してください。測定していません。"
+    else:
+        # 時刻表の読み込みや jpholiday の初回 import も含めて測る
+        rerun_profiler.start()
 
 
-def parse_filename(path: str):
+@st.cache_resource
+def app_caches() -> dict[str, BoundedCache]:
     """
-    期待: timetables/南北線_麻生_真駒内方面.csv
-    => (line, station, direction)
-    うまく分割できなければ (None, None, None)
+    プロセスに1組のキャッシュ。値はコピーせずに全セッションで共有する。
+      boards      (時刻表, 臨時ダイヤ, ダイヤ, 本数, 駅, 時刻のキー) → 発車案内
+      unmatched   (時刻表, 臨時ダイヤ) → 当たる列車の無い運休・変更の行
     """
-    base = os.path.basename(path)
-    name, _ = os.path.splitext(base)
-    parts = name.split("_")
-    if len(parts) >= 3:
-        return parts[0], parts[1], "_".join(parts[2:])
-    return None, None, None
-
-
-def next_trains(df: pd.DataFrame, now: datetime, n=3) -> pd.DataFrame:
-    """now以降の次列車n本を返す。当日と翌日の日付をまたがって正しく処理。"""
-    tmp = df.copy()
-    
-    # 当日と翌日の両方の日付でdatetime列を作る
-    today = now.date()
-    tomorrow = (now + timedelta(days=1)).date()
-    
-    tmp["dt_today"] = tmp["time"].apply(lambda x: parse_hhmm_to_dt(x, today))
-    tmp["dt_tomorrow"] = tmp["time"].apply(lambda x: parse_hhmm_to_dt(x, tomorrow))
-    
-    # 当日の時刻がnow以降なら当日、そうでなければ翌日を使う
-    tmp["dt"] = tmp.apply(
-        lambda row: row["dt_today"] if row["dt_today"] >= now else row["dt_tomorrow"],
-        axis=1
+    return {
+        "unmatched": BoundedCache("unmatched", max_entries=2),
+        "boards": BoundedCache("boards", max_entries=BOARD_CACHE_ENTRIES,
+                               max_bytes=int(BOARD_CACHE_MB * 2**20), ttl=BOARD_CACHE_TTL_SEC),
+    }
+
+
+@st.cache_resource
+def station_index() -> StationSearchIndex:
+    """駅名・かな・ローマ字の検索索引。起動時に1回だけ作る。"""
+    return StationSearchIndex(load_station_catalog())
+
+
+def big_card(title: str, rows: tuple[Departure, ...]):
+    # カードの HTML は静的書き出し（export_static.py）と共通
+    st.markdown(card_html(title, rows), unsafe_allow_html=True)
+
+
+def render():
+    """1回の再実行で描く画面（サイドバーと発車案内）。"""
+    # ----------------------------
+    # Sidebar
+    # ----------------------------
+    st.sidebar.title("設定")
+    if profile_error:
+        st.sidebar.warning(profile_error)
+
+    now = timetable_source().now()
+    st.sidebar.write("現在時刻")
+    # 時計は分まで（秒まで出すと毎秒の再実行が要る）
+    st.sidebar.markdown(f"**{now.strftime('%Y-%m-%d %H:%M')}**")
+    if TIMETABLE_CLOCK:
+        st.sidebar.caption(f"TIMETABLE_CLOCK={TIMETABLE_CLOCK} の時計で表示中")
+
+    # day_type auto（深夜0時～朝4時59分は翌日のダイヤ）
+    auto_day_type = get_auto_day_type(now)
+    st.sidebar.write("適用ダイヤ判定")
+    st.sidebar.markdown(f"**{DAY_TYPE_LABELS[auto_day_type]}**")
+
+    # たまに手動で切り替えたい人向け
+    day_type = st.sidebar.radio(
+        "使用するダイヤ",
+        options=["auto", "weekday", "weekend_holiday"],
+        index=0,
+        help="autoは祝日も判定（jpholidayが入っている場合）",
     )
-    
-    future = tmp[tmp["dt"] >= now].sort_values("dt").head(n)
-    if future.empty:
-        return future
-
-    future = future.copy()
-    future["in_min"] = ((future["dt"] - now).dt.total_seconds() / 60).round().astype(int)
-    return future[["time", "dest", "remark", "in_min"]]
-
-
-def big_card(title: str, rows: pd.DataFrame):
-    st.markdown(
-        f"""
-        <div style="
-            border: 3px solid #222;
-            border-radius: 18px;
-            padding: 18px 18px 10px 18px;
-            margin-bottom: 14px;
-            background: #fff;
-        ">
-          <div style="font-size: 30px; font-weight: 800; margin-bottom: 8px;">{title}</div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    if rows is None or rows.empty:
-        st.markdown(
-            """
-            <div style="font-size: 26px; font-weight: 700; padding: 10px 0 16px 0;">
-              次の列車が見つかりません
-            </div>
-            """,
-            unsafe_allow_html=True,
+    if day_type == "auto":
+        day_type = auto_day_type
+
+    n_trains = st.sidebar.slider("表示する本数", 1, 5, 2)
+
+    # 駅を検索すると、その駅の発車案内だけを開く（?station=大通 でも開ける）
+    query = st.sidebar.text_input("駅を検索", value=st.query_params.get("station", ""),
+                                  placeholder="さっぽろ / sapporo / 札幌")
+    station = None
+    if query:
+        matches = list(dict.fromkeys(s.name for s in station_index().search(query)))
+        if matches:
+            station = st.sidebar.radio("該当する駅", matches, index=0)
+        else:
+            st.sidebar.caption("該当する駅がありません")
+    # 選んだ駅は ?station= に書き戻す（そのURLで同じ駅を開き直せる）。検索を消したら全駅に戻す
+    if station and st.query_params.get("station") != station:
+        st.query_params["station"] = station
+    elif not query and "station" in st.query_params:
+        del st.query_params["station"]
+
+    # 全駅の時刻表（コンパイル済みの連結配列）。ダイヤ改正の版は営業日ごとに選ぶ
+    try:
+        loaded = timetable_source().lookup(now)
+    except Exception as e:
+        st.error(f"読み込みエラー: {e}")
+        st.stop()
+    if loaded is None:
+        st.warning(
+            f"`{TIMETABLE_DIR}/` にCSVがありません。\n\n"
+            "例: `timetables/南北線_麻生_真駒内方面.csv` を置いてください。"
         )
-    else:
-        for _, r in rows.iterrows():
-            t = str(r["time"])
-            dest = str(r.get("dest", "")).strip() or "—"
-            remark = str(r.get("remark", "")).strip()
-            if remark.lower() == "nan":
-                remark = ""
-            mins = int(r["in_min"])
-
-            right = f"あと {mins} 分"
-            left_sub = f"({dest})"
-            if remark:
-                left_sub += f"  <span style='color:#B00; font-weight:800;'>[{remark}]</span>"
-
-            st.markdown(
-                f"""
-                <div style="
-                    display:flex; justify-content:space-between; align-items:baseline;
-                    padding: 10px 0; border-top: 1px solid #ddd;
-                ">
-                  <div style="font-size: 26px; font-weight: 750;">
-                    {t} <span style="font-size:18px; font-weight:600; color:#444;">{left_sub}</span>
-                  </div>
-                  <div style="font-size: 34px; font-weight: 900;">
-                    {right}
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-
-    st.markdown("</div>", unsafe_allow_html=True)
-
-
-# ----------------------------
-# Sidebar
-# ----------------------------
-st.sidebar.title("設定")
-
-now = datetime.now(JST)
-st.sidebar.write("現在時刻")
-st.sidebar.markdown(f"**{now.strftime('%Y-%m-%d %H:%M:%S')}**")
-
-# day_type auto
-# 営業時間中（朝5時～深夜23時59分）は当日のダイヤを使う。
-# 深夜（0時～朝4時59分）は翌日のダイヤを使う。
-if 0 <= now.hour < 5:
-    effective_date = (now + timedelta(days=1)).date()
-else:
-    effective_date = now.date()
-auto_day_type = "weekend_holiday" if is_weekend_or_holiday(effective_date) else "weekday"
-st.sidebar.write("適用ダイヤ判定")
-st.sidebar.markdown(f"**{'土日祝' if auto_day_type=='weekend_holiday' else '平日'}**")
-
-# たまに手動で切り替えたい人向け
-day_type = st.sidebar.radio(
-    "使用するダイヤ",
-    options=["auto", "weekday", "weekend_holiday"],
-    index=0,
-    help="autoは祝日も判定（jpholidayが入っている場合）",
-)
-if day_type == "auto":
-    day_type = auto_day_type
-
-n_trains = st.sidebar.slider("表示する本数", 1, 5, 2)
-
-# CSV一覧を読み、駅・路線・方面の候補を出す
-files = list_csv_files()
-if not files:
-    st.warning(
-        f"`{TIMETABLE_DIR}/` にCSVがありません。\n\n"
-        "例: `timetables/南北線_麻生_真駒内方面.csv` を置いてください。"
+        st.stop()
+    timetables, source = loaded.timetables, loaded.source
+    if loaded.revision:
+        st.sidebar.caption(f"{loaded.revision:%Y-%m-%d} 改正のダイヤ")
+
+    # 臨時ダイヤ（期間を区切った追加・運休）は時刻表に混ぜず、問い合わせのときに併合する
+    exceptions_fp, exceptions = timetable_source().exceptions()
+    # 営業日が同じでも、翌営業日分の列車には翌日の例外が当たる
+    special = (exceptions.active(now), exceptions.active(now + timedelta(days=1)))
+    for period in special[0]:
+        st.sidebar.caption(f"臨時ダイヤ: {period.name or '（名前なし）'}（{period.start:%m/%d}〜{period.end:%m/%d}）")
+    # 運休・変更の行が時刻表のどの列車にも当たらなければ、書き間違いとして知らせる
+    for problem in app_caches()["unmatched"].get_or_create((source, exceptions_fp),
+                                                            lambda: tuple(exceptions.unmatched(timetables))):
+        st.sidebar.warning(f"臨時ダイヤ: {problem}")
+
+    # 表示する全駅の次列車を1回でまとめて求める
+    # （駅順は STATION_ORDER、麻生駅は真駒内方面、それ以外は麻生方面のみ表示）
+    # 検索で駅を選んだときは、その駅の全方面だけ
+    # 同じ分に再実行した他のセッションと結果を共有する
+    selection = tuple(station_selection(timetables, station) if station else board_selection(timetables))
+    boards = app_caches()["boards"].get_or_create(
+        (source, exceptions_fp, special, day_type, n_trains, selection, board_time_key(now)),
+        lambda: tuple(compute_boards(timetables, now, day_type, n=n_trains, selection=selection,
+                                     exceptions=exceptions, tomorrow=loaded.tomorrow)),
     )
-    st.stop()
-
-meta = []
-for p in files:
-    line, station, direction = parse_filename(p)
-    meta.append({"path": p, "line": line or "?", "station": station or "?", "direction": direction or "?"})
-meta_df = pd.DataFrame(meta)
-
-# 南北線の場合、デフォルトでさっぽろ→麻生方面 と 麻生→真駒内方面 を横に並べて表示
-# 南北線の駅順序（表示順用）
-STATION_ORDER = [
-    "麻生", "北34条", "北24条", "北18条", "北12条", "さっぽろ", "大通", "すすきの",
-    "中島公園", "幌平橋", "中の島", "平岸", "南平岸", "澄川", "自衛隊前", "真駒内"
-]
-
-def get_station_order(station_name):
-    if station_name in STATION_ORDER:
-        return STATION_ORDER.index(station_name)
-    return 999
-
-# meta_df にソート用カラム追加
-meta_df["sort_key"] = meta_df["station"].apply(get_station_order)
-meta_df = meta_df.sort_values("sort_key")
-
-# 駅ごとにグループ化して表示
-# ユニークな駅リストを取得（ソート済み）
-unique_stations = meta_df["station"].unique()
-
-for station in unique_stations:
-    # フィルタリングロジック
-    # 麻生駅 -> 真駒内方面のみ表示
-    # それ以外 -> 麻生方面のみ表示
+    if station and not boards:
+        st.info(f"{station}駅の時刻表はまだありません。")
+    elif not boards:
+        st.warning("表示できる駅がありません。")
+
+    for i, board in enumerate(boards):
+        # 1駅を開いたときは方面ごとのカードが続くので、駅名は最初の1回だけ
+        if i == 0 or boards[i - 1].station != board.station:
+            st.markdown(f"## {board.station}")
     
-    target_direction = None
-    if station == "麻生":
-        target_direction = "真駒内方面"
-    else:
-        target_direction = "麻生方面"
-
-    # この駅・方面のデータを取得
-    target_row = meta_df[(meta_df["station"] == station) & (meta_df["direction"] == target_direction)]
+        if board.available:
+            big_card(f"{board.direction}（{DAY_TYPE_LABELS[day_type]}）", board.departures)
+        else:
+            st.info("該当するダイヤがありません")
     
-    if not target_row.empty:
-        # 駅名ヘッダーを表示（データがある場合のみ）
-        st.markdown(f"## {station}")
-        
-        row = target_row.iloc[0]
-        try:
-            df = load_timetable_csv(row["path"])
-            df_day = df[df["day_type"] == day_type].copy()
-            
-            if not df_day.empty:
-                title = f"{target_direction}（{'土日祝' if day_type=='weekend_holiday' else '平日'}）"
-                nxt = next_trains(df_day, now, n=n_trains)
-                big_card(title, nxt)
-            else:
-                st.info("該当するダイヤがありません")
-        except Exception as e:
-            st.error(f"読み込みエラー: {e}")
-        
         st.markdown("---")
 
+    # 次に表示が変わる瞬間（時計の分。「あと N 分」と発車も同時に変わる）に再実行する。
+    # 1時間以内に列車が無い夜間は見回りの間隔だけ
+    refresh_sec = next_refresh_delay(boards, now, clock_minutes=True)
+    try:
+        from streamlit_autorefresh import st_autorefresh
+        st_autorefresh(interval=int(refresh_sec * 1000), key="refresh")
+    except Exception:
+        pass
+
+    if st.query_params.get("debug"):
+        # ?debug=1 でキャッシュの中身を表示する
+        with st.expander("キャッシュ"):
+            caches = [timetable_source().cache, timetable_source().exception_cache, *app_caches().values()]
+            st.dataframe([c.summary() for c in caches])
+            st.dataframe([row for c in caches for row in c.stats()])
+            st.caption(f"次の再実行まで {refresh_sec:.1f} 秒")
+
+
+if rerun_profiler is None:
+    render()
+else:
+    # st.stop() や例外で抜けた回も測定を止め、しきい値を超えていれば残す
+    try:
+        render()
+    finally:
+        saved = rerun_profiler.finish()
+    if saved and st.query_params.get("debug"):
+        st.caption(f"この再実行のプロファイルを保存しました: {saved}")
@@ -0,0 +1,29 @@
+"""
+app.py と pages/ で共有する、プロセスに1つの状態
+
+Streamlit はページごとに別のスクリプトとして実行するので、ここで cache_resource にした
+ものだけが全ページ・全セッションで同じオブジェクトになる。
+"""
+import os
+
+import streamlit as st
+
+from timetable_core import TimetableSource, clock_from_spec
+
+# 設定すると各CSVを読まず、shm_store.py のローダーが共有メモリに載せた時刻表を使う
+TIMETABLE_SHM = os.environ.get("TIMETABLE_SHM")
+# 再現試験用の時計。例: "2026-01-19T23:55"（固定）、"2026-01-19T23:55@60"（60倍速）
+TIMETABLE_CLOCK = os.environ.get("TIMETABLE_CLOCK")
+
+
+@st.cache_resource
+def timetable_source() -> TimetableSource:
+    """
+    プロセスに1つの時計と時刻表。早送りの時計も再実行とページをまたいで進み続け、
+    共有メモリの版の切り替えは lookup() のたびに確認される。
+    """
+    reader = None
+    if TIMETABLE_SHM:
+        from shm_store import SharedTimetableReader
+        reader = SharedTimetableReader(TIMETABLE_SHM)
+    return TimetableSource(clock_from_spec(TIMETABLE_CLOCK), reader=reader)
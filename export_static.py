@@ -0,0 +1,259 @@
+"""
+発車案内の静的書き出し
+
+Python も WebSocket も使えない表示器（電子ペーパー、ブラウザだけの掲示板）向けに、
+全駅・全方面・各ダイヤについて営業日の1分ごとの発車案内を前もって計算し、
+静的ファイルとして書き出す。表示器は時計だけで読むファイルを決められる。
+
+    out/
+      index.json                         書き出した駅と設定
+      calendar.json                      日付ごとに読むディレクトリ（0時～4時59分は翌日の分を使う）
+      {day_type}/{路線}_{駅}_{方面}/{HH}.json   時計の HH 時台の60分ぶん
+      {day_type}/{路線}_{駅}_{方面}/{HH}.html   同じ内容の HTML（{HH}.html#m{MM} で MM 分を表示）
+      {day_type}@{日付}/...                   ダイヤ改正の前後や臨時ダイヤの日の分（下記）
+
+JSON の minutes[MM] はその分の発車案内 [[時刻, 行先, 備考, あと何分], ...]、
+HTML の各 section は app.py と同じカード。「あと N 分」は MM 分ちょうど（0秒）時点の値。
+発車案内は app.py と同じく TimetableSource から引いた改正の版と臨時ダイヤで計算する。
+{day_type}/ は基準の版で臨時ダイヤの無い日の分。時計の1日は前営業日の終わり（0〜3時台）と
+翌営業日の始発（終電のあと）にもまたがるので、前後の日も含めて改正の版か臨時ダイヤの期間が
+基準と違う日は、同じ組み合わせの最初の日付で {day_type}@{日付}/ に書き出し、calendar.json で指す。
+DAY_TYPES に無いダイヤの時刻表は書き出さず、index.json の skipped_day_types に載せる。
+前回の書き出しで作ったもので今回は無い駅・ダイヤのディレクトリは消す（out/ の他のファイルはそのまま）。
+
+    python export_static.py --out static
+    python export_static.py --out static -n 3 --days 400
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+from timetable_core import (
+    DAY_TYPE_LABELS,
+    DAY_TYPES,
+    JST,
+    TIMETABLE_DIR,
+    TimetableSource,
+    active_revision,
+    auto_day_type,
+    card_html,
+    compute_boards,
+)
+
+HOUR_HTML = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>section {{ display: none; }} section:target {{ display: block; }}</style>
+</head>
+<body>
+{sections}
+</body>
+</html>
+"""
+
+# {day_type}/ の分を計算する日付（改正も臨時ダイヤも無い、基準の版の日）
+BASE_DAY = date(2000, 1, 1)
+# 改正の前後の日は2つの版を使うので、ワーカーでも版は2つ以上持つ
+WORKER_VERSIONS = 4
+
+# ワーカープロセスごとに1つの時刻表（版ごとに1回だけコンパイルする）
+_source: TimetableSource | None = None
+
+
+def _init_worker(timetable_dir: str):
+    global _source
+    _source = TimetableSource(timetable_dir=timetable_dir, max_versions=WORKER_VERSIONS)
+
+
+def board_dir(out_dir: str, day_type: str, line: str, station: str, direction: str) -> str:
+    return os.path.join(out_dir, day_type, f"{line}_{station}_{direction}")
+
+
+def all_boards(timetables) -> list[tuple[str, str, str]]:
+    """時刻表のある (路線, 駅, 方面) を重複なく返す。"""
+    return sorted({(line, station, direction) for line, station, direction, _ in timetables.keys})
+
+
+def export_hour(out_dir: str, variant: str, day_type: str, day: date, hour: int, n: int,
+                selection: list[tuple[str, str, str]], source=None) -> list[str]:
+    """
+    day の時計の hour 時台（0～23）の60分ぶんを、selection の全駅について JSON と HTML の束にして
+    out_dir/variant/ に書き出す。app.py と同じく、その時刻の版と臨時ダイヤで計算する。
+    書き出した駅のディレクトリ名を返す。
+    """
+    source = source if source is not None else _source
+    _, exceptions = source.exceptions()
+    base = datetime(day.year, day.month, day.day, hour, tzinfo=JST)
+    per_minute = []
+    for minute in range(60):
+        now = base + timedelta(minutes=minute)
+        loaded = source.lookup(now)
+        per_minute.append(compute_boards(loaded.timetables, now, day_type, n=n, selection=selection,
+                                         exceptions=exceptions, tomorrow=loaded.tomorrow))
+
+    written = []
+    for i, (line, station, direction) in enumerate(selection):
+        boards = [minute_boards[i] for minute_boards in per_minute]
+        if not boards[0].available:
+            continue  # この day_type の時刻表が無い
+        path = board_dir(out_dir, variant, line, station, direction)
+        os.makedirs(path, exist_ok=True)
+        bundle = {
+            "station": station, "direction": direction, "day_type": day_type, "hour": hour,
+            "minutes": [[[d.time, d.dest, d.remark, d.in_min] for d in b.departures] for b in boards],
+        }
+        with open(os.path.join(path, f"{hour:02d}.json"), "w", encoding="utf-8") as f:
+            json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+        title = f"{direction}（{DAY_TYPE_LABELS[day_type]}）"
+        sections = "\n".join(
+            f'<section id="m{minute:02d}">{card_html(title, b.departures)}</section>'
+            for minute, b in enumerate(boards)
+        )
+        with open(os.path.join(path, f"{hour:02d}.html"), "w", encoding="utf-8") as f:
+            f.write(HOUR_HTML.format(title=f"{station} {direction} {hour:02d}時台", sections=sections))
+        written.append(os.path.basename(path))
+    return written
+
+
+def variant_dirs(out_dir: str) -> list[str]:
+    """out_dir にある書き出しのディレクトリ（{day_type} と {day_type}@{日付}）。"""
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted(name for name in os.listdir(out_dir)
+                  if name.partition("@")[0] in DAY_TYPES and os.path.isdir(os.path.join(out_dir, name)))
+
+
+def remove_stale(out_dir: str, written: set[tuple[str, str]], variants) -> int:
+    """
+    variants のディレクトリの下で、今回書き出していない駅のディレクトリを消す（空になれば
+    variants のディレクトリも消す）。written は書き出した (variant, 路線_駅_方面)。
+    消した駅のディレクトリの数を返す。
+    """
+    removed = 0
+    for variant in variants:
+        base = os.path.join(out_dir, variant)
+        if not os.path.isdir(base):
+            continue
+        for name in os.listdir(base):
+            if (variant, name) not in written and os.path.isdir(os.path.join(base, name)):
+                shutil.rmtree(os.path.join(base, name))
+                removed += 1
+        if not os.listdir(base):
+            os.rmdir(base)
+    return removed
+
+
+def _noon(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, 12, tzinfo=JST)
+
+
+def day_calendar(start: date, days: int) -> dict[str, str]:
+    """start から days 日分の、日付ごとに使うダイヤ（その日の昼の auto_day_type）。"""
+    calendar = {}
+    for i in range(days):
+        d = start + timedelta(days=i)
+        calendar[d.isoformat()] = auto_day_type(_noon(d))
+    return calendar
+
+
+def day_variants(calendar: dict[str, str], exceptions, timetable_dir: str = TIMETABLE_DIR) -> dict[str, tuple]:
+    """
+    calendar（日付ごとのダイヤ）の日付ごとに、書き出すディレクトリ名と、その計算に使う
+    (day_type, 日付) を返す。時計の1日が触れる前後の営業日の版と臨時ダイヤが基準のままなら
+    {day_type}（基準の日 BASE_DAY で計算）、違えば同じ組み合わせの最初の日付の {day_type}@{日付}。
+    """
+    variants, names = {}, {}
+    for iso, day_type in calendar.items():
+        d = date.fromisoformat(iso)
+        around = [d + timedelta(days=k) for k in (-1, 0, 1)]
+        key = (day_type, tuple(active_revision(x, timetable_dir) for x in around),
+               tuple(exceptions.active(x) for x in around))
+        if not any(key[1]) and not any(key[2]):
+            variants[iso] = (day_type, day_type, BASE_DAY)
+        else:
+            variants[iso] = (names.setdefault(key, f"{day_type}@{iso}"), day_type, d)
+    return variants
+
+
+def export_static(out_dir: str, n: int = 2, days: int = 366, start: date | None = None,
+                  workers: int | None = None, timetable_dir: str = TIMETABLE_DIR) -> dict:
+    """
+    timetable_dir の時刻表（改正の版と臨時ダイヤを含む）を out_dir に書き出し、index.json の内容を返す。
+    (ディレクトリ, 時) ごとにプロセスで並列に処理する。
+    """
+    source = TimetableSource(timetable_dir=timetable_dir)
+    loaded = source.lookup(_noon(BASE_DAY))
+    if loaded is None:
+        raise SystemExit(f"{timetable_dir}/ にCSVがありません")
+    _, exceptions = source.exceptions()
+    found = {day_type for *_, day_type in loaded.timetables.keys}
+    day_types = [day_type for day_type in DAY_TYPES if day_type in found]
+
+    start = start or datetime.now(JST).date()
+    calendar = day_calendar(start, days)
+    # {day_type}/ は基準の版の全ダイヤ、{day_type}@{日付}/ は暦に出てくる特別な日の分だけ
+    jobs = {day_type: (day_type, BASE_DAY, all_boards(loaded.timetables)) for day_type in day_types}
+    by_date = day_variants(calendar, exceptions, timetable_dir)
+    for name, day_type, day in by_date.values():
+        if name not in jobs:
+            around = [source.lookup(_noon(day + timedelta(days=k))).timetables for k in (-1, 0, 1)]
+            jobs[name] = (day_type, day, sorted({board for t in around for board in all_boards(t)}))
+    os.makedirs(out_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(timetable_dir,)) as pool:
+        futures = [(name, pool.submit(export_hour, out_dir, name, day_type, day, hour, n, selection))
+                   for name, (day_type, day, selection) in jobs.items() for hour in range(24)]
+        results = [(name, f.result()) for name, f in futures]
+    written = {(name, path) for name, paths in results for path in paths}
+    remove_stale(out_dir, written, variant_dirs(out_dir))
+
+    with open(os.path.join(out_dir, "calendar.json"), "w", encoding="utf-8") as f:
+        json.dump({iso: name for iso, (name, _, _) in by_date.items()}, f, ensure_ascii=False,
+                  separators=(",", ":"))
+
+    selection = sorted({board for _, _, boards in jobs.values() for board in boards})
+    index = {
+        "generated": datetime.now(JST).isoformat(timespec="seconds"),
+        "n": n,
+        "day_types": day_types,
+        "variants": {name: {"day_type": day_type, "date": day.isoformat()}
+                     for name, (day_type, day, _) in jobs.items() if name not in day_types},
+        "skipped_day_types": sorted(found - set(day_types)),
+        "boards": [
+            {"line": line, "station": station, "direction": direction,
+             "path": f"{line}_{station}_{direction}"}
+            for line, station, direction in selection
+            if any((name, f"{line}_{station}_{direction}") in written for name in jobs)
+        ],
+        "files": 2 * sum(len(paths) for _, paths in results) + 2,
+    }
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="発車案内を静的ファイルとして書き出す")
+    parser.add_argument("--dir", default=TIMETABLE_DIR, help="時刻表CSVのディレクトリ")
+    parser.add_argument("--out", default="static", help="書き出し先ディレクトリ")
+    parser.add_argument("-n", type=int, default=2, help="表示する本数")
+    parser.add_argument("--days", type=int, default=366, help="calendar.json に載せる日数（今日から）")
+    parser.add_argument("--workers", type=int, help="並列に使うプロセス数（既定は CPU 数）")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    index = export_static(args.out, n=args.n, days=args.days, workers=args.workers, timetable_dir=args.dir)
+    print(f"wrote {index['files']} files for {len(index['boards'])} boards to {args.out}/ "
+          f"in {time.perf_counter() - t0:.1f}s")
+    if index["skipped_day_types"]:
+        print(f"skipped unknown day types: {', '.join(index['skipped_day_types'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import pandas as pd
-from datetime import datetime, timedelta
 import os
 
+from timetable_core.service_time import format_service_time, to_service_minutes
+
 TIMETABLE_DIR = "timetables"
 os.makedirs(TIMETABLE_DIR, exist_ok=True)
 
@@ -130,21 +131,10 @@ def generate_csv(station, data_dict, offset_minutes=0):
         for day_type, hour_map in day_map.items():
             for h, mins in hour_map.items():
                 for m in mins:
-                    # Calculate new time with offset
-                    # Using arbitrary date to handle rollover
-                    base_dt = datetime(2024, 1, 1, h, m)
-                    new_dt = base_dt + timedelta(minutes=offset_minutes)
-                    
-                    new_h = new_dt.hour
-                    new_m = new_dt.minute
-                    
-                    # Formatting time string "HH:MM". 
-                    # If it crosses midnight (e.g. 24:00, 25:00), we stick to 00:xx formats usually,
-                    # but original CSV uses "00:00" for midnight. 
-                    # app.py handles 0-4h as "next day" or "late night of curr day"?
-                    # original CSV uses "00:09".
-                    
-                    time_str = f"{new_h:02d}:{new_m:02d}"
+                    # 営業日基準の分にしてから offset を足す（0時台も 24時台として連続する）
+                    svc_min = to_service_minutes(h, m) + offset_minutes
+                    # GTFS と同じく深夜は "24:09" 形式で書き出す
+                    time_str = format_service_time(svc_min)
                     
                     dest = get_destination(direction, h, m, day_type == "weekday")
                     
@@ -158,26 +148,14 @@ def generate_csv(station, data_dict, offset_minutes=0):
                         "day_type": day_type,
                         "time": time_str,
                         "dest": dest,
-                        "remark": remark
+                        "remark": remark,
+                        "svc_min": svc_min,
                     })
     
-    # Sort by day_type, then time
-    # But time is string, so 00:00 comes before 06:00.
-    # We should sort logically. 
-    # Logic: 05:00 is start, 04:59 is end. 
-    # Helper to sort time
-    def time_sort_key(t_str):
-        hh, mm = map(int, t_str.split(":"))
-        if hh < 5:
-            hh += 24
-        return hh * 60 + mm
-
+    # Sort by day_type, then service-day time (04:00 origin, so 24:xx comes last)
     df = pd.DataFrame(rows)
-    # Sort
-    df["sort_key"] = df["time"].apply(time_sort_key)
-    # also sort day_type (weekday first)
-    df = df.sort_values(["direction", "day_type", "sort_key"], ascending=[True, True, True])
-    df = df.drop(columns=["sort_key"])
+    df = df.sort_values(["direction", "day_type", "svc_min"], ascending=[True, True, True])
+    df = df.drop(columns=["svc_min"])
     
     # Write to files
     # One file per station/direction as per existing pattern
@@ -0,0 +1,208 @@
+"""
+app.py の同時セッション負荷試験
+
+Streamlit のヘッドレス試験機構（AppTest）で N 個のセッションを作り、
+それぞれを AUTO_REFRESH_SEC 間隔（セッションごとに位相をずらす）で再実行する。
+Streamlit のスクリプト実行は GIL を共有するので、1つのサーバープロセスは
+ほぼ1コア分の処理しかできない。ここでも再実行は1本ずつ実行し、
+「予定時刻にサーバーが空いていなければ待つ」という待ち行列として遅れを数える。
+前の再実行が終わる前に次の再実行の予定時刻が来たら「重なり」とする。
+
+    python loadtest.py --sessions 1,2,4,8,16
+    python loadtest.py --sessions 4,16,64 --stations 200     # 合成した駅数で
+    python loadtest.py --sessions 8 --realtime --duration 60  # 実時間で待つ
+
+既定では待ち時間を実際には眠らず仮想時間で進めるので、数分分の負荷が数秒で終わる。
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# 以前の app.py の固定の再実行間隔。今の app.py は表示が変わるときだけ再実行するので、
+# これより少ない（replay.py で回数を比べられる）。
+# timetable_core.loader は import したときに TIMETABLE_DIR を読むので、--stations の
+# 環境変数を設定する前に読み込まないよう、ここでは refresh だけを import する
+from timetable_core.refresh import AUTO_REFRESH_SEC
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+# 合成の元にする実データ（カレントディレクトリによらず app.py の隣）
+SOURCE_DIR = os.path.join(os.path.dirname(APP_PATH), "timetables")
+
+
+def current_rss_bytes() -> int:
+    """現在の常駐メモリ。/proc が無い環境ではピーク値で代用する。"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def make_synthetic_timetables(n_stations: int, source_dir: str = SOURCE_DIR) -> str:
+    """
+    実データの麻生方面のCSVを駅名だけ変えて複製し、n_stations 駅分の時刻表を作る。
+    作ったディレクトリのパスを返す（呼び出し側で削除する）。
+    """
+    sources = sorted(glob.glob(os.path.join(source_dir, "*_麻生方面.csv")))
+    if not sources:
+        raise SystemExit(f"{source_dir}/ に麻生方面のCSVがありません")
+    out_dir = tempfile.mkdtemp(prefix="loadtest_timetables_")
+    for i in range(n_stations):
+        src = sources[i % len(sources)]
+        line, station, _ = os.path.basename(src).split("_", 2)
+        name = f"合成{i:04d}"
+        with open(src, encoding="utf-8-sig") as f:
+            text = f.read().replace(f",{station},", f",{name},")
+        with open(os.path.join(out_dir, f"{line}_{name}_麻生方面.csv"), "w", encoding="utf-8") as f:
+            f.write(text)
+    return out_dir
+
+
+def make_schedule(sessions: int, interval: float, duration: float) -> list[tuple[float, int]]:
+    """
+    各セッションの再実行の予定 (試験開始からの秒, セッション番号) を時刻順に返す。
+    セッション i は i * interval / sessions 秒ずらした位相から interval ごと（最低1回）。
+    """
+    return sorted(
+        (i * interval / sessions + k * interval, i)
+        for i in range(sessions)
+        for k in range(max(1, int(duration // interval)))
+    )
+
+
+def run_level(sessions: int, interval: float, duration: float, realtime: bool, timeout: float) -> dict:
+    """
+    sessions 個のセッションを duration 秒分（仮想時間または実時間）再実行して統計を返す。
+    """
+    from streamlit.testing.v1 import AppTest
+
+    apps = [AppTest.from_file(APP_PATH, default_timeout=timeout) for _ in range(sessions)]
+    schedule = make_schedule(sessions, interval, duration)
+
+    latencies, waits, cpu_times = [], [], []
+    overlaps = errors = 0
+    busy_until = 0.0  # サーバーが次に空く時刻（試験開始からの秒）
+    session_end = [0.0] * sessions
+    rss_start = current_rss_bytes()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    for scheduled, i in schedule:
+        if realtime:
+            delay = scheduled - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+        start = max(scheduled, busy_until)
+        if session_end[i] > scheduled:
+            overlaps += 1
+
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        at = apps[i].run()
+        latency = time.perf_counter() - t0
+        cpu_times.append(time.process_time() - cpu0)
+        if at.exception:
+            errors += 1
+
+        if realtime:
+            start = max(start, t0 - wall_start)
+        busy_until = start + latency
+        session_end[i] = busy_until
+        latencies.append(latency)
+        waits.append(start - scheduled)
+
+    cpu_total = time.process_time() - cpu_start
+    rss_end = current_rss_bytes()
+    mean_latency = statistics.fmean(latencies) if latencies else 0.0
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "errors": errors,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": max(latencies, default=0.0) * 1000,
+        },
+        "wait_ms": {
+            "p50": percentile(waits, 50) * 1000,
+            "max": max(waits, default=0.0) * 1000,
+        },
+        "overlaps": overlaps,
+        "cpu_sec_total": cpu_total,
+        "cpu_ms_per_rerun": statistics.fmean(cpu_times) * 1000 if cpu_times else 0.0,
+        # 1秒あたりに必要なCPU時間。1 を超えると1コアでは再実行が追いつかない
+        "utilization": sessions * mean_latency / interval,
+        "rss_start_mb": rss_start / 2**20,
+        "rss_growth_mb": (rss_end - rss_start) / 2**20,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app.py の同時セッション負荷試験")
+    parser.add_argument("--sessions", default="1,2,4,8,16", help="同時セッション数（カンマ区切りで段階的に増やす）")
+    parser.add_argument("--interval", type=float, default=AUTO_REFRESH_SEC, help="再実行の間隔（秒）")
+    parser.add_argument("--duration", type=float, default=120, help="各段階の試験時間（秒）")
+    parser.add_argument("--stations", type=int, help="合成した駅数で試す（省略時は timetables/ の実データ）")
+    parser.add_argument("--realtime", action="store_true", help="予定時刻まで実際に待つ")
+    parser.add_argument("--timeout", type=float, default=60, help="1回の再実行のタイムアウト（秒）")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    synthetic_dir = None
+    if args.stations:
+        # app.py の時刻表の場所は timetable_core.loader を import したときの TIMETABLE_DIR で決まる
+        if "timetable_core.loader" in sys.modules:
+            raise SystemExit("timetable_core.loader が読み込み済みなので --stations の時刻表を使えません")
+        synthetic_dir = make_synthetic_timetables(args.stations)
+        os.environ["TIMETABLE_DIR"] = synthetic_dir
+    # app.py は相対パスで timetables/ を読むので、app.py の場所で実行する
+    os.chdir(os.path.dirname(APP_PATH))
+
+    results = []
+    try:
+        for n in [int(x) for x in args.sessions.split(",")]:
+            results.append(run_level(n, args.interval, args.duration, args.realtime, args.timeout))
+            if not args.json:
+                r = results[-1]
+                lat = r["latency_ms"]
+                print(
+                    f"sessions={r['sessions']:>4} reruns={r['reruns']:>5} "
+                    f"p50={lat['p50']:7.1f}ms p90={lat['p90']:7.1f}ms p99={lat['p99']:7.1f}ms "
+                    f"max_wait={r['wait_ms']['max']:7.1f}ms overlaps={r['overlaps']:>4} "
+                    f"cpu/rerun={r['cpu_ms_per_rerun']:6.1f}ms util={r['utilization']:5.2f} "
+                    f"rss+={r['rss_growth_mb']:6.1f}MB errors={r['errors']}",
+                    flush=True,
+                )
+    finally:
+        if synthetic_dir:
+            shutil.rmtree(synthetic_dir, ignore_errors=True)
+
+    saturated = next((r["sessions"] for r in results if r["overlaps"] or r["utilization"] >= 1), None)
+    if args.json:
+        print(json.dumps({"interval": args.interval, "stations": args.stations, "levels": results,
+                          "overlap_at_sessions": saturated}, ensure_ascii=False, indent=2))
+    elif saturated is None:
+        print("no overlap at the tested session counts")
+    else:
+        print(f"reruns start to overlap at {saturated} sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import streamlit as st
+
+from analytics import compare_day_types, compute_metrics, format_span
+from timetable_core.loader import TIMETABLE_DIR, list_csv_files
+
+st.set_page_config(page_title="運行間隔", layout="wide")
+st.title("運行間隔・運行頻度")
+
+files = list_csv_files(TIMETABLE_DIR)
+if not files:
+    st.warning(f"`{TIMETABLE_DIR}/` にCSVがありません。")
+    st.stop()
+
+# ファイルハッシュごとにキャッシュされるので、変わったCSVだけが再集計される
+hourly, span = compute_metrics(files)
+if span.empty:
+    st.info("集計できる列車がありません")
+    st.stop()
+
+st.subheader("始発・終電")
+st.dataframe(format_span(span), hide_index=True)
+
+st.sidebar.title("絞り込み")
+station = st.sidebar.selectbox("駅", sorted(span["station"].unique()))
+directions = sorted(span.loc[span["station"] == station, "direction"].unique())
+direction = st.sidebar.selectbox("方面", directions)
+
+target = hourly[(hourly["station"] == station) & (hourly["direction"] == direction)]
+
+st.subheader(f"{station} {direction} 時間帯別")
+for day_type, label in [("weekday", "平日"), ("weekend_holiday", "土日祝")]:
+    rows = target[target["day_type"] == day_type]
+    if rows.empty:
+        continue
+    st.markdown(f"**{label}**")
+    st.dataframe(
+        rows[["hour", "trains", "min_headway", "max_headway", "avg_headway"]].round(1),
+        hide_index=True,
+    )
+
+st.subheader("平日と土日祝の比較（本数）")
+compare = compare_day_types(target)
+trains_cols = [c for c in ["weekday_trains", "weekend_holiday_trains"] if c in compare.columns]
+st.bar_chart(compare.set_index("hour")[trains_cols])
@@ -0,0 +1,107 @@
+from html import escape
+
+import streamlit as st
+
+from app_state import timetable_source
+from timetable_core import (
+    DAY_TYPE_LABELS,
+    STATION_ORDER,
+    BoundedCache,
+    auto_day_type,
+    build_segment_index,
+    service_date,
+)
+from timetable_core.loader import TIMETABLE_DIR
+
+st.set_page_config(page_title="路線図", layout="wide")
+st.title("走行中の列車")
+
+REFRESH_SEC = 10
+try:
+    from streamlit_autorefresh import st_autorefresh
+    st_autorefresh(interval=REFRESH_SEC * 1000, key="map_refresh")
+except Exception:
+    pass
+
+# 駅の間隔（px）と、上下の線の位置
+STEP_X = 70
+MARGIN_X = 40
+TRACK_Y = {"真駒内方面": 60, "麻生方面": 130}
+
+
+@st.cache_resource
+def segment_indexes() -> BoundedCache:
+    """
+    時刻表の出どころ（LoadedTimetables.source）→ 区間の索引。再実行のたびに作り直さない。
+    臨時ダイヤの期間中は (出どころ, 例外の fingerprint, 営業日, ダイヤ) → その日の区間の索引。
+    """
+    return BoundedCache("segments", max_entries=2)
+
+
+def station_x(station: str) -> float:
+    return MARGIN_X + STATION_ORDER.index(station) * STEP_X
+
+
+def line_map_svg(positions) -> str:
+    width = MARGIN_X * 2 + (len(STATION_ORDER) - 1) * STEP_X
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="200" '
+             f'style="font-family:sans-serif; background:#fff;">']
+    for direction, y in TRACK_Y.items():
+        parts.append(f'<line x1="{MARGIN_X}" y1="{y}" x2="{width - MARGIN_X}" y2="{y}" '
+                     f'stroke="#2a8a3a" stroke-width="6"/>')
+        parts.append(f'<text x="4" y="{y - 10}" font-size="11" fill="#444">{escape(direction)}</text>')
+    for station in STATION_ORDER:
+        x = station_x(station)
+        parts.append(f'<line x1="{x}" y1="{TRACK_Y["真駒内方面"] - 8}" x2="{x}" y2="{TRACK_Y["麻生方面"] + 8}" '
+                     f'stroke="#bbb" stroke-width="1"/>')
+        parts.append(f'<text x="{x}" y="185" font-size="12" text-anchor="middle">{escape(station)}</text>')
+    for p in positions:
+        if p.from_station not in STATION_ORDER or p.to_station not in STATION_ORDER:
+            continue
+        x0, x1 = station_x(p.from_station), station_x(p.to_station)
+        x = x0 + (x1 - x0) * p.progress
+        y = TRACK_Y.get(p.direction, 95)
+        parts.append(f'<circle cx="{x:.1f}" cy="{y}" r="9" fill="#d22" stroke="#fff" stroke-width="2">'
+                     f'<title>{escape(p.dest)} {escape(p.from_station)}→{escape(p.to_station)}</title></circle>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+now = timetable_source().now()
+day_type = st.sidebar.radio(
+    "使用するダイヤ",
+    options=["auto", "weekday", "weekend_holiday"],
+    index=0,
+)
+if day_type == "auto":
+    day_type = auto_day_type(now)
+
+# 時刻表は app.py と同じもの（プロセスに1つ）を使う
+loaded = timetable_source().lookup(now)
+if loaded is None:
+    st.warning(f"`{TIMETABLE_DIR}/` にCSVがありません。")
+    st.stop()
+# 臨時ダイヤの期間中は、その営業日の例外を当てた時刻表から区間を作る
+exceptions_fp, exceptions = timetable_source().exceptions()
+day = service_date(now)
+if exceptions.on(day, day_type):
+    index = segment_indexes().get_or_create(
+        (loaded.source, exceptions_fp, day, day_type),
+        lambda: build_segment_index(exceptions.apply(loaded.timetables, day, day_type)),
+    )
+else:
+    index = segment_indexes().get_or_create(loaded.source, lambda: build_segment_index(loaded.timetables))
+
+positions = index.positions(now, day_type)
+st.caption(f"{now.strftime('%Y-%m-%d %H:%M:%S')}  {DAY_TYPE_LABELS[day_type]}ダイヤ  走行中 {len(positions)} 本")
+st.markdown(line_map_svg(positions), unsafe_allow_html=True)
+
+if positions:
+    st.dataframe(
+        [{"方面": p.direction, "区間": f"{p.from_station}→{p.to_station}", "行先": p.dest,
+          "進み具合": f"{p.progress:.0%}"} for p in positions],
+        hide_index=True,
+    )
+else:
+    st.info("走行中の列車はありません")
+st.caption("時刻表のある駅どうしの発車時刻から推定した位置です。時刻表の無い駅の間は通過扱いになります。")
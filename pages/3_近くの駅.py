@@ -0,0 +1,59 @@
+import streamlit as st
+
+from app_state import timetable_source
+from timetable_core import (
+    DAY_TYPE_LABELS,
+    StationGrid,
+    auto_day_type,
+    card_html,
+    load_station_catalog,
+    nearest_departures,
+)
+from timetable_core.loader import TIMETABLE_DIR
+
+st.set_page_config(page_title="近くの駅", layout="centered")
+st.title("近くの駅の発車案内")
+
+# 位置はクエリで渡す（例: ?lat=43.0605&lon=141.3545）。無ければ大通
+DEFAULT_LAT, DEFAULT_LON = 43.0605, 141.3545
+
+
+@st.cache_resource
+def station_grid() -> StationGrid:
+    return StationGrid(load_station_catalog())
+
+
+def query_float(name: str, default: float) -> float:
+    try:
+        return float(st.query_params.get(name, default))
+    except ValueError:
+        return default
+
+
+lat = st.sidebar.number_input("緯度", value=query_float("lat", DEFAULT_LAT), format="%.5f")
+lon = st.sidebar.number_input("経度", value=query_float("lon", DEFAULT_LON), format="%.5f")
+k = st.sidebar.slider("駅の数", 1, 5, 3)
+n_trains = st.sidebar.slider("表示する本数", 1, 5, 2)
+
+now = timetable_source().now()
+day_type = auto_day_type(now)
+
+# 時刻表は app.py と同じもの（プロセスに1つ）を使う
+loaded = timetable_source().lookup(now)
+if loaded is None:
+    st.warning(f"`{TIMETABLE_DIR}/` にCSVがありません。")
+    st.stop()
+timetables = loaded.timetables
+_, exceptions = timetable_source().exceptions()
+
+st.caption(f"{now.strftime('%Y-%m-%d %H:%M')}  {DAY_TYPE_LABELS[day_type]}ダイヤ")
+for distance, station, boards in nearest_departures(timetables, station_grid(), lat, lon, now, day_type,
+                                                    k=k, n=n_trains, exceptions=exceptions,
+                                                    tomorrow=loaded.tomorrow):
+    st.markdown(f"## {station.name}（{distance:,.0f} m）")
+    if not boards:
+        st.info("時刻表がありません")
+    for board in boards:
+        if board.available:
+            st.markdown(card_html(f"{board.direction}（{DAY_TYPE_LABELS[day_type]}）", board.departures),
+                        unsafe_allow_html=True)
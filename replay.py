@@ -0,0 +1,204 @@
+"""
+発車案内の早送り再生（リプレイ）
+
+営業日の 04:00 から時計を step 秒ずつ進め、各時点で app.py と同じ手順
+（TimetableSource から改正の版と臨時ダイヤを引き、auto_day_type でダイヤを決め、
+compute_boards で全駅を計算）で発車案内を求める。
+1回ごとの計算時間と、表示の不連続を報告する。
+あわせて、app.py の再実行の予定（next_refresh_delay）どおりに進めた場合の再実行回数を
+固定間隔（15秒）の場合と比べる。
+
+  day_type_change     営業日の途中でダイヤが切り替わった（例: 04:59→05:00）
+  early_disappearance 発車時刻前の列車が一覧から消えた
+  in_min_increase     同じ列車の「あと N 分」が増えた
+  inserted_ahead      表示中の列車より前に別の列車が割り込んだ
+
+    python replay.py --date 2026-01-16            # 1営業日を最速で
+    python replay.py --date 2026-01-16 --days 3 --step 60
+    python replay.py --speed 600                  # 600倍速（実時間で待つ）
+    python replay.py --day-type weekday --json
+
+不連続があれば終了コード 1。
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from timetable_core import (
+    AUTO_REFRESH_SEC,
+    JST,
+    TIMETABLE_DIR,
+    FixedClock,
+    auto_day_type,
+    TimetableSource,
+    board_selection,
+    compute_boards,
+    format_clock_time,
+    next_refresh_delay,
+    service_date,
+    service_seconds,
+)
+from timetable_core.service_time import SERVICE_DAY_START_HOUR
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))] if ordered else 0.0
+
+
+def app_boards(source: TimetableSource, now: datetime, day_type: str, n: int, selection=None):
+    """app.py と同じく、now の版と臨時ダイヤで全駅（selection）の発車案内を求める。"""
+    loaded = source.lookup(now)
+    _, exceptions = source.exceptions()
+    return compute_boards(loaded.timetables, now, day_type, n=n,
+                          selection=selection or board_selection(loaded.timetables),
+                          exceptions=exceptions, tomorrow=loaded.tomorrow)
+
+
+def count_refreshes(source: TimetableSource, start: datetime, end: datetime, day_type: str = "auto", n: int = 2,
+                    selection=None) -> int:
+    """app.py と同じく、表示が次に変わる時刻ごとに再実行した場合の回数。"""
+    now, count = start, 0
+    while now < end:
+        current_day_type = auto_day_type(now) if day_type == "auto" else day_type
+        boards = app_boards(source, now, current_day_type, n, selection)
+        now += timedelta(seconds=next_refresh_delay(boards, now, clock_minutes=True))
+        count += 1
+    return count
+
+
+def replay(source: TimetableSource, start: datetime, end: datetime, step: float = AUTO_REFRESH_SEC,
+           day_type: str = "auto", n: int = 2, selection=None, speed: float = 0) -> dict:
+    """
+    start から end まで step 秒ごとに発車案内を計算し、計算時間と不連続をまとめて返す。
+    時刻表は source（TimetableSource）から時点ごとに引く。selection を省略すると全駅。
+    speed が 0 なら待たずに進め、正なら実時間の speed 倍の速さで進める。
+    """
+    clock = FixedClock(start)
+    wall_start = time.perf_counter()
+    eval_times = []
+    discontinuities = []
+    day_type_spans = []
+    # 駅ごとの前回の表示 {発車（絶対分）: あと何分}
+    previous: dict[tuple[str, str, str], dict[int, int]] = {}
+    prev_day_type = None
+    tick = 0
+
+    while clock.now() < end:
+        now = clock.now()
+        if speed > 0:
+            delay = tick * step / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                time.sleep(delay)
+
+        t0 = time.perf_counter()
+        current_day_type = auto_day_type(now) if day_type == "auto" else day_type
+        boards = app_boards(source, now, current_day_type, n, selection)
+        eval_times.append(time.perf_counter() - t0)
+
+        at = now.isoformat(timespec="seconds")
+        if current_day_type != prev_day_type:
+            day_type_spans.append({"from": at, "day_type": current_day_type})
+            at_service_start = service_seconds(now) < step
+            if prev_day_type is not None and not at_service_start:
+                discontinuities.append({
+                    "time": at, "kind": "day_type_change", "station": None, "direction": None,
+                    "detail": f"{prev_day_type} -> {current_day_type}",
+                })
+        prev_day_type = current_day_type
+
+        # 絶対分 = 営業日の通し番号 * 1440 + 営業日基準の分（翌営業日分も同じ軸に乗る）
+        day_base = service_date(now).toordinal() * 1440
+        now_sec = day_base * 60 + service_seconds(now)
+        for board in boards:
+            key = (board.line, board.station, board.direction)
+            shown = {day_base + d.svc_min: d.in_min for d in board.departures}
+            before = previous.get(key)
+            if before is not None:
+                def report(kind, detail):
+                    discontinuities.append({"time": at, "kind": kind, "station": board.station,
+                                            "direction": board.direction, "detail": detail})
+
+                for dep, in_min in before.items():
+                    if dep not in shown and dep * 60 > now_sec:
+                        report("early_disappearance",
+                               f"{format_clock_time(dep % 1440)} が発車 {dep * 60 - now_sec:.0f} 秒前に消えた")
+                    elif dep in shown and shown[dep] > in_min:
+                        report("in_min_increase", f"{format_clock_time(dep % 1440)} あと {in_min} -> {shown[dep]} 分")
+                kept = [dep for dep in before if dep in shown]
+                for dep in shown:
+                    if dep not in before and kept and dep < max(kept):
+                        report("inserted_ahead", f"{format_clock_time(dep % 1440)} が表示中の列車より前に出た")
+            previous[key] = shown
+
+        clock.advance(step)
+        tick += 1
+
+    return {
+        "start": start.isoformat(timespec="seconds"),
+        "end": end.isoformat(timespec="seconds"),
+        "step_sec": step,
+        "ticks": len(eval_times),
+        "boards": len(boards) if eval_times else 0,
+        "eval_ms": {
+            "p50": _percentile(eval_times, 50) * 1000,
+            "p90": _percentile(eval_times, 90) * 1000,
+            "p99": _percentile(eval_times, 99) * 1000,
+            "max": max(eval_times, default=0.0) * 1000,
+            "mean": statistics.fmean(eval_times) * 1000 if eval_times else 0.0,
+        },
+        "wall_sec": time.perf_counter() - wall_start,
+        "refreshes": {
+            "fixed": int((end - start).total_seconds() // AUTO_REFRESH_SEC),
+            "adaptive": count_refreshes(source, start, end, day_type, n, selection),
+        },
+        "day_types": day_type_spans,
+        "discontinuities": discontinuities,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="発車案内を早送りで再生して不連続を探す")
+    parser.add_argument("--dir", default=TIMETABLE_DIR, help="時刻表CSVのディレクトリ")
+    parser.add_argument("--date", type=date.fromisoformat, help="再生する営業日（既定は今日の営業日）")
+    parser.add_argument("--days", type=int, default=1, help="再生する営業日数")
+    parser.add_argument("--step", type=float, default=AUTO_REFRESH_SEC, help="時計を進める秒数")
+    parser.add_argument("--speed", type=float, default=0, help="実時間の何倍で進めるか（0 は待たずに最速）")
+    parser.add_argument("--day-type", choices=["auto", "weekday", "weekend_holiday"], default="auto")
+    parser.add_argument("-n", type=int, default=2, help="表示する本数")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力する")
+    args = parser.parse_args(argv)
+
+    day = args.date or service_date(datetime.now(JST))
+    start = datetime(day.year, day.month, day.day, SERVICE_DAY_START_HOUR, tzinfo=JST)
+    end = start + timedelta(days=args.days)
+    source = TimetableSource(timetable_dir=args.dir)
+    if source.lookup(start) is None:
+        raise SystemExit(f"{args.dir}/ にCSVがありません")
+    result = replay(source, start, end, step=args.step, day_type=args.day_type, n=args.n, speed=args.speed)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        ev = result["eval_ms"]
+        print(f"{result['start']} - {result['end']}  ticks={result['ticks']} boards={result['boards']} "
+              f"eval p50={ev['p50']:.3f}ms p99={ev['p99']:.3f}ms max={ev['max']:.3f}ms "
+              f"wall={result['wall_sec']:.2f}s")
+        refreshes = result["refreshes"]
+        print(f"  reruns per session: fixed {AUTO_REFRESH_SEC}s={refreshes['fixed']} "
+              f"adaptive={refreshes['adaptive']}")
+        for span in result["day_types"]:
+            print(f"  {span['from']}  {span['day_type']}")
+        for d in result["discontinuities"]:
+            where = f"{d['station']} {d['direction']}" if d["station"] else "全駅"
+            print(f"  ! {d['time']}  {d['kind']:<20} {where}  {d['detail']}")
+        if not result["discontinuities"]:
+            print("no discontinuities")
+    sys.exit(1 if result["discontinuities"] else 0)
+
+
+if __name__ == "__main__":
+    main()
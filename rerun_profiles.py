@@ -0,0 +1,37 @@
+"""
+保存した遅い再実行のプロファイルを見る
+
+app.py を TIMETABLE_PROFILE_MS=500 で起動すると、500ms 以上かかった再実行のプロファイルが profiles/（TIMETABLE_PROFILE_DIR）に残る。
+TIMETABLE_PROFILE_QUERY=1 でも起動しておくと、?profile=500 を付けて開いたセッションも測る。
+
+    python rerun_profiles.py                 # 一覧と、各回の累積時間の上位関数
+    python rerun_profiles.py -n 30 --last 1  # 最新の1回だけ、上位30関数
+    python rerun_profiles.py --sort tottime  # 関数自身の時間の順
+"""
+import argparse
+
+from timetable_core.profiling import PROFILE_DIR, list_profiles, top_functions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="遅い再実行のプロファイルを一覧する")
+    parser.add_argument("--dir", default=PROFILE_DIR, help="プロファイルの保存先")
+    parser.add_argument("-n", type=int, default=10, help="1回あたりに表示する関数の数")
+    parser.add_argument("--last", type=int, default=0, help="新しい方からこの回数だけ表示する（0 は全部）")
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    args = parser.parse_args(argv)
+
+    profiles = list_profiles(args.dir)
+    if not profiles:
+        print(f"{args.dir}/ に保存されたプロファイルはありません")
+        return
+    for captured in profiles[-args.last:] if args.last > 0 else profiles:
+        print(f"{captured.captured_at:%Y-%m-%d %H:%M:%S}  {captured.elapsed_ms} ms  {captured.path}")
+        print(f"  {'cumtime':>10} {'tottime':>10} {'ncalls':>8}  function")
+        for row in top_functions(captured.path, args.n, args.sort):
+            print(f"  {row['cumtime_ms']:>8.1f}ms {row['tottime_ms']:>8.1f}ms {row['ncalls']:>8}  {row['function']}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
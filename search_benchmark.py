@@ -0,0 +1,56 @@
+"""
+駅名検索の速さを測る
+
+かな・ローマ字の読みを乱数で作った駅を数千件並べ、StationSearchIndex の1回の検索に
+かかる時間を検索語ごとに表示する。1回 1ms を超える検索語があれば終了コード 1。
+
+    python search_benchmark.py
+    python search_benchmark.py --stations 20000 --repeat 100
+"""
+import argparse
+import random
+import sys
+import time
+
+from timetable_core import Station, StationSearchIndex
+
+SYLLABLES = [("か", "ka"), ("き", "ki"), ("さ", "sa"), ("し", "shi"), ("た", "ta"), ("な", "na"),
+             ("ま", "ma"), ("や", "ya"), ("ら", "ra"), ("お", "o"), ("い", "i"), ("う", "u")]
+QUERIES = ["k", "か", "kasa", "駅", "駅12", "shi", "ahi", "a"]
+BUDGET_SEC = 1e-3
+
+
+def synthetic_stations(n: int, seed: int = 0) -> list[Station]:
+    """「駅{i}」という名前と、2〜5音の乱数の読みを持つ n 駅。"""
+    rng = random.Random(seed)
+    stations = []
+    for i in range(n):
+        reading = [rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))]
+        stations.append(Station("test", f"駅{i}", 0.0, 0.0,
+                                "".join(k for k, _ in reading), "".join(r for _, r in reading)))
+    return stations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="駅名検索の速さを測る")
+    parser.add_argument("--stations", type=int, default=5000, help="合成する駅の数")
+    parser.add_argument("--repeat", type=int, default=20, help="検索語ごとの繰り返し回数")
+    args = parser.parse_args(argv)
+
+    index = StationSearchIndex(synthetic_stations(args.stations))
+    slow = []
+    for query in QUERIES:
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            result = index.search(query)
+        per_query = (time.perf_counter() - t0) / args.repeat
+        print(f"{query:>6}  {per_query * 1e6:8.1f} µs  {len(result)} hits")
+        if per_query >= BUDGET_SEC:
+            slow.append(query)
+    if slow:
+        print(f"slower than {BUDGET_SEC * 1e3:.0f} ms: {', '.join(slow)}")
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+共有メモリ上の時刻表ストア
+
+ローダープロセスが全時刻表をコンパイルして共有メモリに載せ、
+同じホストで動く複数の `streamlit run app.py` はそれを読み取り専用で参照する。
+時刻表のメモリはホストあたり1回分で済む。
+
+共有メモリは2種類:
+  {name}        制御ブロック（magic と現在の版番号だけ）
+  {name}_{版}   コンパイル済み時刻表（版ごとに新しく作り、書き込み後は変更しない）
+新しい版は「データを書き切ってから制御ブロックの版番号を書き換える」ので、
+読み手は常に書き終わった版だけを見る。古い版は1つ前まで残してから削除する。
+版番号を読んでから開くまでの間に版が消えた読み手は、版番号を読み直して開き直す。
+
+    python shm_store.py publish --watch 30   # ローダー（変更を30秒ごとに確認）
+    TIMETABLE_SHM=sapporo_timetables streamlit run app.py
+"""
+import argparse
+import struct
+import sys
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+
+from timetable_core.compiled import CompiledTimetables
+from timetable_core.loader import TIMETABLE_DIR, files_fingerprint, list_csv_files
+from timetable_core.revisions import active_revision, compile_revision, revision_files
+from timetable_core.service_time import JST
+
+DEFAULT_NAME = "sapporo_timetables"
+CONTROL_MAGIC = b"SUGCTL\x00\x01"
+CONTROL = struct.Struct("<8sQ")
+# 読み手が版番号の読み直しを試みる回数
+READ_RETRIES = 5
+
+
+def _open(name: str, create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    共有メモリを作成・接続する。resource_tracker には任せず、削除は明示的に行う
+    （Python 3.12 以前は接続しただけでも登録され、プロセス終了時に削除されてしまう）。
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _unlink(name: str):
+    try:
+        shm = _open(name)
+    except FileNotFoundError:
+        return
+    if sys.version_info < (3, 13):
+        # unlink() は登録解除もするので、いったん登録し直してから消す
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.close()
+    shm.unlink()
+
+
+def _segment_name(name: str, version: int) -> str:
+    return f"{name}_{version}"
+
+
+def read_version(control: shared_memory.SharedMemory) -> int:
+    magic, version = CONTROL.unpack_from(control.buf, 0)
+    if magic != CONTROL_MAGIC:
+        raise ValueError(f"{control.name} は時刻表の制御ブロックではありません")
+    return version
+
+
+class Publisher:
+    """コンパイル済み時刻表を新しい版として共有メモリに公開する（ローダー側）。"""
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        self.name = name
+        try:
+            self.control = _open(name)
+            self.version = read_version(self.control)
+        except FileNotFoundError:
+            self.control = _open(name, create=True, size=CONTROL.size)
+            self.version = 0
+            CONTROL.pack_into(self.control.buf, 0, CONTROL_MAGIC, self.version)
+        self.segment: shared_memory.SharedMemory | None = None
+
+    def publish(self, timetables: CompiledTimetables) -> int:
+        version = self.version + 1
+        timetables.version = version
+        data = timetables.to_bytes()
+        # 前に落ちたローダーが残した同じ版の共有メモリがあれば作り直す
+        _unlink(_segment_name(self.name, version))
+        segment = _open(_segment_name(self.name, version), create=True, size=len(data))
+        segment.buf[:len(data)] = data
+        # データを書き終えてから版番号を切り替える
+        CONTROL.pack_into(self.control.buf, 0, CONTROL_MAGIC, version)
+        self.version = version
+        if self.segment is not None:
+            self.segment.close()
+        self.segment = segment
+        # 切り替え直後の読み手のために1つ前の版までは残し、それより古い版を消す
+        _unlink(_segment_name(self.name, version - 2))
+        return version
+
+    def close(self, unlink: bool = True):
+        if self.segment is not None:
+            self.segment.close()
+        self.control.close()
+        if unlink:
+            for v in (self.version - 1, self.version):
+                _unlink(_segment_name(self.name, v))
+            _unlink(self.name)
+
+
+class SharedTimetableReader:
+    """
+    共有メモリの時刻表を読み取り専用で参照する（各ワーカー側）。
+    get() のたびに版番号だけを確認し、新しい版が出ていればそちらに付け替える。
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME):
+        self.name = name
+        self.control = None
+        self.timetables: CompiledTimetables | None = None
+
+    def get(self) -> CompiledTimetables:
+        if self.control is None:
+            self.control = _open(self.name)
+        for _ in range(READ_RETRIES):
+            version = read_version(self.control)
+            if self.timetables is not None and self.timetables.version == version:
+                return self.timetables
+            try:
+                segment = _open(_segment_name(self.name, version))
+            except FileNotFoundError:
+                # 版番号を読んだ後に、さらに新しい版が2つ公開されて消された
+                continue
+            timetables = CompiledTimetables.from_buffer(segment.buf)
+            # 配列が共有メモリを参照している間はマッピングを閉じられないので、
+            # 古い版は時刻表オブジェクトごと参照が無くなったときに解放する
+            timetables.segment = segment
+            self.timetables = timetables
+            return timetables
+        raise FileNotFoundError(f"{self.name} の版 {version} の共有メモリがありません")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="時刻表を共有メモリに公開する")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="時刻表をコンパイルして公開する")
+    pub.add_argument("--name", default=DEFAULT_NAME)
+    pub.add_argument("--dir", default=TIMETABLE_DIR)
+    pub.add_argument("--watch", type=float, default=0, help="この秒数ごとにCSVの変更と改正の施行を確認して再公開する")
+    show = sub.add_parser("show", help="公開中の版を表示する")
+    show.add_argument("--name", default=DEFAULT_NAME)
+    rm = sub.add_parser("unlink", help="公開した共有メモリを削除する")
+    rm.add_argument("--name", default=DEFAULT_NAME)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        timetables = SharedTimetableReader(args.name).get()
+        print(f"version={timetables.version} timetables={len(timetables.keys)} "
+              f"trains={len(timetables.minutes)} bytes={timetables.nbytes}")
+        return
+
+    if args.command == "unlink":
+        Publisher(args.name).close(unlink=True)
+        return
+
+    publisher = Publisher(args.name)
+    fingerprint = None
+    try:
+        while True:
+            # ダイヤ改正の施行日（営業日の 04:00）を過ぎたら新しい版を公開し直す
+            revision = active_revision(datetime.now(JST), args.dir)
+            paths = list_csv_files(args.dir) + revision_files(revision, args.dir)
+            current = (revision, files_fingerprint(paths))
+            if current != fingerprint:
+                version = publisher.publish(compile_revision(revision, args.dir))
+                fingerprint = current
+                print(f"published version {version} (revision {revision or 'base'}, {len(paths)} files)", flush=True)
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+    # 監視を止めたら片付ける。1回だけの公開では共有メモリを残す（削除は unlink で）
+    publisher.close(unlink=bool(args.watch))
+
+
+if __name__ == "__main__":
+    main()
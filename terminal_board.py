@@ -0,0 +1,110 @@
+"""
+端末（curses）用の発車案内
+
+ブラウザと Streamlit が重すぎる表示用の小型機向け。駅・方面・ダイヤの選び方と、
+改正の版・臨時ダイヤの当て方（TimetableSource）は app.py と同じ。
+表示が変わる瞬間（「あと N 分」が切り替わる時刻、列車が発車して消える時刻、時計の分の変わり目）
+まで入力待ちで眠り、起きたら変わった行だけを書き直すので、待機中のCPUはほぼ使わない。
+streamlit も pandas も読み込まない。
+
+    python terminal_board.py
+    python terminal_board.py --day-type weekday -n 3
+    python terminal_board.py --once      # 1回だけ標準出力に表示して終わる
+
+q で終了。
+"""
+import argparse
+import curses
+import locale
+from datetime import datetime
+
+from timetable_core import (
+    DAY_TYPE_LABELS,
+    TIMETABLE_DIR,
+    TimetableSource,
+    auto_day_type,
+    compute_boards,
+    next_change_delay,
+)
+
+
+def render(source: TimetableSource, day_type, now: datetime, n: int):
+    """表示する行のリストと、次に表示が変わるまでの秒数を返す。"""
+    rows = [f"{now.strftime('%Y-%m-%d %H:%M')}  {DAY_TYPE_LABELS[day_type]}ダイヤ", ""]
+    loaded = source.lookup(now)
+    _, exceptions = source.exceptions()
+    boards = compute_boards(loaded.timetables, now, day_type, n=n, exceptions=exceptions, tomorrow=loaded.tomorrow)
+    for board in boards:
+        rows.append(f"{board.station}  {board.direction}")
+        if not board.available:
+            rows.append("  該当するダイヤがありません")
+        elif not board.departures:
+            rows.append("  次の列車が見つかりません")
+        for d in board.departures:
+            left = f"  {d.time} ({d.dest or '—'})" + (f" [{d.remark}]" if d.remark else "")
+            rows.append(f"{left:<28}あと {d.in_min:>3} 分")
+        rows.append("")
+    dep_minutes = [d.svc_min for board in boards for d in board.departures]
+    return rows, next_change_delay(dep_minutes, now)
+
+
+def run_curses(stdscr, source: TimetableSource, day_type_option: str, n: int):
+    curses.curs_set(0)
+    stdscr.clear()
+    shown: list[str] = []
+    while True:
+        now = source.now()
+        day_type = auto_day_type(now) if day_type_option == "auto" else day_type_option
+        rows, delay = render(source, day_type, now, n)
+
+        # 変わった行だけ書き直す
+        height, width = stdscr.getmaxyx()
+        for y in range(min(max(len(rows), len(shown)), height)):
+            new = rows[y] if y < len(rows) else ""
+            if y < len(shown) and shown[y] == new:
+                continue
+            try:
+                stdscr.addstr(y, 0, new[:width - 1])
+                stdscr.clrtoeol()
+            except curses.error:
+                pass
+        stdscr.refresh()
+        shown = rows
+
+        # 次に表示が変わるまで入力待ちで眠る
+        stdscr.timeout(max(1, int(delay * 1000)))
+        key = stdscr.getch()
+        if key in (ord("q"), ord("Q")):
+            return
+        if key == curses.KEY_RESIZE:
+            stdscr.clear()
+            shown = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="端末用の地下鉄発車案内")
+    parser.add_argument("--dir", default=TIMETABLE_DIR, help="時刻表CSVのディレクトリ")
+    parser.add_argument("--day-type", choices=["auto", "weekday", "weekend_holiday"], default="auto")
+    parser.add_argument("-n", type=int, default=2, help="表示する本数")
+    parser.add_argument("--once", action="store_true", help="1回だけ標準出力に表示する")
+    args = parser.parse_args(argv)
+
+    source = TimetableSource(timetable_dir=args.dir)
+    if source.lookup(source.now()) is None:
+        raise SystemExit(f"{args.dir}/ にCSVがありません")
+    if args.once:
+        now = source.now()
+        day_type = auto_day_type(now) if args.day_type == "auto" else args.day_type
+        rows, _ = render(source, day_type, now, args.n)
+        print("\n".join(rows))
+        return
+
+    locale.setlocale(locale.LC_ALL, "")
+    try:
+        curses.wrapper(run_curses, source, args.day_type, args.n)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
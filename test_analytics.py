@@ -0,0 +1,73 @@
+import pytest
+
+import analytics
+from analytics import compare_day_types, compute_metrics, format_span
+
+CSV = """line,station,direction,day_type,time,dest,remark
+南北線,大通,麻生方面,weekday,06:00,麻生行き,
+南北線,大通,麻生方面,weekday,06:10,麻生行き,
+南北線,大通,麻生方面,weekday,06:15,麻生行き,
+南北線,大通,麻生方面,weekday,07:00,麻生行き,
+南北線,大通,麻生方面,weekday,23:55,麻生行き,
+南北線,大通,麻生方面,weekday,00:05,麻生行き,
+南北線,大通,麻生方面,weekend_holiday,06:30,麻生行き,
+"""
+
+
+@pytest.fixture
+def timetable(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "_memory_cache", {})
+    path = tmp_path / "南北線_大通_麻生方面.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+class TestHeadway:
+    def test_時間帯別の運行間隔(self, timetable):
+        hourly, _ = compute_metrics([timetable], cache_dir=None)
+
+        row = hourly[(hourly["day_type"] == "weekday") & (hourly["hour"] == 6)].iloc[0]
+        assert row["trains"] == 3
+        assert row["min_headway"] == 5
+        assert row["max_headway"] == 10
+        # 0時台は同じ営業日の24時台として、23時台の列車からの間隔になる
+        midnight = hourly[(hourly["day_type"] == "weekday") & (hourly["hour"] == 24)].iloc[0]
+        assert midnight["avg_headway"] == 10
+
+    def test_始発と終電(self, timetable):
+        _, span = compute_metrics([timetable], cache_dir=None)
+
+        weekday = format_span(span).set_index("day_type").loc["weekday"]
+        assert weekday["first"] == "06:00"
+        assert weekday["last"] == "24:05"
+        assert weekday["trains"] == 6
+
+    def test_平日と土日祝の比較(self, timetable):
+        hourly, _ = compute_metrics([timetable], cache_dir=None)
+
+        row = compare_day_types(hourly).set_index("hour").loc[6]
+        assert row["weekday_trains"] == 3
+        assert row["weekend_holiday_trains"] == 1
+        assert row["trains_diff"] == -2
+
+    def test_同じ内容のファイルは再集計しない(self, timetable, tmp_path, monkeypatch):
+        cache_dir = str(tmp_path / "cache")
+        compute_metrics([timetable], cache_dir=cache_dir)
+
+        monkeypatch.setattr(analytics, "_memory_cache", {})
+        monkeypatch.setattr(analytics, "_compute", None)
+        hourly, span = compute_metrics([timetable], cache_dir=cache_dir)
+
+        assert len(span) == 2
+        assert set(hourly["path"]) == {timetable}
+
+    def test_書き換えたファイルの古い集計は残さない(self, timetable, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        compute_metrics([timetable], cache_dir=cache_dir)
+        with open(timetable, "a", encoding="utf-8") as f:
+            f.write("南北線,大通,麻生方面,weekend_holiday,06:40,麻生行き,\n")
+
+        compute_metrics([timetable], cache_dir=cache_dir)
+
+        assert analytics._memory_cache["span"]["file_hash"].nunique() == 1
+        assert len(analytics._memory_cache["span"]) == 2
@@ -2,7 +2,7 @@ import pytest
 import pandas as pd
 from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
-from app import next_trains, parse_hhmm_to_dt, is_weekend_or_holiday
+from timetable_core import next_trains, parse_hhmm_to_dt, is_weekend_or_holiday
 
 JST = ZoneInfo("Asia/Tokyo")
 
@@ -186,6 +186,26 @@ class TestNextTrains:
         assert len(result) == 2
         assert result.iloc[0]["time"] == "06:00"
 
+    def test_24時表記の時刻も日付またぎで扱える(self):
+        """
+        新形式（24:xx）の時刻表でも 0時台の列車が表示され、表示は時計表記になる
+        """
+        df = pd.DataFrame({
+            "line": ["南北線"] * 4,
+            "station": ["さっぽろ"] * 4,
+            "direction": ["麻生方面"] * 4,
+            "day_type": ["weekday"] * 4,
+            "time": ["06:00", "23:50", "24:00", "24:09"],
+            "dest": ["麻生"] * 4,
+            "remark": [""] * 4,
+        })
+        now = datetime(2026, 1, 17, 23, 55, 0, tzinfo=JST)
+
+        result = next_trains(df, now, n=3)
+
+        assert list(result["time"]) == ["00:00", "00:09", "06:00"]
+        assert list(result["in_min"]) == [5, 14, 365]
+
 
 class TestMidnightBoundary:
     """深夜0時付近の列車表示テスト"""
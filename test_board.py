@@ -0,0 +1,57 @@
+import random
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from timetable_core import (
+    board_selection,
+    compile_timetables,
+    compute_boards,
+    list_csv_files,
+    next_trains,
+    parse_filename,
+    read_timetable_csv,
+)
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+@pytest.fixture(scope="module")
+def timetables():
+    return compile_timetables(list_csv_files())
+
+
+class TestComputeBoards:
+    def test_app_pyと同じ駅と方面を選ぶ(self, timetables):
+        assert [(station, direction) for _, station, direction in board_selection(timetables)] == [
+            ("麻生", "真駒内方面"),
+            ("さっぽろ", "麻生方面"),
+            ("大通", "麻生方面"),
+            ("すすきの", "麻生方面"),
+        ]
+
+    def test_駅ごとのnext_trainsと同じ結果(self, timetables):
+        frames = {parse_filename(p): read_timetable_csv(p) for p in list_csv_files()}
+        rng = random.Random(0)
+        for _ in range(50):
+            now = datetime(2026, 1, 17, tzinfo=JST) + timedelta(seconds=rng.randrange(2 * 86400))
+            for day_type in ["weekday", "weekend_holiday"]:
+                for board in compute_boards(timetables, now, day_type, n=4):
+                    df = frames[board.line, board.station, board.direction]
+                    expected = next_trains(df[df["day_type"] == day_type], now, n=4)
+                    got = [(d.time, d.dest, d.in_min) for d in board.departures]
+                    assert got == list(zip(expected["time"], expected["dest"], expected["in_min"]))
+
+    def test_日付をまたいで翌営業日の始発に続く(self, timetables):
+        now = datetime(2026, 1, 19, 23, 55, tzinfo=JST)
+        board = compute_boards(timetables, now, "weekday", n=3)[2]
+
+        assert board.station == "大通"
+        assert [d.time for d in board.departures] == ["00:00", "00:09", "06:16"]
+        assert [d.in_min for d in board.departures] == [5, 14, 381]
+
+    def test_該当するダイヤが無い駅(self, timetables):
+        boards = compute_boards(timetables, datetime(2026, 1, 19, 12, 0, tzinfo=JST), "holiday_special")
+
+        assert all(not b.available and b.departures == () for b in boards)
@@ -0,0 +1,90 @@
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from timetable_core import (
+    JST,
+    BoundedCache,
+    board_time_key,
+    compile_timetables,
+    compute_boards,
+    estimate_nbytes,
+    list_csv_files,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestBoundedCache:
+    def test_同じオブジェクトを返す(self):
+        cache = BoundedCache("t")
+        value = (1, 2, 3)
+        assert cache.get_or_create("k", lambda: value) is value
+        assert cache.get_or_create("k", lambda: (4,)) is value
+        assert cache.summary()["hits"] == 1
+        assert cache.stats()[0]["hits"] == 1
+
+    def test_件数の上限で古いものから捨てる(self):
+        cache = BoundedCache("t", max_entries=2)
+        for key in ["a", "b", "a", "c"]:
+            cache.get_or_create(key, lambda: key)
+        assert "a" in cache and "c" in cache and "b" not in cache
+
+    def test_バイト数の上限(self):
+        cache = BoundedCache("t", max_bytes=250)
+        for key in range(5):
+            cache.get_or_create(key, lambda: None, nbytes=100)
+        assert len(cache) == 2
+        assert cache.total_bytes == 200
+        assert cache.summary()["evictions"] == 3
+
+    def test_期限切れは作り直す(self):
+        clock = FakeClock()
+        cache = BoundedCache("t", ttl=10, clock=clock)
+        cache.get_or_create("k", lambda: "old")
+        clock.t = 11
+        assert cache.get_or_create("k", lambda: "new") == "new"
+        assert cache.summary()["misses"] == 2
+
+    def test_大きさの見積もり(self):
+        timetables = compile_timetables(list_csv_files())
+        assert estimate_nbytes(timetables) == timetables.nbytes
+        boards = tuple(compute_boards(timetables, datetime(2026, 1, 19, 8, 0, tzinfo=JST), "weekday"))
+        assert estimate_nbytes(boards) > estimate_nbytes(boards[0]) > 0
+
+
+def test_何千回再実行してもメモリが増えない():
+    timetables = compile_timetables(list_csv_files())
+    cache = BoundedCache("boards", max_entries=64)
+    start = datetime(2026, 1, 19, 4, 0, tzinfo=JST)
+
+    def rerun(i):
+        now = start + timedelta(seconds=15 * i)
+        return cache.get_or_create(
+            ("src", "weekday", 2, board_time_key(now)),
+            lambda: tuple(compute_boards(timetables, now, "weekday", n=2)),
+        )
+
+    tracemalloc.start()
+    try:
+        # 15秒ごとの再実行で4回に1回新しい分になる。キャッシュが上限まで埋まってから、さらに再実行を続けても増えないこと
+        for i in range(400):
+            rerun(i)
+        gc.collect()
+        before, _ = tracemalloc.get_traced_memory()
+        for i in range(400, 3400):
+            rerun(i)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(cache) == 64
+    assert cache.summary()["hits"] > 0
+    assert after - before < 64 * 1024
@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+from datetime import date, datetime
+
+import pytest
+
+from export_static import export_static
+from timetable_core import JST, card_html, compile_timetables, compute_boards, list_csv_files, load_exceptions
+from timetable_core.schedule_exceptions import EXCEPTIONS_SUBDIR
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    out = tmp_path_factory.mktemp("static")
+    index = export_static(str(out), n=2, days=7, start=date(2026, 1, 16), workers=2)
+    return out, index
+
+
+def test_時計の分で引いた案内がcompute_boardsと同じ(exported):
+    out, _ = exported
+    board_path = out / "weekday" / "南北線_大通_麻生方面"
+    bundle = json.loads((board_path / "23.json").read_text(encoding="utf-8"))
+
+    now = datetime(2026, 1, 19, 23, 55, tzinfo=JST)
+    selection = [("南北線", "大通", "麻生方面")]
+    [board] = compute_boards(compile_timetables(list_csv_files()), now, "weekday", n=2, selection=selection)
+    assert len(bundle["minutes"]) == 60
+    assert bundle["minutes"][55] == [["00:00", "麻生行き", "", 5], ["00:09", "麻生行き", "", 14]]
+    assert [[d.time, d.dest, d.remark, d.in_min] for d in board.departures] == bundle["minutes"][55]
+
+    html = (board_path / "23.html").read_text(encoding="utf-8")
+    assert f'<section id="m55">{card_html("麻生方面（平日）", board.departures)}</section>' in html
+
+
+def test_索引とダイヤの暦(exported):
+    out, index = exported
+    assert index == json.loads((out / "index.json").read_text(encoding="utf-8"))
+    assert {b["path"] for b in index["boards"]} >= {"南北線_麻生_真駒内方面", "南北線_さっぽろ_麻生方面"}
+    for b in index["boards"]:
+        for day_type in index["day_types"]:
+            assert len(list((out / day_type / b["path"]).glob("*.json"))) == 24
+
+    calendar = json.loads((out / "calendar.json").read_text(encoding="utf-8"))
+    assert calendar == {
+        "2026-01-16": "weekday", "2026-01-17": "weekend_holiday", "2026-01-18": "weekend_holiday",
+        "2026-01-19": "weekday", "2026-01-20": "weekday", "2026-01-21": "weekday", "2026-01-22": "weekday",
+    }
+
+
+def test_知らないダイヤは飛ばし_前回の残りは消す(tmp_path):
+    special = tmp_path / "南北線_大通_臨時方面.csv"
+    special.write_text("line,station,direction,day_type,time,dest,remark\n"
+                       "南北線,大通,臨時方面,festival,21:00,麻生行き,\n", encoding="utf-8")
+    paths = [p for p in list_csv_files() if "_大通_" in p]
+    for path in paths:
+        shutil.copy(path, tmp_path)
+    out = tmp_path / "out" / "static"
+
+    index = export_static(str(out), days=1, workers=1, timetable_dir=str(tmp_path))
+    assert index["skipped_day_types"] == ["festival"]
+    assert "南北線_大通_臨時方面" not in {b["path"] for b in index["boards"]}
+    assert not (out / "festival").exists()
+
+    for path in paths[1:] + [str(special)]:
+        os.remove(tmp_path / os.path.basename(path))
+    export_static(str(out), days=1, workers=1, timetable_dir=str(tmp_path))
+    kept = {p.name for day_type in ("weekday", "weekend_holiday") for p in (out / day_type).iterdir()}
+    assert kept == {os.path.basename(paths[0])[:-len(".csv")]}
+
+
+def test_臨時ダイヤの日はapp_pyと同じ案内を別に書き出す(tmp_path):
+    base_dir = tmp_path / "timetables"
+    shutil.copytree("timetables", base_dir)
+    period = base_dir / EXCEPTIONS_SUBDIR / "2026-01-19_2026-01-19_臨時"
+    period.mkdir(parents=True)
+    (period / "南北線_大通_麻生方面.exc.csv").write_text(
+        "op,day_type,time,dest,remark\n+,weekday,10:09,自衛隊前行き,臨時\n", encoding="utf-8")
+    out = tmp_path / "static"
+
+    index = export_static(str(out), n=2, days=4, start=date(2026, 1, 18), workers=1, timetable_dir=str(base_dir))
+
+    # 前日（終電のあとに当日の始発が続く）と翌日（0時台は当日の営業日）も特別な日になる
+    calendar = json.loads((out / "calendar.json").read_text(encoding="utf-8"))
+    assert calendar == {"2026-01-18": "weekend_holiday@2026-01-18", "2026-01-19": "weekday@2026-01-19",
+                        "2026-01-20": "weekday@2026-01-20", "2026-01-21": "weekday"}
+    assert index["variants"]["weekday@2026-01-19"] == {"day_type": "weekday", "date": "2026-01-19"}
+
+    now = datetime(2026, 1, 19, 10, 5, tzinfo=JST)
+    [board] = compute_boards(compile_timetables(list_csv_files(str(base_dir))), now, "weekday", n=2,
+                             selection=[("南北線", "大通", "麻生方面")], exceptions=load_exceptions(str(base_dir)))
+    bundle = json.loads((out / "weekday@2026-01-19" / "南北線_大通_麻生方面" / "10.json").read_text(encoding="utf-8"))
+    assert bundle["minutes"][5] == [[d.time, d.dest, d.remark, d.in_min] for d in board.departures]
+    assert bundle["minutes"][5][1] == ["10:09", "自衛隊前行き", "臨時", 4]
+    plain = json.loads((out / "weekday" / "南北線_大通_麻生方面" / "10.json").read_text(encoding="utf-8"))
+    assert "自衛隊前行き" not in {d[1] for d in plain["minutes"][5]}
@@ -0,0 +1,48 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from loadtest import make_schedule, make_synthetic_timetables, percentile
+
+
+class TestSchedule:
+    def test_セッションごとに位相をずらす(self):
+        schedule = make_schedule(4, interval=15, duration=30)
+
+        assert schedule == [(0.0, 0), (3.75, 1), (7.5, 2), (11.25, 3),
+                            (15.0, 0), (18.75, 1), (22.5, 2), (26.25, 3)]
+
+    def test_試験時間が間隔より短くても1回は実行する(self):
+        assert make_schedule(2, interval=15, duration=5) == [(0.0, 0), (7.5, 1)]
+
+    def test_パーセンタイル(self):
+        assert percentile([], 50) == 0.0
+        assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+        assert percentile([3.0, 1.0, 2.0], 99) == 3.0
+
+
+class TestSyntheticTimetables:
+    def test_カレントディレクトリによらず実データから作る(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        out_dir = make_synthetic_timetables(3)
+        try:
+            files = sorted(os.listdir(out_dir))
+            assert [f.split("_")[1] for f in files] == ["合成0000", "合成0001", "合成0002"]
+            with open(os.path.join(out_dir, files[0]), encoding="utf-8") as f:
+                assert ",合成0000," in f.read()
+        finally:
+            shutil.rmtree(out_dir)
+
+    def test_元のCSVが無ければ止める(self, tmp_path):
+        with pytest.raises(SystemExit):
+            make_synthetic_timetables(1, source_dir=str(tmp_path))
+
+    def test_import時には時刻表の場所を決めない(self):
+        # --stations の TIMETABLE_DIR は main() で設定するので、それまで loader を読み込まない
+        code = "import sys, loadtest; print('timetable_core.loader' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert out.stdout.strip() == "False"
@@ -0,0 +1,83 @@
+import random
+from collections import Counter
+
+from timetable_core import STATION_ORDER, build_segment_index, compile_timetables, list_csv_files
+
+HEADER = "line,station,direction,day_type,time,dest,remark"
+
+
+def write(tmp_path, station, direction, times):
+    rows = [HEADER] + [f"南北線,{station},{direction},weekday,{t},麻生行き," for t in times]
+    (tmp_path / f"南北線_{station}_{direction}.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+def test_隣の駅の発車時刻と突き合わせて区間を作る(tmp_path):
+    # すすきの → 大通 2分、大通 → さっぽろ 3分（8:00 の列車は大通で運転打ち切り）
+    write(tmp_path, "すすきの", "麻生方面", ["08:00", "08:05", "08:10"])
+    write(tmp_path, "大通", "麻生方面", ["08:02", "08:07", "08:12"])
+    write(tmp_path, "さっぽろ", "麻生方面", ["08:10", "08:15"])
+    index = build_segment_index(compile_timetables(list_csv_files(str(tmp_path))))
+
+    def at(hhmm):
+        h, m = map(int, hhmm.split(":"))
+        return sorted((p.from_station, p.to_station, round(p.progress, 2))
+                      for p in index.active(h * 60 + m - 240, "weekday"))
+
+    # 8:00 すすきの発 → 8:02 大通発、8:05 → 8:07 → 8:10 さっぽろ発、8:10 → 8:12 → 8:15
+    assert len(index) == 5
+    assert at("08:06") == [("すすきの", "大通", 0.5)]
+    assert at("08:08") == [("大通", "さっぽろ", 0.33)]
+    assert at("08:11") == [("すすきの", "大通", 0.5)]
+    assert at("08:12") == [("大通", "さっぽろ", 0.0)]
+    assert index.active(8 * 60 - 240, "weekend_holiday") == []
+
+
+def segment(p):
+    return p.depart, p.arrive, p.line, p.direction, p.from_station, p.to_station, p.dest
+
+
+def scan_segments(timetables, tolerance=1, max_run=30):
+    """
+    索引を使わずに区間を数える。同じ路線・方面・ダイヤで隣り合う駅の発車時刻を先頭から順に調べ、
+    最も多くの列車が合う所要時間で、各発車に最も近い隣の駅の発車（1回だけ使う）を対応させる。
+    """
+    slices = {}
+    for i, (line, station, direction, day_type) in enumerate(timetables.keys):
+        lo, hi = int(timetables.offsets[i]), int(timetables.offsets[i + 1])
+        rows = [(int(timetables.minutes[k]), timetables.strings[timetables.dest[k]]) for k in range(lo, hi)]
+        slices.setdefault((line, direction, day_type), {})[station] = rows
+
+    segments = {}
+    for (line, direction, day_type), by_station in slices.items():
+        # 麻生方面は麻生に向かうので STATION_ORDER の逆順、真駒内方面はその順
+        stations = sorted(by_station, key=STATION_ORDER.index, reverse=direction == "麻生方面")
+        for from_station, to_station in zip(stations, stations[1:]):
+            a, b = by_station[from_station], [m for m, _ in by_station[to_station]]
+            counts = {run: sum(any(abs(y - (x + run)) <= tolerance for y in b) for x, _ in a)
+                      for run in range(1, max_run + 1)}
+            run = max(counts, key=lambda r: (counts[r], -r))
+            if counts[run] == 0:
+                continue
+            left = Counter(b)
+            for x, dest in a:
+                candidates = [y for y in left if left[y] and abs(y - (x + run)) <= tolerance and y > x]
+                if candidates:
+                    y = min(candidates, key=lambda y: (abs(y - (x + run)), y))
+                    left[y] -= 1
+                    segments.setdefault(day_type, []).append(
+                        (x, y, line, direction, from_station, to_station, dest))
+    return segments
+
+
+def test_隣の駅の発車時刻を順に調べた結果と同じ():
+    timetables = compile_timetables(list_csv_files())
+    index = build_segment_index(timetables)
+    segments = scan_segments(timetables)
+    assert sum(len(s) for s in segments.values()) == len(index) > 0
+
+    rng = random.Random(0)
+    times = [m + 0.5 for m in range(1440)] + [rng.uniform(0, 1440) for _ in range(300)]
+    for day_type, expected_all in segments.items():
+        for t in times:
+            expected = sorted(s for s in expected_all if s[0] <= t < s[1])
+            assert sorted(segment(p) for p in index.active(t, day_type)) == expected
@@ -0,0 +1,52 @@
+import itertools
+
+import pytest
+
+from rerun_profiles import main
+from timetable_core.profiling import RerunProfiler, list_profiles, top_functions
+
+
+def slow_rerun():
+    return sum(i * i for i in range(20000))
+
+
+def fake_clock(step_sec):
+    ticks = itertools.count()
+    return lambda: next(ticks) * step_sec
+
+
+class TestRerunProfiler:
+    def test_しきい値より速い再実行は残さない(self, tmp_path):
+        with RerunProfiler(500, str(tmp_path), clock=fake_clock(0.1)) as profiler:
+            slow_rerun()
+        assert profiler.finish() is None
+        assert list_profiles(str(tmp_path)) == []
+
+    def test_遅い再実行を新しい順にkeep件だけ残す(self, tmp_path):
+        saved = []
+        for _ in range(5):
+            profiler = RerunProfiler(500, str(tmp_path), keep=3, clock=fake_clock(0.8))
+            profiler.start()
+            slow_rerun()
+            saved.append(profiler.finish())
+
+        profiles = list_profiles(str(tmp_path))
+        assert [p.path for p in profiles] == saved[-3:]
+        assert all(p.elapsed_ms == 800 for p in profiles)
+
+    @pytest.mark.parametrize("threshold_ms", [float("nan"), float("inf"), -1])
+    def test_しきい値は0以上の有限の値だけ(self, tmp_path, threshold_ms):
+        with pytest.raises(ValueError):
+            RerunProfiler(threshold_ms, str(tmp_path))
+
+    def test_累積時間の上位関数(self, tmp_path, capsys):
+        profiler = RerunProfiler(0, str(tmp_path))
+        profiler.start()
+        slow_rerun()
+        path = profiler.finish()
+
+        functions = [row["function"] for row in top_functions(path, n=5)]
+        assert any(f.startswith("slow_rerun (test_profiling.py:") for f in functions)
+
+        main(["--dir", str(tmp_path), "-n", "5"])
+        assert "slow_rerun" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from timetable_core import Board, Departure, compile_timetables, compute_boards, list_csv_files, parse_service_time
+from timetable_core.refresh import HEARTBEAT_SEC, WAKE_MARGIN_SEC, next_change_delay, next_refresh_delay
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+class TestNextChange:
+    def test_あと何分は時計と一緒に分の変わり目で切り替わる(self):
+        # 10:05 発を 10:00:10 に見ると「あと 5 分」。10:01:00 で時計と一緒に「あと 4 分」になる
+        now = datetime(2026, 1, 19, 10, 0, 10, tzinfo=JST)
+        delay = next_change_delay([parse_service_time("10:05")], now)
+        assert delay == pytest.approx(50 + WAKE_MARGIN_SEC)
+
+    def test_発車の瞬間に表示している列車はすぐ消える(self):
+        now = datetime(2026, 1, 19, 10, 5, 0, tzinfo=JST)
+        delay = next_change_delay([parse_service_time("10:05")], now)
+        assert delay == pytest.approx(WAKE_MARGIN_SEC)
+
+    def test_列車が無ければ分の変わり目まで眠る(self):
+        now = datetime(2026, 1, 19, 2, 0, 45, tzinfo=JST)
+        assert next_change_delay([], now) == pytest.approx(15 + WAKE_MARGIN_SEC)
+        assert next_change_delay([], now, clock_minutes=False) == float("inf")
+
+
+@pytest.fixture(scope="module")
+def timetables():
+    return compile_timetables(list_csv_files())
+
+
+def weekday_boards(timetables, now):
+    return compute_boards(timetables, now, "weekday", n=2)
+
+
+class TestNextRefresh:
+    def test_日中は毎分1回だけ更新する(self, timetables):
+        now = datetime(2026, 1, 19, 12, 0, 5, tzinfo=JST)
+        boards = weekday_boards(timetables, now)
+        assert next_refresh_delay(boards, now) == pytest.approx(55 + WAKE_MARGIN_SEC)
+        assert next_refresh_delay(boards, now, clock_minutes=True) == pytest.approx(55 + WAKE_MARGIN_SEC)
+
+    def test_1時間以内に列車が無ければ見回りの間隔まで待つ(self, timetables):
+        now = datetime(2026, 1, 20, 1, 0, 0, tzinfo=JST)
+        boards = weekday_boards(timetables, now)
+        assert min(d.in_min for b in boards for d in b.departures) > 60
+        assert next_refresh_delay(boards, now, clock_minutes=True) == pytest.approx(HEARTBEAT_SEC)
+
+    def test_列車が1時間以内に入るときに起きる(self):
+        # 12:30 発を 11:25 に見ると、1時間以内に入る 11:30 まで待つ
+        departure = Departure("12:30", "麻生行き", "", 65, parse_service_time("12:30"))
+        boards = [Board("南北線", "大通", "麻生方面", "weekday", True, (departure,))]
+        now = datetime(2026, 1, 19, 11, 25, 0, tzinfo=JST)
+        assert next_refresh_delay(boards, now, clock_minutes=True) == pytest.approx(300 + WAKE_MARGIN_SEC)
+
+    def test_列車が無ければ見回りの間隔まで待つ(self):
+        now = datetime(2026, 1, 20, 1, 0, 0, tzinfo=JST)
+        assert next_refresh_delay([], now) == pytest.approx(HEARTBEAT_SEC)
+        assert next_refresh_delay([], now, clock_minutes=True) == pytest.approx(HEARTBEAT_SEC)
+
+    def test_ダイヤの切り替わりは越えない(self):
+        now = datetime(2026, 1, 20, 4, 58, 0, tzinfo=JST)
+        assert next_refresh_delay([], now) == pytest.approx(120 + WAKE_MARGIN_SEC)
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from replay import count_refreshes, replay
+from timetable_core import (
+    AUTO_REFRESH_SEC,
+    JST,
+    FixedClock,
+    ScaledClock,
+    SystemClock,
+    TimetableSource,
+    clock_from_spec,
+)
+
+
+class TestClock:
+    def test_指定から時計を作る(self):
+        assert isinstance(clock_from_spec(None), SystemClock)
+        fixed = clock_from_spec("2026-01-19T23:55")
+        assert fixed.now() == datetime(2026, 1, 19, 23, 55, tzinfo=JST)
+        fixed.advance(90)
+        assert fixed.now() == datetime(2026, 1, 19, 23, 56, 30, tzinfo=JST)
+
+    def test_早送りの時計(self):
+        ticks = iter([100.0, 101.5])
+        clock = ScaledClock(datetime(2026, 1, 19, 23, 59, tzinfo=JST), speed=60, monotonic=lambda: next(ticks))
+        assert clock.now() == datetime(2026, 1, 20, 0, 0, 30, tzinfo=JST)
+
+
+class TestReplay:
+    def test_平日ダイヤ固定なら不連続は無い(self):
+        start = datetime(2026, 1, 19, 4, 0, tzinfo=JST)
+        result = replay(TimetableSource(), start, start + timedelta(days=1), day_type="weekday")
+
+        assert result["ticks"] == 24 * 60 * 60 // 15
+        assert result["discontinuities"] == []
+        # 表示が変わるとき（毎分 0 秒）だけの再実行は、15秒ごとの4分の1以下
+        assert 0 < result["refreshes"]["adaptive"] <= result["refreshes"]["fixed"] // 4
+
+    def test_日中は毎分1回_夜間は見回りだけ再実行する(self):
+        source = TimetableSource()
+
+        def refreshes(start, hours):
+            end = start + timedelta(hours=hours)
+            fixed = (end - start).total_seconds() // AUTO_REFRESH_SEC
+            return count_refreshes(source, start, end, day_type="weekday"), fixed
+
+        # 日中は時計の分と「あと N 分」が毎分 0 秒に一緒に変わるので、15秒ごとの4分の1
+        adaptive, fixed = refreshes(datetime(2026, 1, 19, 7, 0, tzinfo=JST), 15)
+        assert adaptive <= fixed // 4
+        # 終電のあと始発の1時間前までは、10分ごとの見回りとダイヤの切り替わりだけ
+        adaptive, fixed = refreshes(datetime(2026, 1, 20, 0, 30, tzinfo=JST), 4.5)
+        assert adaptive <= fixed // 30
+
+    def test_営業日の途中のダイヤ切り替えを報告する(self):
+        # 金曜の営業日: 04:00〜04:59 は翌日（土曜）扱い、00:00 以降も翌日（日曜）扱いになる
+        start = datetime(2026, 1, 16, 4, 0, tzinfo=JST)
+        result = replay(TimetableSource(), start, start + timedelta(days=1), step=60)
+
+        changes = [(d["time"], d["detail"]) for d in result["discontinuities"] if d["kind"] == "day_type_change"]
+        assert changes == [
+            ("2026-01-16T05:00:00+09:00", "weekend_holiday -> weekday"),
+            ("2026-01-17T00:00:00+09:00", "weekday -> weekend_holiday"),
+        ]
+
+    def test_発車前に消えた列車を報告する(self, tmp_path):
+        rows = ["line,station,direction,day_type,time,dest,remark",
+                "南北線,大通,麻生方面,weekday,23:50,麻生行き,",
+                "南北線,大通,麻生方面,weekday,24:10,麻生行き,",
+                "南北線,大通,麻生方面,weekend_holiday,23:50,麻生行き,"]
+        (tmp_path / "南北線_大通_麻生方面.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+        start = datetime(2026, 1, 16, 23, 58, tzinfo=JST)
+
+        result = replay(TimetableSource(timetable_dir=str(tmp_path)), start,
+                        start + timedelta(minutes=4), step=60, n=1)
+
+        kinds = [(d["time"], d["kind"], d["detail"]) for d in result["discontinuities"]]
+        assert ("2026-01-17T00:00:00+09:00", "early_disappearance", "00:10 が発車 600 秒前に消えた") in kinds
@@ -0,0 +1,106 @@
+import random
+import shutil
+from datetime import date, datetime
+
+import pytest
+
+from timetable_core import JST, TimetableSource, compile_timetables, compute_boards, list_csv_files
+from timetable_core.revisions import (
+    active_revision,
+    apply_delta,
+    compile_revision,
+    create_revision,
+    diff_departures,
+    read_delta,
+    revision_files,
+)
+from timetable_revisions import export_revision
+
+
+class TestDelta:
+    def test_追加_削除_変更(self):
+        base = [("weekday", 100, "麻生行き", ""), ("weekday", 110, "麻生行き", ""), ("weekday", 120, "麻生行き", "")]
+        new = [("weekday", 100, "麻生行き", ""), ("weekday", 110, "自衛隊前行き", ""), ("weekday", 130, "麻生行き", "")]
+
+        ops = diff_departures(base, new)
+
+        assert ops == [
+            ("~", "weekday", 110, "自衛隊前行き", "", "麻生行き", ""),
+            ("-", "weekday", 120, "麻生行き", "", "", ""),
+            ("+", "weekday", 130, "麻生行き", "", "", ""),
+        ]
+        assert apply_delta(base, ops) == sorted(new)
+
+    def test_差分を当てると元に戻る(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            def sample():
+                return [(rng.choice(["weekday", "weekend_holiday"]), rng.randrange(60),
+                         rng.choice(["麻生行き", "自衛隊前行き"]), rng.choice(["", "始発"]))
+                        for _ in range(rng.randrange(30))]
+            base, new = sample(), sample()
+            assert apply_delta(base, diff_departures(base, new)) == sorted(new)
+
+
+@pytest.fixture
+def revised_dir(tmp_path):
+    base_dir = tmp_path / "timetables"
+    shutil.copytree("timetables", base_dir)
+    new_dir = tmp_path / "new"
+    export_revision(None, str(new_dir), str(base_dir))
+    path = new_dir / "南北線_大通_麻生方面.csv"
+    lines = path.read_text(encoding="utf-8").splitlines()
+    # 平日 06:16 の始発をやめ、23:55 に1本足す
+    lines = [l for l in lines if l != "南北線,大通,麻生方面,weekday,06:16,麻生行き,"]
+    lines.append("南北線,大通,麻生方面,weekday,23:55,麻生行き,")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    create_revision(str(new_dir), date(2026, 4, 1), str(base_dir))
+    return base_dir, new_dir
+
+
+class TestRevisions:
+    def test_差分だけを保存する(self, revised_dir):
+        base_dir, _ = revised_dir
+        [path] = revision_files(date(2026, 4, 1), str(base_dir))
+        assert path.endswith("南北線_大通_麻生方面.delta.csv")
+        assert [op[0] for op in read_delta(path)] == ["-", "+"]
+
+    def test_改正後の版は全CSVから作ったものと同じ(self, revised_dir):
+        base_dir, new_dir = revised_dir
+        revised = compile_revision(date(2026, 4, 1), str(base_dir))
+        expected = compile_timetables(list_csv_files(str(new_dir)))
+        assert revised.to_bytes() == expected.to_bytes()
+
+    def test_営業日で版を選ぶ(self, revised_dir):
+        base_dir, _ = revised_dir
+        # 施行日前夜の終電（4/1 の 0時台）はまだ旧ダイヤ
+        assert active_revision(datetime(2026, 4, 1, 0, 30, tzinfo=JST), str(base_dir)) is None
+        assert active_revision(datetime(2026, 4, 1, 4, 0, tzinfo=JST), str(base_dir)) == date(2026, 4, 1)
+        assert active_revision(date(2026, 3, 31), str(base_dir)) is None
+
+        now = datetime(2026, 4, 1, 23, 53, tzinfo=JST)
+        selection = [("南北線", "大通", "麻生方面")]
+        [old] = compute_boards(compile_revision(None, str(base_dir)), now, "weekday", n=1, selection=selection)
+        [new] = compute_boards(compile_revision(date(2026, 4, 1), str(base_dir)), now, "weekday", n=1,
+                               selection=selection)
+        assert old.departures[0].time == "00:00"
+        assert new.departures[0].time == "23:55"
+
+    def test_終電のあとは翌営業日の版の始発に続く(self, revised_dir):
+        base_dir, _ = revised_dir
+        source = TimetableSource(timetable_dir=str(base_dir))
+        selection = [("南北線", "大通", "麻生方面")]
+        # 施行日前夜の 0時台: 終電までは旧ダイヤ、そのあとは 06:16 をやめた新ダイヤの始発
+        for now, expected in [(datetime(2026, 4, 1, 0, 5, tzinfo=JST), ["00:09", "06:26"]),
+                              (datetime(2026, 4, 1, 0, 30, tzinfo=JST), ["06:26", "06:36"])]:
+            loaded = source.lookup(now)
+            assert loaded.revision is None
+            [board] = compute_boards(loaded.timetables, now, "weekday", n=2, selection=selection,
+                                     tomorrow=loaded.tomorrow)
+            assert [d.time for d in board.departures] == expected
+
+        # 施行日の営業日に入れば翌営業日も同じ版
+        loaded = source.lookup(datetime(2026, 4, 1, 4, 0, tzinfo=JST))
+        assert loaded.revision == date(2026, 4, 1)
+        assert loaded.tomorrow is None
+        assert source.cache.summary()["entries"] == 2
@@ -0,0 +1,162 @@
+import random
+import shutil
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from timetable_core import JST, compile_timetables, compute_boards, list_csv_files
+from timetable_core.compiled import compile_records, file_records
+from timetable_core.schedule_exceptions import EXCEPTIONS_SUBDIR, load_exceptions
+from timetable_core.service_time import format_service_time
+
+SLOT = ("南北線", "大通", "麻生方面")
+
+
+def write_period(base_dir, name, rows):
+    period_dir = base_dir / EXCEPTIONS_SUBDIR / name
+    period_dir.mkdir(parents=True)
+    lines = ["op,day_type,time,dest,remark"] + [",".join(r) for r in rows]
+    (period_dir / "南北線_大通_麻生方面.exc.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    base_dir = tmp_path / "timetables"
+    shutil.copytree("timetables", base_dir)
+    return base_dir
+
+
+@pytest.fixture(scope="module")
+def timetables():
+    return compile_timetables(list_csv_files())
+
+
+def board_at(timetables, now, exceptions, n=3):
+    [board] = compute_boards(timetables, now, "weekday", n=n, selection=[SLOT], exceptions=exceptions)
+    return [(d.time, d.dest) for d in board.departures]
+
+
+class TestScheduleExceptions:
+    def test_臨時列車と運休と行先変更(self, timetables, base_dir):
+        # 平日 10:05 の次は 10:07, 10:14, 10:21, 10:28, ... 麻生行き
+        write_period(base_dir, "2027-02-04_2027-02-11_雪まつり", [
+            ("+", "", "10:09", "自衛隊前行き", "臨時"),
+            ("-", "weekday", "10:14", "", ""),
+            ("~", "weekday", "10:21", "北24条行き", ""),
+        ])
+        exceptions = load_exceptions(str(base_dir))
+        now = datetime(2027, 2, 5, 10, 5, tzinfo=JST)
+
+        assert [p.name for p in exceptions.active(now)] == ["雪まつり"]
+        assert board_at(timetables, now, None) == [("10:07", "麻生行き"), ("10:14", "麻生行き"), ("10:21", "麻生行き")]
+        assert board_at(timetables, now, exceptions, n=4) == [
+            ("10:07", "麻生行き"), ("10:09", "自衛隊前行き"), ("10:21", "北24条行き"), ("10:28", "麻生行き"),
+        ]
+        # 期間の外（終了日の翌営業日）では何も変わらない
+        after = datetime(2027, 2, 12, 10, 5, tzinfo=JST)
+        assert board_at(timetables, after, exceptions) == board_at(timetables, after, None)
+
+    def test_翌営業日分には翌日の例外を当てる(self, timetables, base_dir):
+        # 初日の前夜の終電後は、翌営業日（初日）の始発前の臨時列車が出る
+        write_period(base_dir, "2027-02-04_2027-02-04_初日", [("+", "weekday", "05:30", "麻生行き", "臨時")])
+        exceptions = load_exceptions(str(base_dir))
+
+        assert board_at(timetables, datetime(2027, 2, 4, 1, 0, tzinfo=JST), exceptions, n=1) == [("05:30", "麻生行き")]
+        assert board_at(timetables, datetime(2027, 2, 5, 1, 0, tzinfo=JST), exceptions, n=1) == [("06:16", "麻生行き")]
+
+    def test_時刻表に当てて作り直した結果と同じ(self, base_dir):
+        base = [r for r in file_records(str(base_dir / "南北線_大通_麻生方面.csv")) if r[3] == "weekday"]
+        rng = random.Random(2)
+        for trial in range(20):
+            cancelled = set(rng.sample([r[4] for r in base], 15))
+            added = {rng.randrange(1440): rng.choice(["麻生行き", "自衛隊前行き"]) for _ in range(15)}
+            rows = [("-", "weekday", format_service_time(m), "", "") for m in cancelled]
+            rows += [("+", "", format_service_time(m), dest, "臨時") for m, dest in added.items()]
+            name = f"2027-01-01_2027-12-31_{trial}"
+            write_period(base_dir, name, rows)
+            exceptions = load_exceptions(str(base_dir))
+            shutil.rmtree(base_dir / EXCEPTIONS_SUBDIR / name)
+
+            # 期間中は毎日同じ例外なので、時刻表そのものに当てたものと一致するはず
+            expected = compile_records(
+                [r for r in base if r[4] not in cancelled]
+                + [SLOT + ("weekday", m, dest, "臨時") for m, dest in added.items()]
+            )
+            for _ in range(20):
+                now = datetime(2027, 3, 1, tzinfo=JST) + timedelta(seconds=rng.randrange(86400))
+                got = compute_boards(expected, now, "weekday", n=3, selection=[SLOT])
+                merged = compute_boards(compile_records(base), now, "weekday", n=3, selection=[SLOT],
+                                        exceptions=exceptions)
+                assert merged == got, (trial, now)
+
+    def test_期間のディレクトリ名(self, base_dir):
+        write_period(base_dir, "2027-02-04_2027-02-11", [("+", "", "10:08", "麻生行き", "")])
+        (base_dir / EXCEPTIONS_SUBDIR / "メモ").mkdir()
+        [period] = load_exceptions(str(base_dir)).periods
+        assert (period.name, period.start, period.end) == ("", date(2027, 2, 4), date(2027, 2, 11))
+
+    def test_同じ分の2本は行先で指した方だけ運休する(self, base_dir):
+        base = compile_records([SLOT + ("weekday", 370, "自衛隊前行き", ""), SLOT + ("weekday", 370, "麻生行き", ""),
+                                SLOT + ("weekday", 380, "麻生行き", "")])
+        now = datetime(2027, 2, 5, 10, 5, tzinfo=JST)
+        write_period(base_dir, "2027-02-04_2027-02-11_行先", [("-", "weekday", "10:10", "自衛隊前行き", "")])
+        assert board_at(base, now, load_exceptions(str(base_dir))) == [("10:10", "麻生行き"), ("10:20", "麻生行き")]
+
+        shutil.rmtree(base_dir / EXCEPTIONS_SUBDIR)
+        write_period(base_dir, "2027-02-04_2027-02-11_時刻", [("-", "weekday", "10:10", "", "")])
+        assert board_at(base, now, load_exceptions(str(base_dir))) == [("10:10", "麻生行き"), ("10:20", "麻生行き")]
+
+    def test_当たる列車の無い運休と変更を報告する(self, timetables, base_dir):
+        write_period(base_dir, "2027-02-04_2027-02-11_雪まつり", [
+            ("-", "weekday", "10:14", "", ""),
+            ("-", "weekday", "10:15", "", ""),
+            ("~", "weekend_holiday", "10:16", "北24条行き", ""),
+            ("-", "weekday", "10:21", "真駒内行き", ""),
+        ])
+        problems = load_exceptions(str(base_dir)).unmatched(timetables)
+
+        assert problems == [
+            "2027-02-04_2027-02-11_雪まつり: 南北線_大通_麻生方面 weekday 10:15 に当たる列車がありません",
+            "2027-02-04_2027-02-11_雪まつり: 南北線_大通_麻生方面 weekday 10:21 真駒内行き に当たる列車がありません",
+            "2027-02-04_2027-02-11_雪まつり: 南北線_大通_麻生方面 weekend_holiday 10:16 に当たる列車がありません",
+        ]
+
+    def test_1日分の時刻表に当てる(self, timetables, base_dir):
+        write_period(base_dir, "2027-02-04_2027-02-11_雪まつり", [
+            ("+", "", "10:09", "自衛隊前行き", "臨時"),
+            ("-", "weekday", "10:14", "", ""),
+        ])
+        exceptions = load_exceptions(str(base_dir))
+        applied = exceptions.apply(timetables, date(2027, 2, 5), "weekday")
+        now = datetime(2027, 2, 5, 10, 5, tzinfo=JST)
+
+        assert {key[3] for key in applied.keys} == {"weekday"}
+        assert board_at(applied, now, None, n=4) == board_at(timetables, now, exceptions, n=4)
+        # 大通の麻生方面は1本増えて1本減り、他の駅はそのまま
+        weekday = [i for i, key in enumerate(timetables.keys) if key[3] == "weekday"]
+        assert len(applied.minutes) == sum(int(timetables.offsets[i + 1] - timetables.offsets[i]) for i in weekday)
+
+    def test_基準の時刻表に無いダイヤにも臨時列車を出す(self, base_dir):
+        # 大通の麻生方面から土日祝の時刻表を消し、雪まつりの土日だけ臨時列車を走らせる
+        path = base_dir / "南北線_大通_麻生方面.csv"
+        lines = path.read_text(encoding="utf-8").splitlines()
+        path.write_text("\n".join(l for l in lines if ",weekend_holiday," not in l) + "\n", encoding="utf-8")
+        write_period(base_dir, "2027-02-04_2027-02-11_雪まつり", [
+            ("+", "weekend_holiday", "10:09", "自衛隊前行き", "臨時"),
+            ("+", "weekend_holiday", "10:39", "自衛隊前行き", "臨時"),
+        ])
+        timetables = compile_timetables(list_csv_files(str(base_dir)))
+        exceptions = load_exceptions(str(base_dir))
+        now = datetime(2027, 2, 6, 10, 5, tzinfo=JST)
+
+        [without] = compute_boards(timetables, now, "weekend_holiday", selection=[SLOT])
+        [board] = compute_boards(timetables, now, "weekend_holiday", selection=[SLOT], exceptions=exceptions)
+        assert not without.available
+        assert board.available
+        # 翌営業日（日曜）も期間内なので、その臨時列車に続く
+        assert [(d.time, d.in_min) for d in board.departures] == [("10:09", 4), ("10:39", 34), ("10:09", 1444)]
+
+        applied = exceptions.apply(timetables, date(2027, 2, 6), "weekend_holiday")
+        [from_applied] = compute_boards(applied, now, "weekend_holiday", selection=[SLOT])
+        # 1日分の時刻表は2本だけなので、翌営業日分は続かない
+        assert from_applied.departures == board.departures[:2]
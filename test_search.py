@@ -0,0 +1,43 @@
+import pytest
+
+from search_benchmark import synthetic_stations
+from timetable_core import StationSearchIndex, compile_timetables, list_csv_files, load_station_catalog
+from timetable_core.board import station_selection
+from timetable_core.search import normalize
+
+
+@pytest.fixture(scope="module")
+def index():
+    return StationSearchIndex(load_station_catalog())
+
+
+def names(stations):
+    return [s.name for s in stations]
+
+
+class TestStationSearch:
+    @pytest.mark.parametrize("query", ["さっぽろ", "サッポロ", "Sapporo", "sap", "札幌", "ＳＡＰＰＯＲＯ"])
+    def test_かな_ローマ字_漢字で引ける(self, index, query):
+        assert names(index.search(query)) == ["さっぽろ"]
+
+    def test_ローマ字の長音はそろえる(self, index):
+        assert names(index.search("oodoori")) == names(index.search("odori")) == ["大通"]
+
+    def test_完全一致_前方一致_途中一致の順(self, index):
+        assert names(index.search("ひらぎし")) == ["平岸", "南平岸"]
+        assert names(index.search("北")) == ["北12条", "北18条", "北24条", "北34条"]
+        assert names(index.search("24")) == ["北24条"]
+        assert names(index.search("北", limit=2)) == ["北12条", "北18条"]
+        assert index.search("存在しない駅") == []
+
+    def test_検索した駅の方面をすべて開く(self):
+        timetables = compile_timetables(list_csv_files())
+        assert station_selection(timetables, "大通") == [("南北線", "大通", "真駒内方面"), ("南北線", "大通", "麻生方面")]
+        assert station_selection(timetables, "平岸") == []
+
+    def test_数千駅でも途中一致まで正しく引ける(self):
+        # 速さは search_benchmark.py で測る
+        index = StationSearchIndex(synthetic_stations(5000))
+        for query in ["k", "か", "kasa", "駅", "駅12", "shi", "ahi", "a"]:
+            result = index.search(query)
+            assert all(query in normalize(s.name) or query in s.kana or query in s.romaji for s in result)
@@ -0,0 +1,38 @@
+import pytest
+from datetime import datetime, date
+from zoneinfo import ZoneInfo
+
+from timetable_core.service_time import (
+    format_clock_time,
+    format_service_time,
+    parse_service_time,
+    service_date,
+    service_seconds,
+)
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+class TestServiceTime:
+    def test_旧形式と新形式が同じ値になる(self):
+        assert parse_service_time("00:09") == parse_service_time("24:09")
+        assert parse_service_time("24:09") == 20 * 60 + 9
+
+    def test_営業日の開始は0分(self):
+        assert parse_service_time("04:00") == 0
+        assert parse_service_time("03:59") == 24 * 60 - 1
+
+    @pytest.mark.parametrize("text", ["05:00", "23:59", "24:00", "25:30"])
+    def test_書き出しは24時超え表記(self, text):
+        assert format_service_time(parse_service_time(text)) == text
+
+    def test_表示用は時計表記(self):
+        assert format_clock_time(parse_service_time("24:09")) == "00:09"
+
+    def test_営業日の判定(self):
+        assert service_date(datetime(2026, 1, 18, 3, 59, tzinfo=JST)) == date(2026, 1, 17)
+        assert service_date(datetime(2026, 1, 18, 4, 0, tzinfo=JST)) == date(2026, 1, 18)
+
+    def test_営業日開始からの秒(self):
+        assert service_seconds(datetime(2026, 1, 18, 4, 0, 30, tzinfo=JST)) == 30
+        assert service_seconds(datetime(2026, 1, 18, 0, 9, tzinfo=JST)) == (20 * 60 + 9) * 60
@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from timetable_core.compiled import CompiledTimetables, compile_timetables
+import shm_store
+from shm_store import Publisher, SharedTimetableReader
+from timetable_core.loader import list_csv_files
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+@pytest.fixture
+def publisher():
+    pub = Publisher(f"test_tt_{uuid.uuid4().hex[:8]}")
+    yield pub
+    pub.close(unlink=True)
+
+
+class TestSharedTimetables:
+    def test_バイト列にしても同じ結果になる(self):
+        timetables = compile_timetables(list_csv_files())
+        restored = CompiledTimetables.from_buffer(timetables.to_bytes())
+
+        i = restored.find("南北線", "大通", "麻生方面", "weekday")
+        now = datetime(2026, 1, 19, 23, 55, tzinfo=JST)
+        assert restored.keys == timetables.keys
+        assert restored.next_trains(i, now).equals(timetables.next_trains(i, now))
+        assert list(restored.next_trains(i, now)["time"]) == ["00:00", "00:09", "06:16"]
+
+    def test_読み手は書き込み不可(self, publisher):
+        publisher.publish(compile_timetables(list_csv_files()))
+        timetables = SharedTimetableReader(publisher.name).get()
+
+        with pytest.raises(ValueError):
+            timetables.minutes[0] = 0
+
+    def test_新しい版に切り替わる(self, publisher):
+        paths = list_csv_files()
+        publisher.publish(compile_timetables(paths[:1]))
+        reader = SharedTimetableReader(publisher.name)
+        first = reader.get()
+        assert reader.get() is first
+
+        publisher.publish(compile_timetables(paths))
+        second = reader.get()
+
+        assert second.version == first.version + 1
+        assert len(second.keys) > len(first.keys)
+        assert np.array_equal(first.minutes, compile_timetables(paths[:1]).minutes)
+
+    def test_読む前に消された版は読み直す(self, publisher, monkeypatch):
+        paths = list_csv_files()
+        for _ in range(3):
+            version = publisher.publish(compile_timetables(paths[:1]))
+        stale = iter([version - 2])
+        real_read_version = shm_store.read_version
+        monkeypatch.setattr(shm_store, "read_version", lambda control: next(stale, None) or real_read_version(control))
+
+        assert SharedTimetableReader(publisher.name).get().version == version
+
+    def test_残っていた同じ版の共有メモリは作り直す(self, publisher):
+        stale = shm_store._open(f"{publisher.name}_1", create=True, size=8)
+        stale.close()
+
+        timetables = compile_timetables(list_csv_files()[:1])
+        assert publisher.publish(timetables) == 1
+        assert SharedTimetableReader(publisher.name).get().keys == timetables.keys
@@ -0,0 +1,39 @@
+import shutil
+from datetime import datetime
+
+from timetable_core import JST, FixedClock, TimetableSource, list_csv_files
+
+
+def test_同じ版の時刻表は1回だけコンパイルする(tmp_path):
+    for path in list_csv_files()[:2]:
+        shutil.copy(path, tmp_path)
+    source = TimetableSource(FixedClock(datetime(2026, 1, 19, 12, 0, tzinfo=JST)), timetable_dir=str(tmp_path))
+
+    first = source.lookup(source.now())
+    second = source.lookup(source.now())
+
+    assert second.timetables is first.timetables
+    assert first.revision is None
+    assert len(first.timetables.keys) > 0
+    assert source.cache.summary()["entries"] == 1
+
+
+def test_CSVが無ければNone(tmp_path):
+    source = TimetableSource(timetable_dir=str(tmp_path))
+    assert source.lookup(source.now()) is None
+
+
+def test_共有メモリの読み手があればそちらを使う():
+    class Reader:
+        def __init__(self, timetables):
+            self.timetables = timetables
+
+        def get(self):
+            return self.timetables
+
+    timetables = TimetableSource().lookup(datetime(2026, 1, 19, 12, 0, tzinfo=JST)).timetables
+    timetables.version = 7
+    loaded = TimetableSource(reader=Reader(timetables)).lookup(datetime(2026, 1, 19, 12, 0, tzinfo=JST))
+
+    assert loaded.source == ("shm", 7)
+    assert loaded.timetables is timetables
@@ -0,0 +1,63 @@
+import random
+from datetime import datetime
+
+from timetable_core import (
+    JST,
+    Station,
+    StationGrid,
+    compile_timetables,
+    haversine_m,
+    list_csv_files,
+    load_station_catalog,
+    nearest_departures,
+)
+
+
+def test_駅一覧は表示順の駅をすべて含む():
+    from timetable_core import STATION_ORDER
+
+    assert [s.name for s in load_station_catalog()] == STATION_ORDER
+
+
+def test_格子の検索は全件を調べた結果と同じ():
+    rng = random.Random(0)
+    # 市内の全停留所より多い件数で試す
+    stations = [Station("test", f"s{i}", rng.uniform(42.95, 43.15), rng.uniform(141.2, 141.5)) for i in range(2000)]
+    grid = StationGrid(stations)
+    for _ in range(200):
+        lat, lon = rng.uniform(42.9, 43.2), rng.uniform(141.1, 141.6)
+        expected = sorted(stations, key=lambda s: haversine_m(lat, lon, s.lat, s.lon))[:5]
+        assert [s for _, s in grid.nearest(lat, lon, 5)] == expected
+
+
+def test_遠く離れた地点からも見つかる():
+    grid = StationGrid(load_station_catalog())
+    [(distance, station)] = grid.nearest(35.68, 139.77, 1)  # 東京
+    assert station.name == "真駒内"
+    assert distance > 800_000
+
+
+def test_近くの駅の次の列車():
+    timetables = compile_timetables(list_csv_files())
+    now = datetime(2026, 1, 19, 23, 55, tzinfo=JST)
+
+    result = nearest_departures(timetables, StationGrid(load_station_catalog()), 43.0605, 141.3545, now,
+                                "weekday", k=2, n=2)
+
+    assert [s.name for _, s, _ in result] == ["大通", "すすきの"]
+    _, _, boards = result[0]
+    assert [b.direction for b in boards] == ["真駒内方面", "麻生方面"]
+    assert [d.time for d in boards[1].departures] == ["00:00", "00:09"]
+
+
+def test_同じ駅名が多くても駅名でk件そろえる():
+    # 10路線が乗り入れる駅（k * 4 件より多い）の近くで2駅を探す
+    stations = [Station(f"線{i}", "中央", 43.0, 141.0 + i * 1e-5) for i in range(10)]
+    stations.append(Station("線0", "となり", 43.01, 141.0))
+    grid = StationGrid(stations)
+    timetables = compile_timetables(list_csv_files())
+    now = datetime(2026, 1, 19, 12, 0, tzinfo=JST)
+
+    found = nearest_departures(timetables, grid, 43.0, 141.0, now, "weekday", k=2)
+
+    assert [s.name for _, s, _ in found] == ["中央", "となり"]
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+import verify_timetables
+from verify_timetables import run
+
+PAGE = """
+<html><body>
+<h2>麻生方面</h2>
+<h3>平日</h3>
+<p>6 10 20<br>7 05 15</p>
+<h3>土曜・休日</h3>
+<p>6 10 20<br>7 05 15</p>
+</body></html>
+"""
+
+CSV = """line,station,direction,day_type,time,dest,remark
+南北線,大通,麻生方面,weekday,06:10,麻生行き,
+南北線,大通,麻生方面,weekday,06:20,麻生行き,
+南北線,大通,麻生方面,weekday,07:05,麻生行き,
+南北線,大通,麻生方面,weekday,07:15,麻生行き,
+南北線,大通,麻生方面,weekend_holiday,06:10,麻生行き,
+南北線,大通,麻生方面,weekend_holiday,06:20,麻生行き,
+"""
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = headers or {}
+        self.apparent_encoding = "utf-8"
+        self.encoding = "utf-8"
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def fake_site(monkeypatch):
+    """ETag に対応した偽のページ。requests.get の呼び出しを記録する"""
+    calls = []
+
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(headers or {})
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, PAGE, {"ETag": '"v1"'})
+
+    monkeypatch.setattr(verify_timetables.requests, "get", fake_get)
+    return calls
+
+
+@pytest.fixture
+def target(tmp_path):
+    csv_path = tmp_path / "南北線_大通_麻生方面.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    return {
+        "station": "大通",
+        "url": "https://example.invalid/n07.html",
+        "csv_files": {"麻生方面": str(csv_path)},
+    }
+
+
+class TestIncrementalVerification:
+    def test_初回は全組を検証する(self, fake_site, target, tmp_path):
+        report = run([target], state_path=str(tmp_path / "state.json"))
+
+        statuses = {r["day_type"]: r["status"] for r in report["results"]}
+        assert statuses == {"weekday": "ok", "weekend_holiday": "mismatch"}
+        assert report["summary"]["checked"] == 2
+        assert len(report["diff"]) == 2
+
+    def test_変更がなければ再検証しない(self, fake_site, target, tmp_path, monkeypatch):
+        state_path = str(tmp_path / "state.json")
+        run([target], state_path=state_path)
+
+        def must_not_parse(*args, **kwargs):
+            raise AssertionError("ページを再パースした")
+
+        monkeypatch.setattr(verify_timetables, "extract_times_from_text_block", must_not_parse)
+        report = run([target], state_path=state_path)
+
+        assert fake_site[-1]["If-None-Match"] == '"v1"'
+        assert report["summary"]["checked"] == 0
+        assert report["summary"]["mismatch"] == 1
+        assert report["diff"] == []
+
+    def test_CSVが変わった組だけ再検証する(self, fake_site, target, tmp_path, monkeypatch):
+        state_path = str(tmp_path / "state.json")
+        run([target], state_path=state_path)
+
+        csv_path = target["csv_files"]["麻生方面"]
+        with open(csv_path, "a", encoding="utf-8") as f:
+            f.write("南北線,大通,麻生方面,weekend_holiday,07:05,麻生行き,\n")
+            f.write("南北線,大通,麻生方面,weekend_holiday,07:15,麻生行き,\n")
+        monkeypatch.setattr(verify_timetables, "extract_times_from_text_block", None)
+
+        report = run([target], state_path=state_path, offline=True)
+
+        assert report["summary"]["checked"] == 2
+        assert report["diff"][0]["day_type"] == "weekend_holiday"
+        assert report["diff"][0]["status"] == "ok"
+        assert report["diff"][0]["changed_inputs"] == ["csv"]
+
+    def test_取得できなかったページはエラーとして数える(self, target, tmp_path, monkeypatch, capsys):
+        def unreachable(url, headers=None, timeout=None):
+            raise verify_timetables.requests.ConnectionError("unreachable")
+
+        monkeypatch.setattr(verify_timetables.requests, "get", unreachable)
+        monkeypatch.setattr(verify_timetables, "TARGETS", [target])
+        code = verify_timetables.main(["--state", str(tmp_path / "state.json"), "--report", "-"])
+
+        report = json.loads(capsys.readouterr().out)
+        assert code == 1
+        assert report["summary"]["errors"] == 2
+        assert report["summary"]["checked"] == 0
+        assert {r["status"] for r in report["results"]} == {"fetch_error"}
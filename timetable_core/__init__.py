@@ -0,0 +1,83 @@
+"""
+地下鉄時刻表のコア（Streamlit に依存しない）
+
+UI の副作用を持たず、pandas / numpy などの重い依存は実際に使う関数を
+呼ぶまで読み込まない。`from timetable_core import next_trains` のように
+パッケージから直接取り出せる名前は、初めて参照されたときにサブモジュールを読み込む。
+"""
+import importlib
+
+_EXPORTS = {
+    "JST": "service_time",
+    "MINUTES_PER_DAY": "service_time",
+    "format_clock_time": "service_time",
+    "format_service_time": "service_time",
+    "parse_service_time": "service_time",
+    "service_date": "service_time",
+    "service_seconds": "service_time",
+    "BoundedCache": "cache",
+    "estimate_nbytes": "cache",
+    "FixedClock": "clock",
+    "ScaledClock": "clock",
+    "SystemClock": "clock",
+    "clock_from_spec": "clock",
+    "DAY_TYPES": "daytype",
+    "DAY_TYPE_LABELS": "daytype",
+    "auto_day_type": "daytype",
+    "effective_date": "daytype",
+    "is_weekend_or_holiday": "daytype",
+    "STATION_ORDER": "stations",
+    "get_station_order": "stations",
+    "target_direction": "stations",
+    "Station": "stations",
+    "load_station_catalog": "stations",
+    "StationSearchIndex": "search",
+    "StationGrid": "spatial",
+    "haversine_m": "spatial",
+    "nearest_departures": "spatial",
+    "Board": "board",
+    "Departure": "board",
+    "board_selection": "board",
+    "board_time_key": "board",
+    "station_selection": "board",
+    "compute_boards": "board",
+    "next_trains": "board",
+    "parse_hhmm_to_dt": "board",
+    "card_html": "card",
+    "TIMETABLE_DIR": "loader",
+    "files_fingerprint": "loader",
+    "list_csv_files": "loader",
+    "parse_filename": "loader",
+    "read_timetable_csv": "loader",
+    "SegmentIndex": "positions",
+    "TrainPosition": "positions",
+    "build_segment_index": "positions",
+    "AUTO_REFRESH_SEC": "refresh",
+    "next_change_delay": "refresh",
+    "next_refresh_delay": "refresh",
+    "active_revision": "revisions",
+    "compile_revision": "revisions",
+    "list_revisions": "revisions",
+    "revision_files": "revisions",
+    "ScheduleExceptions": "schedule_exceptions",
+    "exception_files": "schedule_exceptions",
+    "load_exceptions": "schedule_exceptions",
+    "LoadedTimetables": "source",
+    "TimetableSource": "source",
+    "CompiledTimetables": "compiled",
+    "compile_timetables": "compiled",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
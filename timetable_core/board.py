@@ -0,0 +1,181 @@
+"""次の列車の検索"""
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+
+from .service_time import JST, MINUTES_PER_DAY, format_clock_time, parse_service_time, service_seconds
+from .stations import get_station_order, target_direction
+
+
+def parse_hhmm_to_dt(hhmm: str, base_date: date) -> datetime:
+    """base_date の hhmm。"24:09" のような表記は翌日 00:09 になる。"""
+    hh, mm = str(hhmm).split(":")
+    midnight = datetime.combine(base_date, dtime(0, 0), tzinfo=JST)
+    return midnight + timedelta(hours=int(hh), minutes=int(mm))
+
+
+def next_trains(df, now: datetime, n=3):
+    """
+    now以降の次列車n本を返す。in_min（あと何分）は発車の分と時計の分（秒は切り捨て）の差。
+    営業日基準の分に揃えて1回の単調な探索にし、今営業日の残りの後ろに
+    翌営業日分（+1日）をつなげることで日付またぎを扱う。
+    """
+    import numpy as np
+
+    if "svc_min" in df.columns:
+        mins = df["svc_min"].to_numpy(dtype=np.int64)
+    else:
+        mins = np.array([parse_service_time(t) for t in df["time"]], dtype=np.int64)
+
+    order = np.argsort(mins, kind="stable")
+    sorted_mins = mins[order]
+    now_sec = service_seconds(now)
+    start = int(np.searchsorted(sorted_mins * 60, now_sec, side="left"))
+
+    idx = np.concatenate([order[start:], order[:start]])[:n]
+    dep = np.concatenate([sorted_mins[start:], sorted_mins[:start] + MINUTES_PER_DAY])[:n]
+
+    future = df.iloc[idx].copy()
+    future["time"] = [format_clock_time(m) for m in dep]
+    future["in_min"] = (dep - now_sec // 60).astype(int)
+    return future[["time", "dest", "remark", "in_min"]]
+
+
+@dataclass(frozen=True)
+class Departure:
+    time: str  # 表示用の時計表記
+    dest: str
+    remark: str
+    in_min: int  # あと何分（発車の分 - 時計の分）
+    svc_min: int  # 営業日基準の分（翌営業日分は 1440 以上）
+
+
+@dataclass(frozen=True)
+class Board:
+    line: str
+    station: str
+    direction: str
+    day_type: str
+    available: bool  # この day_type の時刻表があるか
+    departures: tuple[Departure, ...]
+
+
+def board_selection(timetables) -> list[tuple[str, str, str]]:
+    """
+    画面に出す (路線, 駅, 方面) を表示順に返す。
+    駅は STATION_ORDER 順、方面は駅ごとに1つ（麻生は真駒内方面、それ以外は麻生方面）。
+    """
+    lines = {}
+    for line, station, direction, _ in timetables.keys:
+        lines.setdefault((station, direction), line)
+    stations = sorted({station for station, _ in lines}, key=lambda s: (get_station_order(s), s))
+    selection = []
+    for station in stations:
+        direction = target_direction(station)
+        if (station, direction) in lines:
+            selection.append((lines[station, direction], station, direction))
+    return selection
+
+
+def station_selection(timetables, station: str) -> list[tuple[str, str, str]]:
+    """駅の時刻表のある (路線, 駅, 方面) をすべて返す（駅の検索で1駅だけ開くとき）。"""
+    return sorted({(line, s, direction) for line, s, direction, _ in timetables.keys if s == station})
+
+
+def board_time_key(now: datetime) -> tuple:
+    """
+    compute_boards の結果を決める now の成分。同じキーなら（同じダイヤ・本数で）結果も同じ。
+    探索の起点は切り上げた分、「あと N 分」は切り捨てた分（時計の分）で決まるので、
+    時計の分と、ちょうど0秒かどうかで表せる。
+    """
+    q = service_seconds(now) / 60
+    whole = int(q)
+    return (whole, q > whole)
+
+
+def _first_rows(timetables, i: int | None, count: int) -> list[tuple[int, str, str]]:
+    """スライス i の始発から count 本を、翌営業日分として (svc_min + 1日, dest, remark) で返す。"""
+    if i is None or count <= 0:
+        return []
+    lo = int(timetables.offsets[i])
+    hi = min(int(timetables.offsets[i + 1]), lo + count)
+    strings = timetables.strings
+    return [(int(m) + MINUTES_PER_DAY, strings[d], strings[r]) for m, d, r in
+            zip(timetables.minutes[lo:hi], timetables.dest[lo:hi], timetables.remark[lo:hi])]
+
+
+def compute_boards(timetables, now: datetime, day_type: str, n=3, selection=None,
+                   exceptions=None, tomorrow=None) -> list[Board]:
+    """
+    selection（省略時は board_selection）の全駅の次列車 n 本を1回でまとめて求める。
+    全スライスを連結した配列に「スライス番号 * SEARCH_STRIDE + 分」のキーを振ってあるので、
+    全駅の探索位置を1回の searchsorted で求め、n 本分をずらして取る。
+    exceptions（schedule_exceptions.ScheduleExceptions）があれば、その営業日の臨時列車・運休を
+    併合する。運休で減る分だけ基準の列車を多めに取っておく。
+    tomorrow は翌営業日の時刻表（ダイヤ改正の施行日の前夜なら新しい版。source.LoadedTimetables）。
+    終電のあとに続ける翌営業日分はそちらから取る。省略時は timetables と同じ。
+    """
+    import numpy as np
+
+    from .compiled import SEARCH_STRIDE
+
+    if selection is None:
+        selection = board_selection(timetables)
+    found = [timetables.find(line, station, direction, day_type) for line, station, direction in selection]
+    changes = exceptions.window(now, day_type) if exceptions is not None else {}
+    n_base = n + max((len(changes[key].cancelled) for key in selection if key in changes), default=0)
+    sel = np.array([i for i in found if i is not None], dtype=np.int64)
+
+    now_sec = service_seconds(now)
+    lo = timetables.offsets[sel]
+    length = timetables.offsets[sel + 1] - lo
+    # now 以降で最初の分（m * 60 >= now_sec）
+    first_min = int(-(-now_sec // 60))
+    start = np.searchsorted(timetables.search_keys, sel * SEARCH_STRIDE + first_min) - lo
+
+    rel = start[:, None] + np.arange(n_base)[None, :]
+    wrapped = rel >= length[:, None]
+    pos = lo[:, None] + np.where(wrapped, rel - length[:, None], rel)
+    valid = np.arange(n_base)[None, :] < length[:, None]
+    pos = np.where(valid, pos, 0)
+    dep = timetables.minutes[pos].astype(np.int64) + wrapped * MINUTES_PER_DAY
+    # 「あと N 分」は時計の分からの差（毎分0秒に時計と一緒に切り替わる）
+    clock_min = int(now_sec // 60)
+    in_min = dep - clock_min
+    dest = timetables.dest[pos]
+    remark = timetables.remark[pos]
+
+    strings = timetables.strings
+    # 翌営業日が別の版なら、翌営業日分（wrapped）は配列から取らずに tomorrow の始発から取る
+    other_day = tomorrow is not None and tomorrow is not timetables
+    boards = []
+    row = 0
+    for (line, station, direction), i in zip(selection, found):
+        change = changes.get((line, station, direction))
+        if i is not None and change is None and not other_day:
+            departures = tuple(
+                Departure(format_clock_time(dep[row, j]), strings[dest[row, j]], strings[remark[row, j]],
+                          int(in_min[row, j]), int(dep[row, j]))
+                for j in range(n)
+                if valid[row, j]
+            )
+            boards.append(Board(line, station, direction, day_type, True, departures))
+            row += 1
+            continue
+
+        base = []
+        if i is not None:
+            base = [(int(dep[row, j]), strings[dest[row, j]], strings[remark[row, j]])
+                    for j in range(n_base) if valid[row, j] and not (other_day and wrapped[row, j])]
+            row += 1
+        if other_day:
+            base += _first_rows(tomorrow, tomorrow.find(line, station, direction, day_type), n_base - len(base))
+        # 基準の時刻表に無い駅・方面・ダイヤでも、臨時列車があればそれだけで出す
+        if i is None and not base and (change is None or not change.added):
+            boards.append(Board(line, station, direction, day_type, False, ()))
+            continue
+        departures = tuple(
+            Departure(format_clock_time(m), d, r, m - clock_min, m)
+            for m, d, r in (base[:n] if change is None else change.merge(base, n))
+        )
+        boards.append(Board(line, station, direction, day_type, True, departures))
+    return boards
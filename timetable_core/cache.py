@@ -0,0 +1,139 @@
+"""
+上限つきのメモリ内キャッシュ
+
+値はコピーせず同じオブジェクトを返す（pickle しない）ので、入れる値は
+変更されないもの（コンパイル済み時刻表、frozen な Board のタプルなど）に限る。
+件数・合計バイト数・有効期限（TTL）の上限を超えたら古いものから捨てる（LRU）。
+エントリごとに大きさとヒット数を数え、stats() で一覧できる。
+複数セッションのスレッドから同時に使えるよう、ロックで守る。
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+
+
+def estimate_nbytes(value, _seen=None) -> int:
+    """
+    value の大きさの見積もり（バイト）。nbytes を持つもの（numpy 配列、
+    CompiledTimetables）はそれを使い、コンテナと dataclass は中身まで数える。
+    同じオブジェクトは1回だけ数える。
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(estimate_nbytes(v, _seen) for v in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_nbytes(k, _seen) + estimate_nbytes(v, _seen) for k, v in value.items())
+    elif is_dataclass(value) and not isinstance(value, type):
+        size += sum(estimate_nbytes(getattr(value, f.name), _seen) for f in fields(value))
+    return size
+
+
+@dataclass
+class CacheEntry:
+    value: object
+    nbytes: int
+    created: float
+    hits: int = 0
+
+
+class BoundedCache:
+    def __init__(self, name: str, max_entries: int | None = None, max_bytes: int | None = None,
+                 ttl: float | None = None, clock=time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._live(key) is not None
+
+    def _live(self, key) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl is not None and self._clock() - entry.created > self.ttl:
+            self._drop(key)
+            return None
+        return entry
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.nbytes
+        self.evictions += 1
+
+    def get_or_create(self, key, factory, nbytes: int | None = None):
+        """
+        key の値を返す。無ければ factory() で作って入れる。
+        作っている間はロックを持たないので、同じ key を同時に作ることはあり得る（後勝ち）。
+        """
+        with self._lock:
+            entry = self._live(key)
+            if entry is not None:
+                entry.hits += 1
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            self.misses += 1
+
+        value = factory()
+        size = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+                self.evictions -= 1
+            self._entries[key] = CacheEntry(value, size, self._clock())
+            self.total_bytes += size
+            self._evict()
+        return value
+
+    def _evict(self):
+        # 入れたばかりのもの（末尾）は、それ1つで上限を超えても残す
+        while len(self._entries) > 1 and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            self._drop(next(iter(self._entries)))
+        if self.ttl is not None:
+            now = self._clock()
+            for key in [k for k, e in self._entries.items() if now - e.created > self.ttl]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> list[dict]:
+        """エントリごとの大きさ・ヒット数・経過秒（古い順）。"""
+        now = self._clock()
+        with self._lock:
+            return [
+                {"cache": self.name, "key": repr(key), "bytes": e.nbytes, "hits": e.hits,
+                 "age_sec": round(now - e.created, 1)}
+                for key, e in self._entries.items()
+            ]
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {"cache": self.name, "entries": len(self._entries), "bytes": self.total_bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
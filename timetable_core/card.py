@@ -0,0 +1,47 @@
+"""発車案内カードの HTML（app.py の表示と静的書き出しで共通）"""
+from html import escape
+
+CARD_OPEN = """
+<div style="
+    border: 3px solid #222;
+    border-radius: 18px;
+    padding: 18px 18px 10px 18px;
+    margin-bottom: 14px;
+    background: #fff;
+">
+  <div style="font-size: 30px; font-weight: 800; margin-bottom: 8px;">{title}</div>
+"""
+
+NO_TRAIN = """
+<div style="font-size: 26px; font-weight: 700; padding: 10px 0 16px 0;">
+  次の列車が見つかりません
+</div>
+"""
+
+ROW = """
+<div style="
+    display:flex; justify-content:space-between; align-items:baseline;
+    padding: 10px 0; border-top: 1px solid #ddd;
+">
+  <div style="font-size: 26px; font-weight: 750;">
+    {time} <span style="font-size:18px; font-weight:600; color:#444;">{left_sub}</span>
+  </div>
+  <div style="font-size: 34px; font-weight: 900;">
+    {right}
+  </div>
+</div>
+"""
+
+
+def card_html(title: str, departures) -> str:
+    """タイトルと Departure の並びから、発車案内カード1枚分の HTML を作る。"""
+    parts = [CARD_OPEN.format(title=escape(title))]
+    if not departures:
+        parts.append(NO_TRAIN)
+    for d in departures:
+        left_sub = f"({escape(d.dest or '—')})"
+        if d.remark:
+            left_sub += f"  <span style='color:#B00; font-weight:800;'>[{escape(d.remark)}]</span>"
+        parts.append(ROW.format(time=d.time, left_sub=left_sub, right=f"あと {d.in_min} 分"))
+    parts.append("</div>\n")
+    return "".join(parts)
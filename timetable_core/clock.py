@@ -0,0 +1,65 @@
+"""
+差し替えられる時計
+
+画面や計算は datetime.now() を直接呼ばず、時計オブジェクトの now() から現在時刻を得る。
+本番は SystemClock、再現試験では固定時刻（FixedClock）や早送り（ScaledClock）に差し替える。
+"""
+import time
+from datetime import datetime, timedelta
+
+from .service_time import JST
+
+
+class SystemClock:
+    """実際の現在時刻（JST）。"""
+
+    def now(self) -> datetime:
+        return datetime.now(JST)
+
+
+class FixedClock:
+    """advance() / set() で進めるまで止まっている時計。"""
+
+    def __init__(self, at: datetime):
+        self.at = at
+
+    def now(self) -> datetime:
+        return self.at
+
+    def set(self, at: datetime):
+        self.at = at
+
+    def advance(self, seconds: float):
+        self.at += timedelta(seconds=seconds)
+
+
+class ScaledClock:
+    """start から speed 倍の速さで進む時計（作成した瞬間が start）。"""
+
+    def __init__(self, start: datetime, speed: float = 1.0, monotonic=time.monotonic):
+        self.start = start
+        self.speed = speed
+        self._monotonic = monotonic
+        self._t0 = monotonic()
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=(self._monotonic() - self._t0) * self.speed)
+
+
+def clock_from_spec(spec: str | None):
+    """
+    文字列から時計を作る（環境変数 TIMETABLE_CLOCK 用）。
+      空 / None                 実際の時刻
+      "2026-01-19T23:55"        その時刻で止まった時計
+      "2026-01-19T23:55@60"     その時刻から60倍速で進む時計
+    タイムゾーンを書かなければ JST とみなす。
+    """
+    if not spec:
+        return SystemClock()
+    at, _, speed = spec.partition("@")
+    start = datetime.fromisoformat(at)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=JST)
+    if speed:
+        return ScaledClock(start, float(speed))
+    return FixedClock(start)
@@ -0,0 +1,163 @@
+"""
+コンパイル済み時刻表
+
+全時刻表を (路線, 駅, 方面, day_type) ごとのスライスに分け、
+営業日基準の分・行先・備考を1本ずつの連結配列にまとめたもの。
+行先と備考は文字列表へのコードで持つので、配列はすべて固定長の整数になり、
+そのままバイト列（共有メモリ）に載せられる。
+"""
+import json
+import struct
+
+import numpy as np
+
+from .service_time import MINUTES_PER_DAY, format_clock_time, service_seconds
+from .loader import parse_filename, read_timetable_rows
+
+MAGIC = b"SUGTT\x00\x00\x01"
+# magic, version, meta_len, n_keys, n_rows
+HEADER = struct.Struct("<8sQQQQ")
+# search_keys の1スライスあたりの幅（営業日基準の分はこれより小さい）
+SEARCH_STRIDE = 1 << 12
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) // 8 * 8
+
+
+class CompiledTimetables:
+    def __init__(self, keys, offsets, minutes, dest, remark, strings, version=0):
+        self.keys = [tuple(k) for k in keys]  # [(line, station, direction, day_type)]
+        self.offsets = offsets  # int64[K+1]: スライス i は offsets[i]:offsets[i+1]
+        self.minutes = minutes  # int32[N]: スライス内で昇順
+        self.dest = dest  # int32[N]: strings へのコード
+        self.remark = remark  # int32[N]: strings へのコード
+        self.strings = tuple(strings)
+        self.version = version
+        self._index = {k: i for i, k in enumerate(self.keys)}
+        self._search_keys = None
+        # 複数のセッションやプロセスで同じ配列を共有するので、書き換えられないようにする
+        for arr in (offsets, minutes, dest, remark):
+            arr.flags.writeable = False
+
+    @property
+    def search_keys(self):
+        """
+        全スライスを通して昇順になる検索キー（スライス番号 * SEARCH_STRIDE + 分）。
+        全駅の探索を1回の searchsorted で済ませるために使う（board.compute_boards）。
+        """
+        if self._search_keys is None:
+            counts = np.diff(self.offsets)
+            slice_ids = np.repeat(np.arange(len(self.keys), dtype=np.int64), counts)
+            self._search_keys = slice_ids * SEARCH_STRIDE + self.minutes
+            self._search_keys.flags.writeable = False
+        return self._search_keys
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.minutes.nbytes + self.dest.nbytes + self.remark.nbytes
+
+    def find(self, line: str, station: str, direction: str, day_type: str) -> int | None:
+        return self._index.get((line, station, direction, day_type))
+
+    def upcoming(self, i: int, now, n=3):
+        """
+        スライス i の now 以降の列車 n 本を (スライス内の位置, 営業日基準の分) の配列で返す。
+        今営業日の残りの後ろに翌営業日分（+1日）をつなげて探すので、分は 1440 を超えることがある。
+        """
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        mins = self.minutes[lo:hi].astype(np.int64)
+        start = int(np.searchsorted(mins * 60, service_seconds(now), side="left"))
+        idx = np.concatenate([np.arange(start, len(mins)), np.arange(0, start)])[:n]
+        dep = np.concatenate([mins[start:], mins[:start] + MINUTES_PER_DAY])[:n]
+        return idx, dep
+
+    def departures(self, i: int, now, n=3) -> list[tuple[str, str, str, int]]:
+        """スライス i の now 以降の列車 n 本を (time, dest, remark, in_min) のリストで返す。"""
+        lo = int(self.offsets[i])
+        idx, dep = self.upcoming(i, now, n)
+        in_min = dep - int(service_seconds(now) // 60)
+        return [
+            (format_clock_time(m), self.strings[self.dest[lo + j]], self.strings[self.remark[lo + j]], int(k))
+            for m, j, k in zip(dep, idx, in_min)
+        ]
+
+    def next_trains(self, i: int, now, n=3):
+        """スライス i について board.next_trains と同じ形の DataFrame を返す。"""
+        import pandas as pd
+
+        return pd.DataFrame(self.departures(i, now, n), columns=["time", "dest", "remark", "in_min"])
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps({"keys": self.keys, "strings": self.strings}, ensure_ascii=False).encode("utf-8")
+        header = HEADER.pack(MAGIC, self.version, len(meta), len(self.keys), len(self.minutes))
+        return b"".join([
+            header,
+            meta.ljust(_pad8(len(meta)), b"\x00"),
+            self.offsets.astype("<i8").tobytes(),
+            self.minutes.astype("<i4").tobytes(),
+            self.dest.astype("<i4").tobytes(),
+            self.remark.astype("<i4").tobytes(),
+        ])
+
+    @classmethod
+    def from_buffer(cls, buf) -> "CompiledTimetables":
+        """
+        バイト列（共有メモリの buf など）から、コピーせずに配列を参照して復元する。
+        配列は書き込み不可にする。
+        """
+        buf = memoryview(buf).toreadonly()
+        magic, version, meta_len, n_keys, n_rows = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("コンパイル済み時刻表ではありません")
+        pos = HEADER.size
+        meta = json.loads(bytes(buf[pos:pos + meta_len]).decode("utf-8"))
+        pos += _pad8(meta_len)
+
+        def take(dtype, count):
+            nonlocal pos
+            arr = np.frombuffer(buf, dtype=dtype, count=count, offset=pos)
+            pos += arr.nbytes
+            return arr
+
+        offsets = take("<i8", n_keys + 1)
+        minutes = take("<i4", n_rows)
+        dest = take("<i4", n_rows)
+        remark = take("<i4", n_rows)
+        return cls(meta["keys"], offsets, minutes, dest, remark, meta["strings"], version=version)
+
+
+def file_records(path: str) -> list[tuple[str, str, str, str, int, str, str]]:
+    """CSVの行を読み、路線・駅・方面をファイル名のもの（分かれば）に揃える。"""
+    line, station, direction = parse_filename(path)
+    return [(line or r[0], station or r[1], direction or r[2]) + r[3:] for r in read_timetable_rows(path)]
+
+
+def compile_timetables(paths: list[str], version: int = 0) -> CompiledTimetables:
+    """CSVをまとめて読み、コンパイル済み時刻表にする。路線・駅・方面はファイル名から取る。"""
+    return compile_records([r for p in paths for r in file_records(p)], version=version)
+
+
+def compile_records(records: list[tuple], version: int = 0) -> CompiledTimetables:
+    """(line, station, direction, day_type, svc_min, dest, remark) の行からコンパイルする。"""
+    records = sorted(records, key=lambda r: r[:5])
+
+    strings_index: dict[str, int] = {"": 0}
+    keys, counts = [], []
+    for r in records:
+        if not keys or keys[-1] != r[:4]:
+            keys.append(r[:4])
+            counts.append(0)
+        counts[-1] += 1
+
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    return CompiledTimetables(
+        keys,
+        offsets,
+        np.array([r[4] for r in records], dtype=np.int32),
+        np.array([strings_index.setdefault(r[5], len(strings_index)) for r in records], dtype=np.int32),
+        np.array([strings_index.setdefault(r[6], len(strings_index)) for r in records], dtype=np.int32),
+        list(strings_index),
+        version=version,
+    )
@@ -0,0 +1,33 @@
+"""平日/土日祝ダイヤの判定"""
+from datetime import date, datetime, timedelta
+
+DAY_TYPES = ["weekday", "weekend_holiday"]
+DAY_TYPE_LABELS = {"weekday": "平日", "weekend_holiday": "土日祝"}
+
+
+def is_weekend_or_holiday(d: date) -> bool:
+    """土日祝なら True。jpholiday が無ければ土日だけ判定。"""
+    # weekend
+    if d.weekday() >= 5:
+        return True
+    # holiday (Japan)
+    try:
+        import jpholiday
+        return jpholiday.is_holiday(d)
+    except Exception:
+        return False
+
+
+def effective_date(now: datetime) -> date:
+    """
+    ダイヤを決める日付。
+    営業時間中（朝5時～深夜23時59分）は当日のダイヤを使う。
+    深夜（0時～朝4時59分）は翌日のダイヤを使う。
+    """
+    if 0 <= now.hour < 5:
+        return (now + timedelta(days=1)).date()
+    return now.date()
+
+
+def auto_day_type(now: datetime) -> str:
+    return "weekend_holiday" if is_weekend_or_holiday(effective_date(now)) else "weekday"
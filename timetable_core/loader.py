@@ -0,0 +1,141 @@
+"""
+時刻表CSVの読み込み
+
+app.py や集計・検証などのスクリプトはここから読む。
+ダイヤ改正の版（差分）の読み込みは revisions.py。
+"""
+import glob
+import io
+import os
+from typing import TYPE_CHECKING
+
+from .service_time import SERVICE_DAY_START_HOUR, SERVICE_DAY_START_MIN, parse_service_time
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIMETABLE_DIR = os.environ.get("TIMETABLE_DIR", "timetables")  # 駅CSV置き場
+REQUIRED_COLUMNS = {"line", "station", "direction", "day_type", "time"}
+
+
+def parse_service_times(times: "pd.Series") -> "pd.Series":
+    """service_time.parse_service_time の列版（"HH:MM" の列 → 営業日基準の分）。"""
+    import pandas as pd
+
+    if times.empty:
+        return pd.Series([], index=times.index, dtype=int)
+    hm = times.str.split(":", n=2, expand=True)
+    hh = hm[0].astype(int)
+    mm = hm[1].astype(int)
+    hh = hh.where(hh >= SERVICE_DAY_START_HOUR, hh + 24)
+    return hh * 60 + mm - SERVICE_DAY_START_MIN
+
+
+def _normalize(df: "pd.DataFrame") -> "pd.DataFrame":
+    missing = REQUIRED_COLUMNS - set(df.columns)
+    if missing:
+        raise ValueError(f"CSVに必要な列が足りません: {missing}")
+
+    # optional columns
+    if "dest" not in df.columns:
+        df["dest"] = ""
+    if "remark" not in df.columns:
+        df["remark"] = ""
+
+    # 正規化
+    df["line"] = df["line"].astype(str)
+    df["station"] = df["station"].astype(str)
+    df["direction"] = df["direction"].astype(str)
+    df["day_type"] = df["day_type"].astype(str)
+    df["time"] = df["time"].astype(str)
+    # 営業日基準の分（04:00 起点）。旧形式 "00:09" も新形式 "24:09" も同じ値になる
+    df["svc_min"] = parse_service_times(df["time"]).astype(int)
+
+    return df
+
+
+def read_timetable_csv(path: str) -> "pd.DataFrame":
+    import pandas as pd
+
+    return _normalize(pd.read_csv(path))
+
+
+def read_timetable_rows(path: str) -> list[tuple[str, str, str, str, int, str, str]]:
+    """
+    pandas を使わずに読む軽量版。起動の速さが要るところ（端末表示やコンパイル）で使う。
+    (line, station, direction, day_type, svc_min, dest, remark) のリストを返す。
+    """
+    import csv
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"CSVに必要な列が足りません: {missing}")
+        return [
+            (
+                r["line"],
+                r["station"],
+                r["direction"],
+                r["day_type"],
+                parse_service_time(r["time"]),
+                (r.get("dest") or "").strip(),
+                (r.get("remark") or "").strip(),
+            )
+            for r in reader
+        ]
+
+
+def read_timetable_blobs(blobs: dict[str, bytes]) -> "pd.DataFrame":
+    """
+    複数のCSV（{source: 内容}）を1回の read_csv でまとめて読み、source 列を付けて返す。
+    ファイルごとに read_csv するより桁違いに速いので、大量の時刻表を集計するときに使う。
+    ヘッダー行が同じファイルどうしを連結して読む。
+    """
+    import pandas as pd
+
+    by_header: dict[str, list[tuple[str, list[str]]]] = {}
+    for source, data in blobs.items():
+        lines = [line for line in data.decode("utf-8-sig").splitlines() if line.strip()]
+        if lines:
+            by_header.setdefault(lines[0], []).append((source, lines[1:]))
+
+    frames = []
+    for header, files in by_header.items():
+        body = "\n".join(line for _, rows in files for line in rows)
+        df = pd.read_csv(io.StringIO(header + "\n" + body))
+        df["source"] = [source for source, rows in files for _ in rows]
+        frames.append(_normalize(df))
+    if not frames:
+        return _normalize(pd.DataFrame(columns=["line", "station", "direction", "day_type", "time", "source"]))
+    return pd.concat(frames, ignore_index=True)
+
+
+def list_csv_files(timetable_dir: str = TIMETABLE_DIR) -> list[str]:
+    os.makedirs(timetable_dir, exist_ok=True)
+    return sorted(glob.glob(os.path.join(timetable_dir, "*.csv")))
+
+
+def files_fingerprint(paths: list[str]) -> str:
+    """ファイル一覧とそれぞれのサイズ・更新時刻から作る指紋。どれかが変わると変わる。"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    for p in paths:
+        st = os.stat(p)
+        digest.update(f"{p}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_filename(path: str):
+    """
+    期待: timetables/南北線_麻生_真駒内方面.csv
+    => (line, station, direction)
+    うまく分割できなければ (None, None, None)
+    """
+    base = os.path.basename(path)
+    name, _ = os.path.splitext(base)
+    parts = name.split("_")
+    if len(parts) >= 3:
+        return parts[0], parts[1], "_".join(parts[2:])
+    return None, None, None
@@ -0,0 +1,142 @@
+"""
+走行中の列車の位置
+
+時刻表は駅ごとの発車時刻しか持たないので、同じ路線・方面・ダイヤで隣り合う
+（時刻表のある）駅どうしの発車時刻を突き合わせ、「A駅を出てB駅を出るまで」の
+区間を1本ずつ作る。区間は開始時刻順に並べた配列で持ち、時刻 t に走っている列車は
+
+    開始 <= t < 終了
+
+の区間。開始時刻の配列を2回 searchsorted すれば (t - 最長区間, t] の候補に絞れるので、
+区間の所要時間がほぼ揃っていれば O(log n + k) で答えられる（k は走行中の本数）。
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from .service_time import service_seconds
+from .stations import get_station_order
+
+# 隣の駅の発車時刻との突き合わせで許すずれ（分）
+MATCH_TOLERANCE_MIN = 1
+# 駅間の所要時間として試す範囲（分）
+MAX_RUN_MIN = 30
+
+
+@dataclass(frozen=True)
+class TrainPosition:
+    line: str
+    direction: str
+    from_station: str
+    to_station: str
+    depart: int  # from_station の発車（営業日基準の分）
+    arrive: int  # to_station の発車（営業日基準の分）
+    progress: float  # 0.0（from_station）〜 1.0（to_station）
+    dest: str
+
+
+def _run_time(a, b) -> int | None:
+    """A駅の発車 a と B駅の発車 b（どちらも昇順）から、最も多くの列車が合う所要時間を推定する。"""
+    import numpy as np
+
+    best, best_count = None, 0
+    for d in range(1, MAX_RUN_MIN + 1):
+        target = a + d
+        lo = np.searchsorted(b, target - MATCH_TOLERANCE_MIN, side="left")
+        hi = np.searchsorted(b, target + MATCH_TOLERANCE_MIN, side="right")
+        count = int(np.count_nonzero(hi > lo))
+        if count > best_count:
+            best, best_count = d, count
+    return best
+
+
+def _match(a, b, run: int):
+    """a の各発車に、所要時間 run ± 許容ずれ で最も近い b の発車を対応させる（b は1回だけ使う）。"""
+    import numpy as np
+
+    pairs = []
+    used = set()
+    for i, target in enumerate(a + run):
+        j = int(np.searchsorted(b, target))
+        candidates = [k for k in (j - 1, j) if 0 <= k < len(b) and k not in used
+                      and abs(int(b[k]) - int(target)) <= MATCH_TOLERANCE_MIN and b[k] > a[i]]
+        if candidates:
+            k = min(candidates, key=lambda k: abs(int(b[k]) - int(target)))
+            used.add(k)
+            pairs.append((i, k))
+    return pairs
+
+
+class SegmentIndex:
+    """day_type ごとに、区間を開始時刻順に並べた配列。"""
+
+    def __init__(self, segments: dict[str, list[tuple]]):
+        import numpy as np
+
+        self._by_day_type = {}
+        for day_type, rows in segments.items():
+            rows = sorted(rows)
+            start = np.array([r[0] for r in rows], dtype=np.int32)
+            end = np.array([r[1] for r in rows], dtype=np.int32)
+            self._by_day_type[day_type] = (
+                start,
+                end,
+                int((end - start).max()) if rows else 0,
+                [r[2:] for r in rows],  # (line, direction, from, to, dest)
+            )
+
+    def __len__(self):
+        return sum(len(v[0]) for v in self._by_day_type.values())
+
+    def active(self, t: float, day_type: str) -> list[TrainPosition]:
+        """営業日基準の分 t に走っている列車（開始 <= t < 終了）。"""
+        import numpy as np
+
+        if day_type not in self._by_day_type:
+            return []
+        start, end, longest, info = self._by_day_type[day_type]
+        lo = int(np.searchsorted(start, t - longest, side="right"))
+        hi = int(np.searchsorted(start, t, side="right"))
+        positions = []
+        for i in range(lo, hi):
+            if end[i] > t:
+                line, direction, from_station, to_station, dest = info[i]
+                progress = (t - start[i]) / (end[i] - start[i])
+                positions.append(TrainPosition(line, direction, from_station, to_station,
+                                               int(start[i]), int(end[i]), float(progress), dest))
+        return positions
+
+    def positions(self, now: datetime, day_type: str) -> list[TrainPosition]:
+        return self.active(service_seconds(now) / 60, day_type)
+
+
+def build_segment_index(timetables) -> SegmentIndex:
+    """
+    コンパイル済み時刻表から区間の索引を作る。
+    方面の進行順（真駒内方面は STATION_ORDER の順、麻生方面は逆順）に時刻表のある駅を並べ、
+    隣どうしの発車時刻を、推定した所要時間で突き合わせる。
+    """
+    groups: dict[tuple[str, str, str], list[tuple[int, str, int]]] = {}
+    for i, (line, station, direction, day_type) in enumerate(timetables.keys):
+        groups.setdefault((line, direction, day_type), []).append((get_station_order(station), station, i))
+
+    segments: dict[str, list[tuple]] = {}
+    for (line, direction, day_type), stations in groups.items():
+        # 「○○方面」の○○に向かって進む順に並べる
+        terminal = get_station_order(direction.removesuffix("方面"))
+        stations.sort(reverse=terminal <= min(order for order, _, _ in stations))
+        for (_, from_station, i), (_, to_station, j) in zip(stations, stations[1:]):
+            a_lo, a_hi = int(timetables.offsets[i]), int(timetables.offsets[i + 1])
+            b_lo, b_hi = int(timetables.offsets[j]), int(timetables.offsets[j + 1])
+            a = timetables.minutes[a_lo:a_hi].astype("int64")
+            b = timetables.minutes[b_lo:b_hi].astype("int64")
+            if not len(a) or not len(b):
+                continue
+            run = _run_time(a, b)
+            if run is None:
+                continue
+            for ia, ib in _match(a, b, run):
+                dest = timetables.strings[timetables.dest[a_lo + ia]]
+                segments.setdefault(day_type, []).append(
+                    (int(a[ia]), int(b[ib]), line, direction, from_station, to_station, dest)
+                )
+    return SegmentIndex(segments)
@@ -0,0 +1,124 @@
+"""
+遅い再実行のプロファイル
+
+再実行を cProfile で包み、threshold_ms 以上かかったものだけを out_dir に保存する。
+保存は最新 keep 件のリングバッファで、古いものから消す。ファイル名は
+
+    20261019T101500123456_1234ms.prof     （保存した時刻_かかった時間）
+
+中身は pstats で読める形式（python -m pstats でも開ける）。一覧と上位の関数は
+rerun_profiles.py で見る。
+"""
+import cProfile
+import glob
+import math
+import os
+import pstats
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get("TIMETABLE_PROFILE_DIR", "profiles")
+PROFILE_KEEP = 20
+PROFILE_SUFFIX = ".prof"
+_NAME = re.compile(r"^(\d{8}T\d{12})_(\d+)ms" + re.escape(PROFILE_SUFFIX) + "$")
+
+
+@dataclass(frozen=True)
+class CapturedProfile:
+    path: str
+    captured_at: datetime
+    elapsed_ms: int
+
+
+class RerunProfiler:
+    """
+    start() から finish() までを cProfile で測る。
+    別のプロファイラが動いていて始められないとき（Python 3.12 以降で同時に2つ）は何もしない。
+    """
+
+    def __init__(self, threshold_ms: float, out_dir: str = PROFILE_DIR, keep: int = PROFILE_KEEP,
+                 clock=time.perf_counter):
+        if not math.isfinite(threshold_ms) or threshold_ms < 0:
+            raise ValueError(f"threshold_ms は 0 以上の有限の値: {threshold_ms}")
+        self.threshold_ms = threshold_ms
+        self.out_dir = out_dir
+        self.keep = keep
+        self.clock = clock
+        self._profile = None
+        self._started = 0.0
+
+    def start(self) -> bool:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return False
+        self._profile = profile
+        self._started = self.clock()
+        return True
+
+    def finish(self) -> str | None:
+        """測定を止め、しきい値以上なら保存してそのパスを返す。"""
+        if self._profile is None:
+            return None
+        profile, self._profile = self._profile, None
+        profile.disable()
+        elapsed_ms = (self.clock() - self._started) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return None
+        return save_profile(profile, elapsed_ms, self.out_dir, self.keep)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+
+
+def save_profile(profile: cProfile.Profile, elapsed_ms: float, out_dir: str = PROFILE_DIR,
+                 keep: int = PROFILE_KEEP) -> str:
+    """プロファイルを保存し、古いものを keep 件まで消す。"""
+    os.makedirs(out_dir, exist_ok=True)
+    name = f"{datetime.now():%Y%m%dT%H%M%S%f}_{round(elapsed_ms)}ms{PROFILE_SUFFIX}"
+    path = os.path.join(out_dir, name)
+    # 書きかけのファイルを一覧に出さないように、書き終えてから名前を付ける
+    tmp = path + ".tmp"
+    profile.dump_stats(tmp)
+    os.replace(tmp, path)
+    profiles = list_profiles(out_dir)
+    for old in profiles[:max(len(profiles) - keep, 0)]:
+        try:
+            os.remove(old.path)
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def list_profiles(out_dir: str = PROFILE_DIR) -> list[CapturedProfile]:
+    """保存済みのプロファイル（古い順）。"""
+    found = []
+    for path in glob.glob(os.path.join(out_dir, "*" + PROFILE_SUFFIX)):
+        m = _NAME.match(os.path.basename(path))
+        if m:
+            found.append(CapturedProfile(path, datetime.strptime(m[1], "%Y%m%dT%H%M%S%f"), int(m[2])))
+    return sorted(found, key=lambda p: p.captured_at)
+
+
+def top_functions(path: str, n: int = 15, sort: str = "cumulative") -> list[dict]:
+    """プロファイルの上位 n 関数（既定は累積時間の順）。"""
+    stats = pstats.Stats(path)
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:n]:
+        _, total_calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+            "ncalls": total_calls,
+            "tottime_ms": tottime * 1000,
+            "cumtime_ms": cumtime * 1000,
+        })
+    return rows
@@ -0,0 +1,66 @@
+"""
+表示が次に変わる時刻の計算
+
+決まった間隔で再実行する代わりに、表示中の発車案内から「次に何かが変わる瞬間」を
+求め、そのときだけ再実行・再描画する（app.py と terminal_board.py で共通）。
+
+表示が変わるのは
+  - 時計の分が変わるとき。「あと N 分」は発車の分と時計の分の差なので、表示中の列車の
+    「あと N 分」もこのとき一緒に切り替わる（毎分0秒に1回）
+  - 列車が発車して一覧から消えるとき（発車の分の0秒。これも分の変わり目）
+  - ダイヤの判定が変わる時刻（0時・4時・5時）
+1時間以内に発車する列車が1本も無いとき（終電のあとから始発の1時間前まで）は、
+「あと N 分」を毎分は追わず HEARTBEAT_SEC ごとの見回りだけにする。
+"""
+from datetime import datetime
+
+from .service_time import SERVICE_DAY_START_HOUR, service_seconds
+
+# 切り替わりのちょうどの時刻に起きると丸めの境目に当たるので、少しだけ後に起きる
+WAKE_MARGIN_SEC = 0.05
+# 1時間以内に発車する列車が無いときの再実行の間隔
+HEARTBEAT_SEC = 600
+# この分数以内に発車する列車が無ければ、見回りの間隔でだけ再実行する
+IDLE_HORIZON_MIN = 60
+# 以前の app.py の固定の再実行間隔（replay.py と loadtest.py で比べる基準）
+AUTO_REFRESH_SEC = 15
+# ダイヤの判定（effective_date）と営業日が切り替わる時
+BOUNDARY_HOURS = (0, SERVICE_DAY_START_HOUR, 5)
+
+
+def next_change_delay(dep_minutes, now: datetime, clock_minutes: bool = True) -> float:
+    """
+    now から、表示が次に変わるまでの秒数。
+    「あと N 分」は発車の分と時計の分（秒は切り捨て）の差なので、表示中の列車があれば
+    次の分の変わり目で変わる。発車の分ちょうどに表示している列車は、すぐに一覧から消える。
+    表示中の列車が無ければ、clock_minutes なら時計の分の変わり目、そうでなければ無限大。
+    """
+    dep_minutes = list(dep_minutes)
+    if not dep_minutes and not clock_minutes:
+        return float("inf")
+    now_sec = service_seconds(now)
+    if any(m * 60 <= now_sec for m in dep_minutes):
+        return WAKE_MARGIN_SEC
+    return 60 - now_sec % 60 + WAKE_MARGIN_SEC
+
+
+def _until_boundary(now: datetime) -> float:
+    secs = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+    return min((h * 3600 - secs) % 86400 or 86400 for h in BOUNDARY_HOURS)
+
+
+def next_refresh_delay(boards, now: datetime, heartbeat_sec: float = HEARTBEAT_SEC,
+                       clock_minutes: bool = False) -> float:
+    """
+    boards（compute_boards の結果）を表示したあと、次に再実行すべきまでの秒数。
+    IDLE_HORIZON_MIN 以内に発車する列車があれば、次の分の変わり目（「あと N 分」と、
+    clock_minutes なら時計の分がそこで変わる）。無ければ heartbeat_sec だが、表示中の
+    最初の列車が IDLE_HORIZON_MIN 以内に入る時刻は越えない。ダイヤの切り替わる時刻も越えない。
+    """
+    dep_minutes = [d.svc_min for b in boards for d in b.departures]
+    idle_sec = min(dep_minutes, default=float("inf")) * 60 - service_seconds(now) - IDLE_HORIZON_MIN * 60
+    if idle_sec <= 0:
+        delay = next_change_delay(dep_minutes, now, clock_minutes)
+    else:
+        delay = min(heartbeat_sec, idle_sec + WAKE_MARGIN_SEC)
+    return max(1.0, min(delay, _until_boundary(now) + WAKE_MARGIN_SEC))
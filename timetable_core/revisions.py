@@ -0,0 +1,189 @@
+"""
+ダイヤ改正の版
+
+timetables/ のCSVを基準の版とし、改正後の版は施行日ごとのディレクトリに
+基準との差分だけを置く。どの版も基準に対する差分なので、版どうしは独立している。
+
+    timetables/南北線_大通_麻生方面.csv                         基準の版
+    timetables/revisions/2026-04-01/南北線_大通_麻生方面.delta.csv   4/1 施行の版の差分
+
+差分CSVの列は op, day_type, time, dest, remark, old_dest, old_remark。
+op は "+"（追加）、"-"（削除）、"~"（同じ時刻の行先・備考の変更。old_* が変更前）。
+路線・駅・方面はファイル名で決まるので列には持たない。
+
+営業日 d に使う版は、施行日が d 以前で最も新しい版（無ければ基準の版）。
+営業日は 04:00 で切り替わるので、施行日前夜の 0時台の列車は旧ダイヤのまま。
+ただし終電のあとに続けて出す翌営業日の始発は新ダイヤ（source.TimetableSource.lookup）。
+"""
+import csv
+import glob
+import heapq
+import os
+from datetime import date, datetime
+
+from .compiled import CompiledTimetables, compile_records, file_records
+from .loader import TIMETABLE_DIR, list_csv_files, parse_filename
+from .service_time import format_service_time, parse_service_time, service_date
+
+REVISIONS_SUBDIR = "revisions"
+DELTA_SUFFIX = ".delta.csv"
+DELTA_COLUMNS = ["op", "day_type", "time", "dest", "remark", "old_dest", "old_remark"]
+
+# 1ファイル内の1本 (day_type, svc_min, dest, remark)
+Row = tuple[str, int, str, str]
+
+
+def revisions_dir(base_dir: str = TIMETABLE_DIR) -> str:
+    return os.path.join(base_dir, REVISIONS_SUBDIR)
+
+
+def list_revisions(base_dir: str = TIMETABLE_DIR) -> list[date]:
+    """施行日の一覧（古い順）。"""
+    found = []
+    for path in glob.glob(os.path.join(revisions_dir(base_dir), "*")):
+        try:
+            found.append(date.fromisoformat(os.path.basename(path)))
+        except ValueError:
+            continue
+    return sorted(found)
+
+
+def active_revision(day: date | datetime, base_dir: str = TIMETABLE_DIR) -> date | None:
+    """
+    営業日 day（datetime なら、それが属する営業日）に使う版の施行日。基準の版なら None。
+    """
+    if isinstance(day, datetime):
+        day = service_date(day)
+    active = None
+    for effective in list_revisions(base_dir):
+        if effective <= day:
+            active = effective
+    return active
+
+
+def revision_files(revision: date | None, base_dir: str = TIMETABLE_DIR) -> list[str]:
+    """版の差分ファイル。基準の版なら空。"""
+    if revision is None:
+        return []
+    pattern = os.path.join(revisions_dir(base_dir), revision.isoformat(), "*" + DELTA_SUFFIX)
+    return sorted(glob.glob(pattern))
+
+
+def _slot(row: Row) -> tuple[str, int]:
+    return row[0], row[1]
+
+
+def diff_departures(base: list[Row], new: list[Row]) -> list[tuple]:
+    """
+    2つの版の差分を、両方をソートして1回の併合（sorted merge）で求める。
+    (op, day_type, svc_min, dest, remark, old_dest, old_remark) のリストを返す。
+    同じ時刻で削除と追加が対になったものは "~"（変更）にまとめる。
+    """
+    base, new = sorted(base), sorted(new)
+    removed, added = [], []
+    i = j = 0
+    while i < len(base) or j < len(new):
+        if j >= len(new) or (i < len(base) and base[i] < new[j]):
+            removed.append(base[i])
+            i += 1
+        elif i >= len(base) or new[j] < base[i]:
+            added.append(new[j])
+            j += 1
+        else:
+            i += 1
+            j += 1
+
+    # 削除と追加も時刻順に並んでいるので、もう一度併合して同じ時刻のものを対にする
+    ops = []
+    i = j = 0
+    while i < len(removed) or j < len(added):
+        if j >= len(added) or (i < len(removed) and _slot(removed[i]) < _slot(added[j])):
+            ops.append(("-",) + removed[i] + ("", ""))
+            i += 1
+        elif i >= len(removed) or _slot(added[j]) < _slot(removed[i]):
+            ops.append(("+",) + added[j] + ("", ""))
+            j += 1
+        else:
+            ops.append(("~",) + added[j] + removed[i][2:])
+            i += 1
+            j += 1
+    return ops
+
+
+def apply_delta(base: list[Row], ops: list[tuple]) -> list[Row]:
+    """
+    基準の行に差分を当てた行（ソート済み）を返す。
+    基準と追加分を heapq.merge で併合しながら、削除分（ソート済み）を読み飛ばす。
+    """
+    added = sorted(op[1:5] for op in ops if op[0] in "+~")
+    removed = sorted(
+        op[1:5] if op[0] == "-" else (op[1], op[2], op[5], op[6]) for op in ops if op[0] in "-~"
+    )
+    result = []
+    k = 0
+    for row in heapq.merge(sorted(base), added):
+        while k < len(removed) and removed[k] < row:
+            k += 1
+        if k < len(removed) and removed[k] == row:
+            k += 1
+            continue
+        result.append(row)
+    return result
+
+
+def read_delta(path: str) -> list[tuple]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return [
+            (r["op"], r["day_type"], parse_service_time(r["time"]), r["dest"], r["remark"],
+             r["old_dest"], r["old_remark"])
+            for r in csv.DictReader(f)
+        ]
+
+
+def write_delta(path: str, ops: list[tuple]):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(DELTA_COLUMNS)
+        for op, day_type, svc_min, dest, remark, old_dest, old_remark in ops:
+            writer.writerow([op, day_type, format_service_time(svc_min), dest, remark, old_dest, old_remark])
+
+
+def _departures(records) -> list[Row]:
+    return [r[3:] for r in records]
+
+
+def revision_records(revision: date | None, base_dir: str = TIMETABLE_DIR) -> list[tuple]:
+    """版の全行 (line, station, direction, day_type, svc_min, dest, remark)。"""
+    by_name = {os.path.basename(p)[:-4]: file_records(p) for p in list_csv_files(base_dir)}
+    for path in revision_files(revision, base_dir):
+        name = os.path.basename(path)[:-len(DELTA_SUFFIX)]
+        line, station, direction = parse_filename(name + ".csv")
+        base = by_name.get(name, [])
+        by_name[name] = [(line, station, direction) + d for d in apply_delta(_departures(base), read_delta(path))]
+    return [r for records in by_name.values() for r in records]
+
+
+def compile_revision(revision: date | None, base_dir: str = TIMETABLE_DIR, version: int = 0) -> CompiledTimetables:
+    """版の時刻表をコンパイルする。"""
+    return compile_records(revision_records(revision, base_dir), version=version)
+
+
+def create_revision(new_dir: str, effective: date, base_dir: str = TIMETABLE_DIR) -> dict[str, dict[str, int]]:
+    """
+    new_dir の全CSV（改正後の全時刻表）と基準の版との差分を、施行日 effective の版として書き出す。
+    差分の無いファイルは書かない。ファイルごとの {"+": 件数, "-": 件数, "~": 件数} を返す。
+    """
+    out_dir = os.path.join(revisions_dir(base_dir), effective.isoformat())
+    os.makedirs(out_dir, exist_ok=True)
+    base = {os.path.basename(p): p for p in list_csv_files(base_dir)}
+    new = {os.path.basename(p): p for p in list_csv_files(new_dir)}
+    summary = {}
+    for name in sorted(base.keys() | new.keys()):
+        ops = diff_departures(
+            _departures(file_records(base[name])) if name in base else [],
+            _departures(file_records(new[name])) if name in new else [],
+        )
+        if ops:
+            write_delta(os.path.join(out_dir, name[:-4] + DELTA_SUFFIX), ops)
+            summary[name] = {op: sum(1 for o in ops if o[0] == op) for op in "+-~"}
+    return summary
@@ -0,0 +1,248 @@
+"""
+臨時ダイヤ（期間を区切った例外）
+
+雪まつりの臨時列車や、工事で運転区間を短くする日のように day_type の2種類では
+表せない変更は、期間ごとのディレクトリに駅・方面ごとの例外ファイルとして置く。
+
+    timetables/exceptions/2027-02-04_2027-02-11_雪まつり/南北線_大通_真駒内方面.exc.csv
+
+ディレクトリ名は「開始日_終了日_名前」（営業日で、終了日を含む。名前は省略可）。
+例外ファイルの列は op, day_type, time, dest, remark。
+op は "+"（臨時列車の追加）、"-"（運休）、"~"（同じ時刻の列車の行先・備考の変更）。
+運休と変更は時刻で基準の列車を1本ずつ指す。同じ時刻に2本ある場合、運休は dest を書けば
+その行先の列車を、書かなければ先の1本を外す（2本とも外すなら2行書く）。変更は先の1本を置き換える。
+day_type が空の行はどちらのダイヤにも当てる。指す列車が基準に無い行は unmatched() で報告する。
+
+基準の時刻表（コンパイル済みの配列）は作り直さず、問い合わせのたびにその営業日の
+例外だけを基準の次列車に heapq.merge で併合する（board.compute_boards）。
+基準の時刻表に無い駅・方面・ダイヤの臨時列車は、追加分だけで出す。
+どちらも昇順なので先頭から n 本取れば済み、1回の手間はその日の例外の件数で決まる。
+"""
+import bisect
+import csv
+import glob
+import heapq
+import itertools
+import os
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from .daytype import DAY_TYPES
+from .loader import TIMETABLE_DIR, parse_filename
+from .service_time import MINUTES_PER_DAY, format_service_time, parse_service_time, service_date, service_seconds
+
+EXCEPTIONS_SUBDIR = "exceptions"
+EXCEPTION_SUFFIX = ".exc.csv"
+
+# (line, station, direction)
+Slot = tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class ExceptionPeriod:
+    name: str
+    start: date
+    end: date  # この営業日を含む
+    path: str
+
+    def covers(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+
+@dataclass(frozen=True)
+class DayChanges:
+    """1駅・1方面に当てる例外。"""
+    added: tuple[tuple[int, str, str], ...]  # (svc_min, dest, remark) の昇順
+    cancelled: tuple[tuple[int, str], ...]  # 基準から1本ずつ外す (svc_min, dest)。dest が空ならその分のどれか
+
+    def merge(self, base: list[tuple[int, str, str]], n: int) -> list[tuple[int, str, str]]:
+        """
+        基準の次列車 base（(svc_min, dest, remark) の昇順）から運休分を除き、
+        追加分と併合して先頭 n 本を返す。同じ時刻なら基準の列車が先。
+        """
+        kept = _drop_cancelled(base, Counter(self.cancelled))
+        return list(itertools.islice(heapq.merge(kept, self.added, key=_minute), n))
+
+
+NO_CHANGES = DayChanges((), ())
+
+
+def _minute(row: tuple[int, str, str]) -> int:
+    return row[0]
+
+
+def _drop_cancelled(rows, pending: Counter):
+    """rows から pending の (分, 行先) を1本ずつ除く。使った分は pending から減らす。"""
+    for row in rows:
+        for key in ((row[0], row[1]), (row[0], "")):
+            if pending[key] > 0:
+                pending[key] -= 1
+                break
+        else:
+            yield row
+
+
+def exceptions_dir(base_dir: str = TIMETABLE_DIR) -> str:
+    return os.path.join(base_dir, EXCEPTIONS_SUBDIR)
+
+
+def parse_period_dir(path: str) -> ExceptionPeriod | None:
+    """"2027-02-04_2027-02-11_雪まつり" のようなディレクトリ名を読む。読めなければ None。"""
+    parts = os.path.basename(path).split("_", 2)
+    try:
+        start, end = date.fromisoformat(parts[0]), date.fromisoformat(parts[1])
+    except (IndexError, ValueError):
+        return None
+    return ExceptionPeriod(parts[2] if len(parts) > 2 else "", start, end, path)
+
+
+def list_exception_periods(base_dir: str = TIMETABLE_DIR) -> list[ExceptionPeriod]:
+    """例外の期間の一覧（開始日の順）。"""
+    found = [parse_period_dir(p) for p in glob.glob(os.path.join(exceptions_dir(base_dir), "*"))]
+    return sorted((p for p in found if p is not None), key=lambda p: (p.start, p.end, p.name))
+
+
+def exception_files(base_dir: str = TIMETABLE_DIR) -> list[str]:
+    """全期間の例外ファイル（fingerprint 用）。"""
+    return sorted(glob.glob(os.path.join(exceptions_dir(base_dir), "*", "*" + EXCEPTION_SUFFIX)))
+
+
+def read_exceptions(path: str) -> list[tuple[str, str, int, str, str]]:
+    """(op, day_type, svc_min, dest, remark) のリスト。"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = []
+        for r in csv.DictReader(f):
+            if r["op"] not in ("+", "-", "~"):
+                raise ValueError(f"{path}: op は +, -, ~ のどれかです: {r['op']!r}")
+            rows.append((r["op"], (r.get("day_type") or "").strip(), parse_service_time(r["time"]),
+                         (r.get("dest") or "").strip(), (r.get("remark") or "").strip()))
+        return rows
+
+
+class ScheduleExceptions:
+    """
+    期間ごと・駅と方面ごと・day_type（空はどちらも）ごとに、追加分と運休分を昇順で持つ。
+    """
+
+    def __init__(self, periods: list[tuple[ExceptionPeriod, dict[Slot, list[tuple]]]]):
+        self._periods = []
+        for period, by_slot in periods:
+            table: dict[tuple[Slot, str], tuple[list, list]] = {}
+            for slot, rows in by_slot.items():
+                for op, day_type, svc_min, dest, remark in rows:
+                    added, cancelled = table.setdefault((slot, day_type), ([], []))
+                    if op in "+~":
+                        added.append((svc_min, dest, remark))
+                    if op in "-~":
+                        # 変更の dest は新しい行先なので、元の列車は時刻だけで指す
+                        cancelled.append((svc_min, dest if op == "-" else ""))
+            for added, _ in table.values():
+                added.sort()
+            self._periods.append((period, table))
+
+    @property
+    def periods(self) -> list[ExceptionPeriod]:
+        return [period for period, _ in self._periods]
+
+    def active(self, day: date | datetime) -> tuple[ExceptionPeriod, ...]:
+        """営業日 day（datetime なら、それが属する営業日）に当てる期間。"""
+        if isinstance(day, datetime):
+            day = service_date(day)
+        return tuple(period for period, _ in self._periods if period.covers(day))
+
+    def on(self, day: date, day_type: str) -> dict[Slot, DayChanges]:
+        """営業日 day を day_type のダイヤで走らせるときの例外（重なる期間は併合する）。"""
+        parts: dict[Slot, list[tuple[list, list]]] = {}
+        for period, table in self._periods:
+            if not period.covers(day):
+                continue
+            for (slot, row_day_type), lists in table.items():
+                if row_day_type in ("", day_type):
+                    parts.setdefault(slot, []).append(lists)
+        return {
+            slot: DayChanges(tuple(heapq.merge(*(added for added, _ in lists), key=_minute)),
+                             tuple(c for _, cancelled in lists for c in cancelled))
+            for slot, lists in parts.items()
+        }
+
+    def window(self, now: datetime, day_type: str) -> dict[Slot, DayChanges]:
+        """
+        now 以降に当てる例外。compute_boards と同じく、今営業日の残りの後ろに
+        翌営業日分（分に +1日）をつなげる。追加分は now 以降（分を切り上げ）のものだけ。
+        """
+        day = service_date(now)
+        today = self.on(day, day_type)
+        tomorrow = self.on(day + timedelta(days=1), day_type)
+        if not today and not tomorrow:
+            return {}
+        first_min = int(-(-service_seconds(now) // 60))
+        window = {}
+        for slot in today.keys() | tomorrow.keys():
+            t, nxt = today.get(slot, NO_CHANGES), tomorrow.get(slot, NO_CHANGES)
+            start = bisect.bisect_left(t.added, (first_min,))
+            window[slot] = DayChanges(
+                t.added[start:] + tuple((m + MINUTES_PER_DAY, dest, remark) for m, dest, remark in nxt.added),
+                t.cancelled + tuple((m + MINUTES_PER_DAY, dest) for m, dest in nxt.cancelled),
+            )
+        return window
+
+    def apply(self, timetables, day: date, day_type: str):
+        """
+        営業日 day を day_type のダイヤで走らせるときの時刻表（day_type の分だけ）。
+        compute_boards のように次の数本ではなく、1日分の全列車がいるとき（路線図など）に使う。
+        """
+        from .compiled import compile_records
+
+        changes = self.on(day, day_type)
+        records = []
+        for i, key in enumerate(timetables.keys):
+            if key[3] != day_type:
+                continue
+            base = _slice_rows(timetables, i)
+            change = changes.pop(key[:3], NO_CHANGES)
+            records += [key + row for row in change.merge(base, len(base) + len(change.added))]
+        # 基準の時刻表に無い駅・方面・ダイヤの臨時列車
+        for slot, change in changes.items():
+            records += [slot + (day_type,) + row for row in change.added]
+        return compile_records(records, version=timetables.version)
+
+    def unmatched(self, timetables) -> list[str]:
+        """運休・変更の行のうち、指す列車が基準の時刻表（timetables）に無いもの。"""
+        problems = []
+        for period, table in self._periods:
+            for (slot, row_day_type), (_, cancelled) in table.items():
+                if not cancelled:
+                    continue
+                for day_type in [row_day_type] if row_day_type else DAY_TYPES:
+                    i = timetables.find(*slot, day_type)
+                    pending = Counter(cancelled)
+                    if i is not None:
+                        list(_drop_cancelled(_slice_rows(timetables, i), pending))
+                    for (m, dest), count in sorted(pending.items()):
+                        if count > 0:
+                            problems.append(
+                                f"{os.path.basename(period.path)}: {'_'.join(slot)} {day_type} "
+                                f"{format_service_time(m)}{' ' + dest if dest else ''} に当たる列車がありません"
+                            )
+        return problems
+
+
+def _slice_rows(timetables, i: int) -> list[tuple[int, str, str]]:
+    """コンパイル済み時刻表のスライス i の全列車 (svc_min, dest, remark)。"""
+    lo, hi = int(timetables.offsets[i]), int(timetables.offsets[i + 1])
+    strings = timetables.strings
+    return [(int(m), strings[d], strings[r]) for m, d, r in
+            zip(timetables.minutes[lo:hi], timetables.dest[lo:hi], timetables.remark[lo:hi])]
+
+
+def load_exceptions(base_dir: str = TIMETABLE_DIR) -> ScheduleExceptions:
+    """exceptions/ の全期間を読む。"""
+    periods = []
+    for period in list_exception_periods(base_dir):
+        by_slot = {}
+        for path in sorted(glob.glob(os.path.join(period.path, "*" + EXCEPTION_SUFFIX))):
+            name = os.path.basename(path)[:-len(EXCEPTION_SUFFIX)]
+            by_slot[parse_filename(name + ".csv")] = read_exceptions(path)
+        periods.append((period, by_slot))
+    return ScheduleExceptions(periods)
@@ -0,0 +1,89 @@
+"""
+駅名の検索
+
+駅名・別表記・かなの読み・ローマ字を正規化した検索語にして、
+  - 検索語を昇順に並べた配列（前方一致は bisect で範囲を求めるだけ。トライと同じ働き）
+  - 1文字・2文字の n-gram → 駅の転置索引（途中一致。「24」で北24条など）
+を読み込み時に1回だけ作る。数千駅でも1回の検索は二分探索と候補の確認だけで済む。
+
+正規化は NFKC（全角英数を半角に）、カタカナをひらがなに、英字を小文字にして記号を除き、
+ローマ字の長音（oo, ou, uu）を1文字にそろえる（oodoori でも odori でも大通）。
+"""
+import bisect
+import unicodedata
+
+from .stations import Station
+
+# カタカナ → ひらがな
+_KATAKANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+_LONG_VOWELS = (("oo", "o"), ("ou", "o"), ("uu", "u"))
+
+
+def normalize(text: str) -> str:
+    """検索語と駅の読みを同じ形にそろえる。"""
+    text = unicodedata.normalize("NFKC", text).translate(_KATAKANA).lower()
+    text = "".join(ch for ch in text if ch.isalnum())
+    if text.isascii():
+        for long, short in _LONG_VOWELS:
+            text = text.replace(long, short)
+    return text
+
+
+def _ngrams(key: str):
+    yield from key
+    yield from (key[i:i + 2] for i in range(len(key) - 1))
+
+
+class StationSearchIndex:
+    def __init__(self, stations: list[Station]):
+        self.stations = list(stations)
+        entries = set()
+        self._postings: dict[str, set[int]] = {}
+        # 駅ごとの検索語（途中一致の確認用）
+        self._station_keys = [
+            {normalize(k) for k in (s.name, s.alias, s.kana, s.romaji) if k} for s in self.stations
+        ]
+        for i, keys in enumerate(self._station_keys):
+            for key in keys:
+                entries.add((key, i))
+                for gram in _ngrams(key):
+                    self._postings.setdefault(gram, set()).add(i)
+        entries = sorted(entries)
+        self._keys = [key for key, _ in entries]
+        self._ids = [i for _, i in entries]
+
+    def search(self, query: str, limit: int = 10) -> list[Station]:
+        """
+        完全一致、前方一致（検索語の辞書順）、途中一致（駅一覧の順）の順に最大 limit 駅を返す。
+        乗換駅のように同じ駅名が路線ごとに並ぶ場合は、それぞれを返す。
+        """
+        q = normalize(query)
+        if not q or limit <= 0:
+            return []
+        # 完全一致の検索語は前方一致の範囲の先頭に並んでいるので、前から limit 駅取れば済む
+        found = []
+        for pos in range(bisect.bisect_left(self._keys, q), len(self._keys)):
+            if not self._keys[pos].startswith(q):
+                break
+            if self._ids[pos] not in found:
+                found.append(self._ids[pos])
+                if len(found) == limit:
+                    return [self.stations[i] for i in found]
+        found += self._infix(q, set(found), limit - len(found))
+        return [self.stations[i] for i in found]
+
+    def _infix(self, q: str, skip: set[int], limit: int) -> list[int]:
+        grams = [q[i:i + 2] for i in range(len(q) - 1)] or [q]
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(self._postings.get(g, ()))):
+            postings = self._postings.get(gram, set())
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        found = []
+        for i in sorted(candidates - skip):
+            if any(q in key for key in self._station_keys[i]):
+                found.append(i)
+                if len(found) == limit:
+                    break
+        return found
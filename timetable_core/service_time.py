@@ -0,0 +1,60 @@
+"""
+営業日基準の時刻（service-day time）
+
+1営業日は 04:00 に始まり、翌 03:59 までを同じ営業日として扱う。
+時刻は「営業日開始 04:00 からの経過分」の整数で持ち、
+CSV には GTFS と同じく 24時を超える表記（00:09 → "24:09"）で書き出す。
+旧形式の "00:09" もそのまま読み込める。
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+JST = ZoneInfo("Asia/Tokyo")
+
+SERVICE_DAY_START_HOUR = 4
+SERVICE_DAY_START_MIN = SERVICE_DAY_START_HOUR * 60
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_service_minutes(hour: int, minute: int) -> int:
+    """時・分を営業日基準の分に変換する。0〜3時台は前営業日の深夜（24時台〜）とみなす。"""
+    if hour < SERVICE_DAY_START_HOUR:
+        hour += 24
+    return hour * 60 + minute - SERVICE_DAY_START_MIN
+
+
+def parse_service_time(hhmm: str) -> int:
+    """
+    "HH:MM" を営業日基準の分に変換する。
+    "24:09" のような新形式も "00:09" のような旧形式も同じ値になる。
+    """
+    hh, mm = str(hhmm).strip().split(":")[:2]
+    return to_service_minutes(int(hh), int(mm))
+
+
+def format_service_time(minutes: int) -> str:
+    """営業日基準の分を GTFS 形式の "HH:MM"（24時以降は 24:xx, 25:xx）にする。"""
+    total = int(minutes) + SERVICE_DAY_START_MIN
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def format_clock_time(minutes: int) -> str:
+    """営業日基準の分を表示用の時計表記（00:00〜23:59）にする。"""
+    total = (int(minutes) + SERVICE_DAY_START_MIN) % MINUTES_PER_DAY
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+def service_date(now: datetime) -> date:
+    """now が属する営業日の日付（04:00 より前なら前日）。"""
+    return (now - timedelta(minutes=SERVICE_DAY_START_MIN)).date()
+
+
+def service_seconds(now: datetime) -> float:
+    """now が属する営業日の開始（04:00）からの経過秒。"""
+    secs = (
+        now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        - SERVICE_DAY_START_MIN * 60
+    )
+    if secs < 0:
+        secs += MINUTES_PER_DAY * 60
+    return secs
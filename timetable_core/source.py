@@ -0,0 +1,72 @@
+"""
+画面で共有する時計と時刻表
+
+app.py と pages/ の各ページは、プロセスに1つの TimetableSource から現在時刻と
+時刻表・臨時ダイヤを受け取る。コンパイル済み時刻表は (版, CSVと差分の fingerprint) ごとに
+ここで1回だけ持ち、ページごとに同じ配列を作り直さない。
+共有メモリの読み手（shm_store.SharedTimetableReader）を渡すと、CSV は読まずにそちらを使う。
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from .cache import BoundedCache
+from .clock import SystemClock
+from .compiled import CompiledTimetables
+from .loader import TIMETABLE_DIR, files_fingerprint, list_csv_files
+from .revisions import active_revision, compile_revision, revision_files
+from .schedule_exceptions import ScheduleExceptions, exception_files, load_exceptions
+from .service_time import service_date
+
+
+@dataclass(frozen=True)
+class LoadedTimetables:
+    # 時刻表の出どころ（("shm", 版) または (改正日, fingerprint)。翌営業日が別の版ならその2つも続く）。
+    # キャッシュのキーに使う
+    source: tuple
+    timetables: CompiledTimetables
+    revision: date | None = None
+    # 翌営業日の版の時刻表（施行日の前夜だけ。compute_boards の tomorrow に渡す）。同じ版なら None
+    tomorrow: CompiledTimetables | None = None
+
+
+class TimetableSource:
+    def __init__(self, clock=None, timetable_dir: str = TIMETABLE_DIR, reader=None, max_versions: int = 2):
+        self.clock = clock or SystemClock()
+        self.timetable_dir = timetable_dir
+        self.reader = reader
+        # 改正の前後で新旧の版を同時に使うセッションがあるので、版は2つまで持つ
+        self.cache = BoundedCache("timetables", max_entries=max_versions)
+        self.exception_cache = BoundedCache("exceptions", max_entries=1)
+
+    def now(self) -> datetime:
+        return self.clock.now()
+
+    def lookup(self, now: datetime) -> LoadedTimetables | None:
+        """
+        now の営業日に使う時刻表（施行日の 04:00 から新しい改正の版）。
+        翌営業日が別の版（施行日の前夜）なら、終電のあとに続ける翌営業日分のためにその版も返す。
+        時刻表の CSV が1つも無ければ None。
+        """
+        if self.reader is not None:
+            timetables = self.reader.get()
+            return LoadedTimetables(("shm", timetables.version), timetables)
+        files = list_csv_files(self.timetable_dir)
+        if not files:
+            return None
+        revision = active_revision(now, self.timetable_dir)
+        next_revision = active_revision(service_date(now) + timedelta(days=1), self.timetable_dir)
+        source, timetables = self._compiled(revision, files)
+        if next_revision == revision:
+            return LoadedTimetables(source, timetables, revision)
+        next_source, tomorrow = self._compiled(next_revision, files)
+        return LoadedTimetables(source + next_source, timetables, revision, tomorrow)
+
+    def _compiled(self, revision: date | None, files: list[str]) -> tuple[tuple, CompiledTimetables]:
+        source = (revision, files_fingerprint(files + revision_files(revision, self.timetable_dir)))
+        return source, self.cache.get_or_create(source, lambda: compile_revision(revision, self.timetable_dir))
+
+    def exceptions(self) -> tuple[str, ScheduleExceptions]:
+        """臨時ダイヤと、例外ファイルの fingerprint（発車案内のキャッシュのキーに使う）。"""
+        fingerprint = files_fingerprint(exception_files(self.timetable_dir))
+        return fingerprint, self.exception_cache.get_or_create(
+            fingerprint, lambda: load_exceptions(self.timetable_dir))
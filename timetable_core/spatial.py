@@ -0,0 +1,114 @@
+"""
+近くの駅の検索
+
+駅を緯度・経度の格子（既定 0.01度 ≒ 1km 四方）に振り分けておき、
+問い合わせ地点のマスから外側へ1周ずつ広げながら探す。
+k 駅見つかり、まだ調べていない外側のマスがどれも k 番目より遠くなったら打ち切るので、
+市内の全停留所（数百件）に増えても調べるのは近くの数マス分だけで済む。
+"""
+import math
+from datetime import datetime
+
+from .stations import Station, target_direction
+
+EARTH_RADIUS_M = 6_371_000
+DEFAULT_CELL_DEG = 0.01
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """2点間の大円距離（m）。"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+class StationGrid:
+    def __init__(self, stations: list[Station], cell_deg: float = DEFAULT_CELL_DEG):
+        self.stations = list(stations)
+        self.cell_deg = cell_deg
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        for i, s in enumerate(self.stations):
+            self._cells.setdefault(self._cell(s.lat, s.lon), []).append(i)
+        if self._cells:
+            rows = [c[0] for c in self._cells]
+            cols = [c[1] for c in self._cells]
+            self._extent = (min(rows), max(rows), min(cols), max(cols))
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _ring_min_distance(self, lat: float, ring: int) -> float:
+        """中心のマスから ring 周目のマスにある点までの距離の下限（m）。"""
+        if ring == 0:
+            return 0.0
+        # 緯度方向・経度方向に (ring - 1) マス分は必ず離れている。経度は高緯度側で短くなる
+        cells = (ring - 1) * self.cell_deg
+        lat_m = math.radians(cells) * EARTH_RADIUS_M
+        lon_m = lat_m * math.cos(math.radians(min(abs(lat) + ring * self.cell_deg, 89.0)))
+        return min(lat_m, lon_m)
+
+    def _ring_cells(self, row0: int, col0: int, ring: int):
+        """中心から ring 周目のマスのうち、駅のある範囲に入るもの。"""
+        min_row, max_row, min_col, max_col = self._extent
+        cols = range(max(col0 - ring, min_col), min(col0 + ring, max_col) + 1)
+        for row in range(max(row0 - ring, min_row), min(row0 + ring, max_row) + 1):
+            if abs(row - row0) == ring:
+                yield from ((row, col) for col in cols)
+            else:
+                yield from ((row, col) for col in (col0 - ring, col0 + ring) if min_col <= col <= max_col)
+
+    def nearest(self, lat: float, lon: float, k: int = 3) -> list[tuple[float, Station]]:
+        """(lat, lon) に近い順に k 駅を (距離m, 駅) で返す。"""
+        if not self.stations or k <= 0:
+            return []
+        row0, col0 = self._cell(lat, lon)
+        min_row, max_row, min_col, max_col = self._extent
+        max_ring = max(abs(row0 - min_row), abs(row0 - max_row), abs(col0 - min_col), abs(col0 - max_col))
+        found: list[tuple[float, int]] = []
+        for ring in range(max_ring + 1):
+            if len(found) >= k and found[k - 1][0] <= self._ring_min_distance(lat, ring):
+                break
+            for row, col in self._ring_cells(row0, col0, ring):
+                for i in self._cells.get((row, col), ()):
+                    s = self.stations[i]
+                    found.append((haversine_m(lat, lon, s.lat, s.lon), i))
+            found.sort()
+        return [(d, self.stations[i]) for d, i in found[:k]]
+
+
+def nearest_departures(timetables, grid: StationGrid, lat: float, lon: float, now: datetime,
+                       day_type: str, k: int = 3, n: int = 2, all_directions: bool = True, exceptions=None,
+                       tomorrow=None):
+    """
+    近い k 駅（駅名で重複なし）と、それぞれの次の列車を返す。
+    [(距離m, 駅, [Board, ...])]。all_directions が False なら app.py と同じく駅ごとに1方面。
+    列車は compute_boards（next_trains をまとめて計算する版）で求め、exceptions（臨時ダイヤ）があれば併合する。
+    tomorrow（翌営業日の版）は compute_boards と同じ。
+    """
+    from .board import compute_boards
+
+    # 乗換駅は路線ごとに並ぶので、駅名で k 件そろうまで探す駅数を広げる
+    want = k * 4
+    while True:
+        nearest: list[tuple[float, Station]] = []
+        names = set()
+        candidates = grid.nearest(lat, lon, want)
+        for distance, station in candidates:
+            if station.name not in names:
+                names.add(station.name)
+                nearest.append((distance, station))
+            if len(nearest) == k:
+                break
+        if len(nearest) == k or len(candidates) < want:
+            break
+        want *= 2
+
+    directions = {(line, station, direction) for line, station, direction, _ in timetables.keys}
+    selection = sorted(
+        key for key in directions
+        if key[1] in names and (all_directions or key[2] == target_direction(key[1]))
+    )
+    boards = compute_boards(timetables, now, day_type, n=n, selection=selection, exceptions=exceptions,
+                            tomorrow=tomorrow)
+    return [(d, s, [b for b in boards if b.station == s.name]) for d, s in nearest]
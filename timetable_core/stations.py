@@ -0,0 +1,52 @@
+"""駅の並び順と表示する方面、駅一覧"""
+import csv
+import os
+from dataclasses import dataclass
+
+# 南北線の駅順序（表示順用）
+STATION_ORDER = [
+    "麻生", "北34条", "北24条", "北18条", "北12条", "さっぽろ", "大通", "すすきの",
+    "中島公園", "幌平橋", "中の島", "平岸", "南平岸", "澄川", "自衛隊前", "真駒内"
+]
+
+
+def get_station_order(station_name):
+    if station_name in STATION_ORDER:
+        return STATION_ORDER.index(station_name)
+    return 999
+
+
+def target_direction(station_name):
+    """
+    駅ごとに表示する方面
+    麻生駅 -> 真駒内方面のみ表示
+    それ以外 -> 麻生方面のみ表示
+    """
+    if station_name == "麻生":
+        return "真駒内方面"
+    return "麻生方面"
+
+
+# 駅の位置と読みをまとめた駅一覧（line, station, lat, lon, kana, romaji, alias）
+STATION_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "stations.csv")
+
+
+@dataclass(frozen=True)
+class Station:
+    line: str
+    name: str
+    lat: float
+    lon: float
+    kana: str = ""  # ひらがなの読み
+    romaji: str = ""
+    alias: str = ""  # 駅名の別表記（さっぽろ → 札幌）
+
+
+def load_station_catalog(path: str = STATION_CATALOG) -> list[Station]:
+    """駅一覧を読む。同じ駅名でも路線が違えば別の行（乗換駅は路線の数だけ並ぶ）。"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return [
+            Station(r["line"], r["station"], float(r["lat"]), float(r["lon"]),
+                    r.get("kana") or "", r.get("romaji") or "", r.get("alias") or "")
+            for r in csv.DictReader(f)
+        ]
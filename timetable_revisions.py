@@ -0,0 +1,90 @@
+"""
+ダイヤ改正の版の管理
+
+市の改正ダイヤ（全駅のCSV）を受け取ったら、切り替えの夜に timetables/ を
+上書きする代わりに、施行日つきの版（基準との差分）として登録しておく。
+app.py は営業日ごとに施行中の版を選ぶ。
+
+    python timetable_revisions.py add new_timetables/ --effective 2026-04-01
+    python timetable_revisions.py list
+    python timetable_revisions.py export --date 2026-04-01 --out /tmp/full   # 版の全CSVを書き出す
+"""
+import argparse
+import csv
+import os
+import shutil
+from datetime import date, datetime
+
+from timetable_core import JST, TIMETABLE_DIR, service_date
+from timetable_core.revisions import (
+    active_revision,
+    create_revision,
+    list_revisions,
+    read_delta,
+    revision_files,
+    revision_records,
+    revisions_dir,
+)
+from timetable_core.service_time import format_service_time
+
+CSV_COLUMNS = ["line", "station", "direction", "day_type", "time", "dest", "remark"]
+
+
+def export_revision(revision: date | None, out_dir: str, base_dir: str = TIMETABLE_DIR) -> int:
+    """版の全時刻表を、基準と同じ形式のCSVとして out_dir に書き出す。書いたファイル数を返す。"""
+    os.makedirs(out_dir, exist_ok=True)
+    by_file: dict[tuple[str, str, str], list] = {}
+    for r in sorted(revision_records(revision, base_dir), key=lambda r: r[:5]):
+        by_file.setdefault(r[:3], []).append(r)
+    for (line, station, direction), rows in by_file.items():
+        with open(os.path.join(out_dir, f"{line}_{station}_{direction}.csv"), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for r in rows:
+                writer.writerow(list(r[:4]) + [format_service_time(r[4]), r[5], r[6]])
+    return len(by_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ダイヤ改正の版を管理する")
+    parser.add_argument("--dir", default=TIMETABLE_DIR, help="基準の時刻表CSVのディレクトリ")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="改正後の全CSVから版を登録する")
+    add.add_argument("new_dir", help="改正後の時刻表CSVのディレクトリ")
+    add.add_argument("--effective", type=date.fromisoformat, required=True, help="施行日（この営業日から使う）")
+    add.add_argument("--replace", action="store_true", help="同じ施行日の版があれば作り直す")
+    sub.add_parser("list", help="登録済みの版を表示する")
+    export = sub.add_parser("export", help="ある営業日の版の全CSVを書き出す")
+    export.add_argument("--date", type=date.fromisoformat, help="営業日（既定は今日の営業日）")
+    export.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        out_dir = os.path.join(revisions_dir(args.dir), args.effective.isoformat())
+        if os.path.exists(out_dir):
+            if not args.replace:
+                raise SystemExit(f"{out_dir} はすでにあります（作り直すなら --replace）")
+            shutil.rmtree(out_dir)
+        summary = create_revision(args.new_dir, args.effective, args.dir)
+        for name, counts in summary.items():
+            print(f"{name}: +{counts['+']} -{counts['-']} ~{counts['~']}")
+        print(f"revision {args.effective} written to {out_dir} ({len(summary)} delta files)")
+        return
+
+    if args.command == "list":
+        today = active_revision(datetime.now(JST), args.dir)
+        print(f"base ({args.dir}/)" + ("  <- active" if today is None else ""))
+        for revision in list_revisions(args.dir):
+            ops = [op for path in revision_files(revision, args.dir) for op in read_delta(path)]
+            print(f"{revision}  {len(revision_files(revision, args.dir))} files, {len(ops)} changes"
+                  + ("  <- active" if revision == today else ""))
+        return
+
+    day = args.date or service_date(datetime.now(JST))
+    revision = active_revision(day, args.dir)
+    n = export_revision(revision, args.out, args.dir)
+    print(f"wrote {n} files of revision {revision or 'base'} to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,17 @@
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
+import argparse
+import hashlib
+import json
+import logging
 import os
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from timetable_core.service_time import format_service_time, parse_service_time, to_service_minutes
 
 TARGETS = [
     {
@@ -35,18 +44,92 @@ TARGETS = [
     }
 ]
 
-def fetch_and_parse(url):
-    print(f"Fetching {url}...")
+DAY_TYPES = ["weekday", "weekend_holiday"]
+
+# 進み具合は標準エラーへ（--report - の標準出力は JSON だけにする）
+log = logging.getLogger("verify_timetables")
+
+# 前回の検証状態（CSVのハッシュ、ページの ETag/ハッシュ、抽出済み時刻、結果）
+STATE_PATH = ".verify_state.json"
+STATE_VERSION = 1
+
+
+def load_state(path=STATE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    if state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION}
+    for section in ("pages", "csvs", "results"):
+        state.setdefault(section, {})
+    return state
+
+
+def save_state(state, path=STATE_PATH):
+    # 途中で落ちても壊れた状態ファイルを残さないよう、書いてから置き換える
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def csv_hash(path, csv_state):
+    """
+    CSVの内容ハッシュ。サイズと mtime が前回と同じならファイルを読まずに前回の値を返す。
+    csv_state（state["csvs"]）は更新される。
+    """
+    st = os.stat(path)
+    cached = csv_state.get(path)
+    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+        return cached["hash"]
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    csv_state[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+    return digest
+
+
+def result_key(station, direction, day_type):
+    return f"{station}|{direction}|{day_type}"
+
+
+def fetch_and_parse(url, cached=None):
+    """
+    ページを取得して (page_entry, soup) を返す。
+    cached（前回の page_entry）があれば ETag / Last-Modified で条件付き取得し、
+    304 または本文ハッシュが同じなら soup は None（前回の抽出結果を使う）。
+    取得に失敗したら (None, None)。
+    """
+    log.info(f"Fetching {url}...")
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
     try:
-        response = requests.get(url)
+        response = requests.get(url, headers=headers, timeout=30)
+        if response.status_code == 304 and cached:
+            log.info("  Not modified (304)")
+            return cached, None
         response.encoding = response.apparent_encoding
         response.raise_for_status()
     except Exception as e:
-        print(f"Error fetching URL: {e}")
-        return None
+        log.error(f"Error fetching {url}: {e}")
+        return None, None
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    return soup
+    digest = hashlib.sha256(response.content).hexdigest()
+    if cached and cached.get("hash") == digest:
+        log.info("  Unchanged (same content hash)")
+        entry = dict(cached)
+        soup = None
+    else:
+        entry = {"hash": digest, "extracted": {}}
+        soup = BeautifulSoup(response.text, "html.parser")
+    entry["etag"] = response.headers.get("ETag")
+    entry["last_modified"] = response.headers.get("Last-Modified")
+    return entry, soup
 
 def extract_times_from_text_block(soup, direction_key, day_key):
     """
@@ -67,7 +150,7 @@ def extract_times_from_text_block(soup, direction_key, day_key):
             break
             
     if not target_h2:
-        print(f"  [WARN] Header for {direction_key} not found.")
+        log.warning(f"  [WARN] Header for {direction_key} not found.")
         return times
         
     # 2. Find Day Type Section after Direction Header
@@ -118,11 +201,6 @@ def extract_times_from_text_block(soup, direction_key, day_key):
     # Expected: 6, 7, ..., 23, 0 (19 lines)
     # If lines count is distinctively different, warn.
     
-    # Debug
-    # print(f"DEBUG {direction_key} {day_key}: Collected {len(collected_lines)} lines.")
-    # for i, l in enumerate(collected_lines[:3]):
-    #     print(f"  Line {i}: {l}")
-
     # Sometimes header lines or remarks sneak in.
     # Filter to lines that look like sequences of numbers.
     valid_lines = []
@@ -135,13 +213,11 @@ def extract_times_from_text_block(soup, direction_key, day_key):
             if len(nums) == 1:
                 continue
             valid_lines.append(nums)
-            
-    print(f"DEBUG {direction_key} {day_key}: Valid {len(valid_lines)} lines.")
-    for i, vl in enumerate(valid_lines):
-        print(f"  Valid Line {i} (Hour {6+i if 6+i < 24 else 6+i-24}): {vl}")
+
     
-    # Logic: Start at 6.
+    # Logic: Start at 6 and count up through the service day (0時台 is hour 24).
     hour = 6
+    last_hour = 24
     processed_count = 0
     
     for nums in valid_lines:
@@ -151,69 +227,203 @@ def extract_times_from_text_block(soup, direction_key, day_key):
         
         # Heuristic: If first number is exactly the hour we expect, remove it (e.g. "6 12 24")
         # But only if it's < 24.
-        if mins and mins[0] == hour:
+        if mins and mins[0] == hour % 24:
             mins.pop(0)
 
         # Double check: if explicit hour header filtering missed something, and we have one number equals hour?
         # But we filtered len(nums)==1 above.
             
-        # Add times
+        # Add times (service-day minutes, 04:00 origin)
         for m in mins:
             if 0 <= m < 60:
-                t_str = f"{hour:02d}:{m:02d}"
-                times.add(t_str)
-        
-        # Advance hour
-        if hour == 23:
-            hour = 0
-        elif hour == 0:
-            hour = -1 # Stop
-        else:
-            hour += 1
+                times.add(to_service_minutes(hour, m))
         
         processed_count += 1
-        if hour == -1:
+        if hour == last_hour:
             break
+        hour += 1
             
     return times
 
-def verify_station(target):
-    print(f"=== Verifying {target['station']} ===")
-    soup = fetch_and_parse(target['url'])
-    if not soup:
-        return
+def verify_station(target, state, page_entry, soup, force=False):
+    """
+    1駅分を検証し、結果レコードのリストを返す。
+    CSVハッシュとページハッシュが前回と同じ組は再検証せず status="unchanged" にする。
+    """
+    log.info(f"=== Verifying {target['station']} ===")
+    records = []
+    if page_entry is None:
+        # ページが取れなかった組は結果から落とさず、エラーとして数える
+        log.error("  Error (page unavailable)")
+        for direction, csv_path in target["csv_files"].items():
+            for day_type in DAY_TYPES:
+                prev = state["results"].get(result_key(target["station"], direction, day_type), {})
+                records.append({
+                    "station": target["station"],
+                    "direction": direction,
+                    "day_type": day_type,
+                    "csv_path": csv_path,
+                    "previous_status": prev.get("status"),
+                    "changed_inputs": [],
+                    "status": "fetch_error",
+                })
+        return records
 
     for direction, csv_path in target['csv_files'].items():
-        print(f"Checking {direction}...")
+        log.info(f"Checking {direction}...")
         
-        df = pd.read_csv(csv_path)
+        digest = csv_hash(csv_path, state["csvs"])
+        df = None
         
         dir_key = "麻生" if "麻生" in direction else "真駒内"
         
-        for day_type in ["weekday", "weekend_holiday"]:
-            web_times = extract_times_from_text_block(soup, dir_key, day_type)
+        for day_type in DAY_TYPES:
+            key = result_key(target["station"], direction, day_type)
+            prev = state["results"].get(key, {})
+            changed = [
+                name for name, now_hash, prev_hash in (
+                    ("csv", digest, prev.get("csv_hash")),
+                    ("page", page_entry["hash"], prev.get("page_hash")),
+                )
+                if now_hash != prev_hash
+            ]
+            record = {
+                "station": target["station"],
+                "direction": direction,
+                "day_type": day_type,
+                "csv_path": csv_path,
+                "previous_status": prev.get("status"),
+                "changed_inputs": changed,
+            }
+            if not changed and not force:
+                log.info(f"  [{day_type}] Unchanged ({prev.get('status')})")
+                records.append({**record, "status": "unchanged"})
+                continue
+
+            # ページが変わっていなければ前回の抽出結果を使う（HTMLを再パースしない）
+            extract_key = f"{dir_key}|{day_type}"
+            if extract_key in page_entry["extracted"]:
+                web_times = set(page_entry["extracted"][extract_key])
+            elif soup is not None:
+                web_times = extract_times_from_text_block(soup, dir_key, day_type)
+                page_entry["extracted"][extract_key] = sorted(web_times)
+            else:
+                web_times = set()
             
             if not web_times:
-                print(f"  [{day_type}] Skip (No web data extracted)")
+                log.warning(f"  [{day_type}] Skip (No web data extracted)")
+                records.append({**record, "status": "no_web_data"})
                 continue
 
-            csv_times = set(df[df["day_type"] == day_type]["time"].tolist())
+            if df is None:
+                df = pd.read_csv(csv_path)
+            csv_times = set(df[df["day_type"] == day_type]["time"].map(parse_service_time).tolist())
             
             missing_in_csv = web_times - csv_times
             extra_in_csv = csv_times - web_times
             
             if not missing_in_csv and not extra_in_csv:
-                print(f"  [{day_type}] OK ({len(csv_times)} trains)")
+                log.info(f"  [{day_type}] OK ({len(csv_times)} trains)")
+                status = "ok"
             else:
-                print(f"  [{day_type}] MISMATCH")
-                print(f"    Web count: {len(web_times)}, CSV count: {len(csv_times)}")
+                log.warning(f"  [{day_type}] MISMATCH")
+                log.warning(f"    Web count: {len(web_times)}, CSV count: {len(csv_times)}")
                 if missing_in_csv:
-                    sample = sorted(list(missing_in_csv))[:5]
-                    print(f"    Missing in CSV (Sample): {sample}")
+                    sample = [format_service_time(m) for m in sorted(missing_in_csv)[:5]]
+                    log.warning(f"    Missing in CSV (Sample): {sample}")
                 if extra_in_csv:
-                    sample = sorted(list(extra_in_csv))[:5]
-                    print(f"    Extra in CSV (Sample):   {sample}")
+                    sample = [format_service_time(m) for m in sorted(extra_in_csv)[:5]]
+                    log.warning(f"    Extra in CSV (Sample):   {sample}")
+                status = "mismatch"
+
+            record.update({
+                "status": status,
+                "web_count": len(web_times),
+                "csv_count": len(csv_times),
+                "missing_in_csv": [format_service_time(m) for m in sorted(missing_in_csv)],
+                "extra_in_csv": [format_service_time(m) for m in sorted(extra_in_csv)],
+            })
+            records.append(record)
+            state["results"][key] = {
+                "csv_hash": digest,
+                "page_hash": page_entry["hash"],
+                "status": status,
+                "web_count": len(web_times),
+                "csv_count": len(csv_times),
+            }
+    return records
+
+
+def fetch_pages(targets, state, offline=False, force=False):
+    """
+    全ページを並列に（条件付きで）取得し、{url: (page_entry, soup)} を返す。
+    offline なら取得せず前回の状態だけを使う。
+    """
+    urls = [t["url"] for t in targets]
+    if offline:
+        return {url: (state["pages"].get(url), None) for url in urls}
+    cached = {url: (None if force else state["pages"].get(url)) for url in urls}
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        fetched = pool.map(lambda url: fetch_and_parse(url, cached[url]), urls)
+        return dict(zip(urls, fetched))
+
+
+def run(targets=TARGETS, state_path=STATE_PATH, offline=False, force=False):
+    """検証を実行し、JSONレポート（dict）を返す。状態ファイルも更新する。"""
+    state = load_state(state_path)
+    pages = fetch_pages(targets, state, offline=offline, force=force)
+
+    records = []
+    for t in targets:
+        page_entry, soup = pages[t["url"]]
+        if page_entry is not None and not offline:
+            state["pages"][t["url"]] = page_entry
+        records.extend(verify_station(t, state, page_entry, soup, force=force))
+
+    save_state(state, state_path)
+
+    checked = [r for r in records if r["status"] not in ("unchanged", "fetch_error")]
+    # 再検証しなかった組は前回の結果のまま
+    effective = [r["previous_status"] if r["status"] == "unchanged" else r["status"] for r in records]
+    return {
+        "generated_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "state_path": state_path,
+        "summary": {
+            "total": len(records),
+            "checked": len(checked),
+            "unchanged": sum(r["status"] == "unchanged" for r in records),
+            "mismatch": effective.count("mismatch"),
+            "errors": effective.count("fetch_error"),
+        },
+        # 前回から結果が変わった組（新規を含む）
+        "diff": [r for r in checked if r["status"] != r["previous_status"]],
+        "results": records,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="時刻表CSVを札幌市の公式ページと照合する")
+    parser.add_argument("--state", default=STATE_PATH, help="検証状態ファイル")
+    parser.add_argument("--report", help="JSONレポートの出力先（- で標準出力）")
+    parser.add_argument("--force", action="store_true", help="変更がなくても全組を再検証する")
+    parser.add_argument("--offline", action="store_true", help="ページを取得せず前回の取得結果で照合する")
+    args = parser.parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO, format="%(message)s")
+
+    report = run(TARGETS, state_path=args.state, offline=args.offline, force=args.force)
+    summary = report["summary"]
+    log.info(
+        f"checked {summary['checked']} / {summary['total']} "
+        f"(unchanged {summary['unchanged']}, mismatch {summary['mismatch']}, errors {summary['errors']})"
+    )
+    if args.report:
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.report == "-":
+            print(text)
+        else:
+            with open(args.report, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+    return 1 if summary["mismatch"] or summary["errors"] else 0
 
 if __name__ == "__main__":
-    for t in TARGETS:
-        verify_station(t)
+    sys.exit(main())